@@ -1,22 +1,26 @@
+import secrets
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from pydantic import ValidationError
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.db.database import get_session
+from app.db.base import get_async_session
 from app.crud import user_crud
 from app.models.base import User, Company, UserRole
 from app.schemas.user_schemas import TokenData
+from app.core.config import settings
 from app.core.security import SECRET_KEY, ALGORITHM
+from app.core.auth_cache import AuthPrincipal, Membership, auth_cache
 from fastapi import Header
 
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/login/token")
 
-def get_current_user(
-    db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
-) -> User:
+def _decode_token(token: str) -> tuple[TokenData, dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         token_data = TokenData(email=payload.get("sub"))
@@ -27,11 +31,53 @@ def get_current_user(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    
-    user = user_crud.get_user_by_email(db, email=token_data.email)
+    return token_data, payload
+
+def _cached_principal(token_data: TokenData, payload: dict) -> AuthPrincipal | None:
+    """Principal disponible sans requête : cache du processus, puis claims signés du token."""
+    return auth_cache.get(token_data.email) or AuthPrincipal.from_claims(token_data.email, payload)
+
+def _store_principal(user: User | None) -> AuthPrincipal:
     if user is None:
         raise HTTPException(status_code=404, detail="User not found")
-    return user
+    principal = AuthPrincipal.from_user(user)
+    auth_cache.put(principal)
+    return principal
+
+def _check_active(principal: AuthPrincipal) -> AuthPrincipal:
+    if not principal.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return principal
+
+def _membership_or_none(principal: AuthPrincipal, company_id: int) -> Membership | None:
+    return principal.memberships.get(company_id)
+
+def _raise_no_access(detail: str):
+    raise HTTPException(status_code=403, detail=detail)
+
+
+# ====================================================================
+# Authentification et autorisation (session synchrone).
+# Une requête dont le principal est en cache (ou dans le token) ne fait aucune
+# requête d'authentification. Une appartenance inconnue d'un principal non frais
+# (cache, token) déclenche un rechargement unique avant de refuser l'accès.
+# ====================================================================
+
+def _load_principal(db: Session, email: str) -> AuthPrincipal:
+    return _store_principal(user_crud.get_user_with_memberships(db, email=email))
+
+def get_current_principal(
+    db: Session = Depends(get_session), token: str = Depends(oauth2_scheme)
+) -> AuthPrincipal:
+    token_data, payload = _decode_token(token)
+    return _cached_principal(token_data, payload) or _load_principal(db, token_data.email)
+
+def get_current_active_principal(principal: AuthPrincipal = Depends(get_current_principal)) -> AuthPrincipal:
+    return _check_active(principal)
+
+def get_current_user(principal: AuthPrincipal = Depends(get_current_principal)) -> User:
+    """Utilisateur courant, détaché de la session (`id`, `email`, `is_active`)."""
+    return principal.to_user()
 
 def get_current_active_user(current_user: User = Depends(get_current_user)) -> User:
     if not current_user.is_active:
@@ -48,33 +94,43 @@ def get_current_active_admin(current_user: User = Depends(get_current_active_use
         )
     return current_user
 
+def require_metrics_token(authorization: str | None = Header(None)) -> None:
+    """
+    Accès du collecteur aux métriques internes (limites par entreprise, versions des
+    modèles) : jeton `METRICS_TOKEN` en `Authorization: Bearer`. Sans jeton configuré,
+    les métriques ne sont pas servies.
+    """
+    if not settings.METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.METRICS_TOKEN.encode()):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid metrics token",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+
+def _require_membership(db: Session, principal: AuthPrincipal, company_id: int, detail: str) -> Membership:
+    membership = _membership_or_none(principal, company_id)
+    if membership is None and principal.source != "db":
+        membership = _membership_or_none(_load_principal(db, principal.email), company_id)
+    if membership is None:
+        _raise_no_access(detail)
+    return membership
+
 def get_active_company_and_role(
     # L'ID de l'entreprise vient UNIQUEMENT du header.
     active_company_id: int = Header(..., alias="X-Company-ID", description="ID de l'entreprise active pour la session"),
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_session) # Ajout de la session db pour récupérer l'objet Company
+    principal: AuthPrincipal = Depends(get_current_active_principal),
+    db: Session = Depends(get_session)
 ) -> tuple[Company, UserRole]:
     """
     Dépendance qui récupère l'ID de l'entreprise depuis les headers,
     vérifie que l'utilisateur courant est bien membre de cette entreprise,
-    et retourne l'objet Company et le rôle de l'utilisateur.
+    et retourne l'entreprise (détachée : `id` et `name`) et le rôle de l'utilisateur.
     """
-    # Chercher le lien dans les associations de l'utilisateur
-    link = next((link for link in current_user.company_links if link.company_id == active_company_id), None)
-    
-    if not link:
-        raise HTTPException(
-            status_code=403,
-            detail="User does not have access to this company.",
-        )
-    
-    # Récupérer l'objet Company complet
-    company = db.get(Company, active_company_id)
-    if not company:
-        # Cas très rare où le lien existe mais l'entreprise a été supprimée
-        raise HTTPException(status_code=404, detail="Company not found.")
-
-    return company, link.role
+    membership = _require_membership(db, principal, active_company_id, "User does not have access to this company.")
+    return membership.to_company(), membership.role
 
 # On peut aussi créer une dépendance spécifique pour les admins de l'entreprise active
 def get_active_company_admin(
@@ -89,27 +145,16 @@ def get_active_company_admin(
 
 def get_company_from_path_and_verify_access(
     company_id: int, # L'ID vient maintenant du path parameter
-    current_user: User = Depends(get_current_active_user)
+    principal: AuthPrincipal = Depends(get_current_active_principal),
+    db: Session = Depends(get_session)
 ) -> tuple[Company, UserRole]:
     """
     Dépendance qui récupère l'ID de l'entreprise depuis le chemin de l'URL,
     vérifie que l'utilisateur courant est bien membre de cette entreprise,
-    et retourne l'objet Company et le rôle de l'utilisateur dans celle-ci.
+    et retourne l'entreprise (détachée) et le rôle de l'utilisateur dans celle-ci.
     """
-    # Chercher le lien dans les associations de l'utilisateur
-    link = next((link for link in current_user.company_links if link.company_id == company_id), None)
-    
-    if not link:
-        raise HTTPException(
-            status_code=403,
-            detail="User does not have access to the requested company.",
-        )
-    
-    # La relation 'company' devrait être chargée ici
-    if not link.company:
-        raise HTTPException(status_code=404, detail="Company not found or relationship not loaded.")
-        
-    return link.company, link.role
+    membership = _require_membership(db, principal, company_id, "User does not have access to the requested company.")
+    return membership.to_company(), membership.role
 
 # On peut aussi créer une dépendance pour les admins qui utilise la précédente
 def get_admin_for_company_in_path(
@@ -120,4 +165,64 @@ def get_admin_for_company_in_path(
         raise HTTPException(
             status_code=403, detail="The user doesn't have admin privileges for this company."
         )
-    return company
\ No newline at end of file
+    return company
+
+
+# ====================================================================
+# Variantes asynchrones (AsyncSession) pour les endpoints de lecture.
+# Mêmes règles que ci-dessus ; en cas de chargement, les relations utilisées
+# sont pré-chargées (aucun chargement paresseux possible en asynchrone).
+# ====================================================================
+
+async def _load_principal_async(db: AsyncSession, email: str) -> AuthPrincipal:
+    return _store_principal(await user_crud.get_user_by_email_async(db, email=email))
+
+async def get_current_principal_async(
+    db: AsyncSession = Depends(get_async_session), token: str = Depends(oauth2_scheme)
+) -> AuthPrincipal:
+    token_data, payload = _decode_token(token)
+    return _cached_principal(token_data, payload) or await _load_principal_async(db, token_data.email)
+
+async def get_current_active_principal_async(
+    principal: AuthPrincipal = Depends(get_current_principal_async),
+) -> AuthPrincipal:
+    return _check_active(principal)
+
+async def get_current_active_user_async(
+    principal: AuthPrincipal = Depends(get_current_active_principal_async),
+) -> User:
+    return principal.to_user()
+
+async def _require_membership_async(db: AsyncSession, principal: AuthPrincipal, company_id: int, detail: str) -> Membership:
+    membership = _membership_or_none(principal, company_id)
+    if membership is None and principal.source != "db":
+        membership = _membership_or_none(await _load_principal_async(db, principal.email), company_id)
+    if membership is None:
+        _raise_no_access(detail)
+    return membership
+
+async def require_company_membership_async(db: AsyncSession, principal: AuthPrincipal, company_id: int, detail: str) -> Membership:
+    """Appartenance du principal à une entreprise (rechargée une fois si inconnue), sinon 403."""
+    return await _require_membership_async(db, principal, company_id, detail)
+
+async def get_active_company_and_role_async(
+    active_company_id: int = Header(..., alias="X-Company-ID", description="ID de l'entreprise active pour la session"),
+    principal: AuthPrincipal = Depends(get_current_active_principal_async),
+    db: AsyncSession = Depends(get_async_session),
+) -> tuple[Company, UserRole]:
+    """
+    Équivalent asynchrone de `get_active_company_and_role`.
+    """
+    membership = await _require_membership_async(db, principal, active_company_id, "User does not have access to this company.")
+    return membership.to_company(), membership.role
+
+async def get_company_from_path_and_verify_access_async(
+    company_id: int,
+    principal: AuthPrincipal = Depends(get_current_active_principal_async),
+    db: AsyncSession = Depends(get_async_session),
+) -> tuple[Company, UserRole]:
+    """
+    Équivalent asynchrone de `get_company_from_path_and_verify_access`.
+    """
+    membership = await _require_membership_async(db, principal, company_id, "User does not have access to the requested company.")
+    return membership.to_company(), membership.role
@@ -2,10 +2,10 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Any
 
-from app.db.database import get_session
+from app.db.base import get_async_session
 from app.crud import user_crud
 from app.schemas.user_schemas import (
     UserRegister, 
@@ -14,26 +14,44 @@ from app.schemas.user_schemas import (
     UserCompany
 )
 from app.models.base import User
-from app.core.security import create_access_token, verify_password
-from app.api.deps import get_current_active_user
+from app.core.security import create_access_token
+from app.core.password_hashing import password_hasher, PasswordHasherBusy
+from app.core.config import settings
+from app.core.auth_cache import AuthPrincipal, auth_cache
+from app.api.deps import get_current_active_principal
 
 router = APIRouter()
 
 
+def _password_hashing_unavailable() -> HTTPException:
+    """Réponse rapide quand le pool de hachage est saturé (pic de connexions)."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service is busy, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserInDB, status_code=status.HTTP_201_CREATED)
-def register_new_user(user_in: UserRegister, db: Session = Depends(get_session)) -> Any:
+async def register_new_user(user_in: UserRegister, db: AsyncSession = Depends(get_async_session)) -> Any:
     """
     Crée un nouveau compte utilisateur. 
     Ce compte n'est initialement lié à aucune entreprise.
     """
-    user = user_crud.get_user_by_email(db, email=user_in.email)
+    user = await user_crud.get_user_by_email_async(db, email=user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="The user with this email already exists in the system.",
         )
+
+    # Le hachage bcrypt se fait dans le pool de processus dédié
+    try:
+        hashed_password = await password_hasher.hash(user_in.password)
+    except PasswordHasherBusy:
+        raise _password_hashing_unavailable()
     
-    new_user = user_crud.create_user(db, user_in=user_in)
+    new_user = await user_crud.create_user_async(db, user_in=user_in, hashed_password=hashed_password)
     
     # La liste des entreprises sera vide au début
     return UserInDB(
@@ -45,8 +63,8 @@ def register_new_user(user_in: UserRegister, db: Session = Depends(get_session))
 
 
 @router.post("/login/token", response_model=LoginResponse)
-def login_for_access_token(
-    db: Session = Depends(get_session), 
+async def login_for_access_token(
+    db: AsyncSession = Depends(get_async_session), 
     form_data: OAuth2PasswordRequestForm = Depends()
 ) -> Any:
     """
@@ -54,8 +72,15 @@ def login_for_access_token(
     Un utilisateur fournit son email (username) et son mot de passe.
     En retour, il reçoit un token d'accès et la liste de ses entreprises.
     """
-    user = user_crud.get_user_by_email(db, email=form_data.username)
-    if not user or not user.hashed_password or not verify_password(form_data.password, user.hashed_password):
+    # Utilisateur chargé avec ses liens et entreprises (réponse et cache d'autorisation)
+    user = await user_crud.get_user_by_email_async(db, email=form_data.username)
+    password_ok, new_hash = False, None
+    if user and user.hashed_password:
+        try:
+            password_ok, new_hash = await password_hasher.verify_and_update(form_data.password, user.hashed_password)
+        except PasswordHasherBusy:
+            raise _password_hashing_unavailable()
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -63,8 +88,19 @@ def login_for_access_token(
         )
     if not user.is_active:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Inactive user")
+
+    # Le hash n'utilise pas le coût bcrypt configuré : le remplacer de façon transparente
+    if new_hash:
+        await user_crud.update_password_hash_async(db, user, new_hash)
     
-    access_token = create_access_token(data={"sub": user.email})
+    # Le principal chargé ici (liens et entreprises) sert aussi les prochaines requêtes
+    principal = AuthPrincipal.from_user(user)
+    auth_cache.put(principal)
+
+    token_data = {"sub": user.email}
+    if settings.AUTH_TOKEN_MEMBERSHIP_CLAIMS:
+        token_data.update(principal.to_claims())
+    access_token = create_access_token(data=token_data)
     
     # Construire la liste des entreprises et des rôles de l'utilisateur
     user_companies = [
@@ -83,20 +119,20 @@ def login_for_access_token(
 
 
 @router.get("/users/me", response_model=UserInDB)
-def read_users_me(current_user: User = Depends(get_current_active_user)) -> Any:
+def read_users_me(principal: AuthPrincipal = Depends(get_current_active_principal)) -> Any:
     """
     Récupère les informations complètes de l'utilisateur actuellement authentifié.
     Utile pour rafraîchir les informations de l'utilisateur dans le frontend.
     """
     # Construire la réponse complète, y compris les affiliations aux entreprises
     user_companies = [
-        UserCompany(id=link.company.id, name=link.company.name, role=link.role)
-        for link in current_user.company_links
+        UserCompany(id=membership.company_id, name=membership.company_name, role=membership.role)
+        for membership in principal.memberships.values()
     ]
 
     return UserInDB(
-        id=current_user.id,
-        email=current_user.email,
-        is_active=current_user.is_active,
+        id=principal.user_id,
+        email=principal.email,
+        is_active=principal.is_active,
         companies=user_companies,
     )
\ No newline at end of file
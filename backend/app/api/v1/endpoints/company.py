@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 from typing import Any
 
 from app.db.database import get_session
+from app.db.base import get_async_session
 from app.crud import user_crud
 from app.schemas.user_schemas import (
     CompanyCreate,
@@ -15,10 +17,10 @@ from app.schemas.user_schemas import (
 from app.models.base import User, Company, UserRole
 from app.api.deps import (
     get_current_active_user,
-    get_company_from_path_and_verify_access,
-    get_active_company_and_role,
     get_admin_for_company_in_path,
     get_active_company_admin,
+    get_active_company_and_role_async,
+    get_company_from_path_and_verify_access_async,
 )
 
 router = APIRouter()
@@ -78,9 +80,9 @@ def invite_new_user(
 # NOUVEL ENDPOINT : GET / pour l'entreprise active
 # ====================================================================
 @router.get("/", response_model=CompanyDetails)
-def read_active_company_details(
-    db: Session = Depends(get_session),
-    active_company_info: tuple = Depends(get_active_company_and_role) # La dépendance fait tout le travail !
+async def read_active_company_details(
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async) # La dépendance fait tout le travail !
 ) -> Any:
     """
     Récupère les détails de l'entreprise active (spécifiée dans le header X-Company-ID),
@@ -89,7 +91,7 @@ def read_active_company_details(
     active_company, user_role = active_company_info
 
     # Récupérer tous les membres de cette entreprise
-    members_db = user_crud.get_company_members(db, company_id=active_company.id)
+    members_db = await user_crud.get_company_members_async(db, company_id=active_company.id)
     
     # Mapper les objets User de la BDD vers le schéma CompanyMember
     members_schema = [
@@ -147,11 +149,11 @@ def create_new_company(
 
 
 @router.get("/{company_id}", response_model=CompanyDetails)
-def read_company_details(
+async def read_company_details(
     company_id: int,  # L'ID de la ressource vient directement du chemin de l'URL
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
     # La dépendance vérifie que l'utilisateur a accès à l'entreprise demandée dans l'URL
-    company_and_role_info: tuple = Depends(get_company_from_path_and_verify_access),
+    company_and_role_info: tuple = Depends(get_company_from_path_and_verify_access_async),
 ) -> Any:
     """
     Récupère les détails d'une entreprise spécifique (identifiée par son ID dans l'URL),
@@ -161,7 +163,7 @@ def read_company_details(
     company, user_role = company_and_role_info
 
     # Récupérer tous les membres de cette entreprise
-    members_db = user_crud.get_company_members(db, company_id=company.id)
+    members_db = await user_crud.get_company_members_async(db, company_id=company.id)
 
     # Mapper les objets User de la BDD vers le schéma CompanyMember
     members_schema = [
@@ -1,31 +1,52 @@
 # Fichier: app/api/v1/endpoints/dashboard.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlmodel import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal, Optional
 
-from app.db.database import get_session
-from app.crud import product_crud, dashboard_crud
-from app.schemas.dashboard_schemas import ProductDashboardData
-from app.api.deps import get_active_company_and_role
+import numpy as np
+
+from app.db.base import get_async_session
+from app.crud import product_crud, dashboard_crud, forecast_crud
+from app.schemas.dashboard_schemas import ProductDashboardData, StockGrid, StockSimulation
+from app.api.deps import get_active_company_and_role_async
 from app.models.base import Company
+from app.core.model_registry import ModelNotFoundError
+from app.core.inventory_simulation import DEFAULT_SCENARIOS
+from app.core.stock_optimization import (
+    DEFAULT_LEAD_TIME_DAYS,
+    DEFAULT_LEAD_TIME_STD_DAYS,
+    DEFAULT_SERVICE_LEVEL,
+    calculate_stock_levels,
+)
+from app.core.chart_builder import (
+    downsample_chart_columns,
+    chart_columns_to_points,
+    chart_columns_to_response,
+)
 
 router = APIRouter()
 
 
 @router.get("/product/{product_id}", response_model=ProductDashboardData)
-def get_product_dashboard(
+async def get_product_dashboard(
     product_id: int,
-    db: Session = Depends(get_session),
-    active_company_info: tuple = Depends(get_active_company_and_role)
+    layout: Literal["points", "columns"] = Query("points", description="Format des données du graphique."),
+    max_points: Optional[int] = Query(None, ge=10, description="Nombre maximal de points du graphique (sous-échantillonnage LTTB)."),
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
 ):
     """
     Récupère toutes les données nécessaires pour le tableau de bord d'un produit spécifique,
     y compris les KPIs, les données du graphique et les facteurs d'influence.
+    Le graphique peut être renvoyé sous forme de points (`chart_data`) ou de colonnes
+    parallèles (`chart_columns`), et sous-échantillonné à `max_points` points.
     """
     active_company, _ = active_company_info
     
     # 1. Vérifier que le produit appartient bien à l'entreprise active
-    product = product_crud.get_product_by_id(db, product_id=product_id)
+    product = await product_crud.get_product_by_id_async(db, product_id=product_id)
     if not product or product.company_id != active_company.id:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -33,20 +54,163 @@ def get_product_dashboard(
         )
     
     # 2. Appeler la fonction métier pour calculer toutes les données
-    dashboard_data = dashboard_crud.get_dashboard_data_for_product(db, product)
+    dashboard_data = await dashboard_crud.get_dashboard_data_for_product(db, product)
     
-    if not dashboard_data.get("chart_data"):
+    chart_columns = dashboard_data.get("chart_columns")
+    if not chart_columns or not len(chart_columns["date"]):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Not enough historical data to generate a dashboard for this product.",
         )
         
+    if max_points:
+        chart_columns = downsample_chart_columns(chart_columns, max_points)
+
     # 3. Formater la réponse selon le schéma Pydantic
     return ProductDashboardData(
         product_id=product.id,
         product_sku=product.sku,
         product_name=product.name,
         kpis=dashboard_data["kpis"],
-        chart_data=dashboard_data["chart_data"],
+        chart_data=chart_columns_to_points(chart_columns) if layout == "points" else None,
+        chart_columns=chart_columns_to_response(chart_columns) if layout == "columns" else None,
         influencing_factors=dashboard_data["influencing_factors"],
-    )
\ No newline at end of file
+    )
+
+
+# Taille maximale de chaque axe de la grille
+MAX_GRID_AXIS = 50
+MAX_SIMULATION_SCENARIOS = 100_000
+
+
+@router.get("/product/{product_id}/stock-grid", response_model=StockGrid)
+async def get_product_stock_grid(
+    product_id: int,
+    service_levels: List[float] = Query([0.9, 0.95, 0.975, 0.99], description="Taux de service à évaluer (entre 0 et 1)."),
+    lead_time_days: List[int] = Query([7, 14, 30, 45, 60], description="Délais de réapprovisionnement à évaluer (jours)."),
+    lead_time_std_days: float = Query(DEFAULT_LEAD_TIME_STD_DAYS, ge=0, description="Écart-type du délai (jours)."),
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
+):
+    """
+    Évalue le stock de sécurité et le point de commande d'un produit pour une grille
+    taux de service x délai de réapprovisionnement, à partir de sa dernière prévision
+    enregistrée : aucune prévision n'est recalculée.
+    """
+    active_company, _ = active_company_info
+
+    product = await product_crud.get_product_by_id_async(db, product_id=product_id)
+    if not product or product.company_id != active_company.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found or you don't have access to it.",
+        )
+    if len(service_levels) > MAX_GRID_AXIS or len(lead_time_days) > MAX_GRID_AXIS:
+        raise HTTPException(status_code=422, detail=f"At most {MAX_GRID_AXIS} values per grid axis.")
+    if any(days < 0 for days in lead_time_days):
+        raise HTTPException(status_code=422, detail="Lead times must be positive.")
+
+    latest = await forecast_crud.get_latest_product_forecast_async(db, product.id)
+    if latest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No forecast available for this product. Run a prediction first.",
+        )
+    run_id, model_version, avg_daily_demand = latest
+    model_error_std = await dashboard_crud.get_model_error_std_async(model_version)
+    if model_error_std is None:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Model version '{model_version}' of the latest forecast is not available.",
+        )
+
+    # Un taux de service par ligne, un délai par colonne : toute la grille en un calcul
+    try:
+        levels = calculate_stock_levels(
+            avg_daily_demand, model_error_std,
+            np.asarray(lead_time_days)[np.newaxis, :], lead_time_std_days,
+            np.asarray(service_levels)[:, np.newaxis],
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    return StockGrid(
+        product_id=product.id,
+        run_id=run_id,
+        model_version=model_version,
+        avg_daily_demand_forecast=round(avg_daily_demand, 2),
+        model_error_std_dev=round(model_error_std, 2),
+        lead_time_std_days=lead_time_std_days,
+        service_levels=service_levels,
+        lead_time_days=lead_time_days,
+        safety_stock=np.round(levels["safety_stock"]).astype(int).tolist(),
+        reorder_point=np.round(levels["reorder_point"]).astype(int).tolist(),
+    )
+
+
+@router.get("/product/{product_id}/stock-simulation", response_model=StockSimulation)
+async def get_product_stock_simulation(
+    product_id: int,
+    service_level: float = Query(DEFAULT_SERVICE_LEVEL, gt=0, lt=1, description="Taux de service visé (entre 0 et 1)."),
+    lead_time_days: float = Query(DEFAULT_LEAD_TIME_DAYS, gt=0, description="Délai de réapprovisionnement moyen (jours)."),
+    lead_time_std_days: float = Query(DEFAULT_LEAD_TIME_STD_DAYS, ge=0, description="Écart-type du délai (jours)."),
+    scenarios: int = Query(10 * DEFAULT_SCENARIOS, ge=100, le=MAX_SIMULATION_SCENARIOS, description="Nombre de scénarios simulés."),
+    seed: Optional[int] = Query(None, ge=0, description="Graine aléatoire (résultat reproductible)."),
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
+):
+    """
+    Point de commande d'un produit par simulation Monte-Carlo : trajectoires de demande
+    tirées de sa dernière prévision enregistrée et des résidus de son historique, délais
+    aléatoires. Donne le point de commande requis pour le taux de service, le taux de
+    rupture et le fill rate, et ceux du point de commande de l'approximation normale
+    (souvent faux pour une demande faible ou intermittente).
+    """
+    active_company, _ = active_company_info
+
+    product = await product_crud.get_product_by_id_async(db, product_id=product_id)
+    if not product or product.company_id != active_company.id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Product not found or you don't have access to it.",
+        )
+
+    latest = await forecast_crud.get_latest_product_forecast_path_async(db, product.id)
+    if latest is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="No forecast available for this product. Run a prediction first.",
+        )
+    run_id, model_version, forecast = latest
+    if lead_time_days > len(forecast):
+        raise HTTPException(status_code=422, detail=f"Lead time exceeds the {len(forecast)}-day forecast horizon.")
+
+    try:
+        # Historique, résidus et simulation : hors de la boucle d'événements
+        simulation = await run_in_threadpool(
+            dashboard_crud.simulate_product_stock,
+            product.id, model_version, forecast,
+            lead_time_days, lead_time_std_days, service_level, scenarios, seed,
+        )
+    except ModelNotFoundError as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+
+    return StockSimulation(
+        product_id=product.id,
+        run_id=run_id,
+        model_version=model_version,
+        residuals=simulation["residuals"],
+        scenarios=scenarios,
+        service_level=service_level,
+        lead_time_days=lead_time_days,
+        lead_time_std_days=lead_time_std_days,
+        avg_daily_demand_forecast=round(simulation["avg_daily_demand_forecast"], 2),
+        lead_time_demand_mean=round(simulation["lead_time_demand_mean"], 2),
+        lead_time_demand_std=round(simulation["lead_time_demand_std"], 2),
+        reorder_point=int(np.ceil(simulation["reorder_point"])),
+        stockout_probability=round(simulation["stockout_probability"], 4),
+        fill_rate=round(simulation["fill_rate"], 4),
+        normal_reorder_point=round(simulation["normal_reorder_point"]),
+        normal_stockout_probability=round(simulation["evaluated_stockout_probability"], 4),
+        normal_fill_rate=round(simulation["evaluated_fill_rate"], 4),
+    )
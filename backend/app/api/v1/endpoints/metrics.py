@@ -0,0 +1,19 @@
+# Fichier : app/api/v1/endpoints/metrics.py
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import require_metrics_token
+from app.core.metrics import collect_metrics
+import app.db.base  # noqa: F401 - enregistre le pool asynchrone auprès des métriques
+
+router = APIRouter()
+
+
+@router.get("/", dependencies=[Depends(require_metrics_token)])
+async def get_metrics() -> dict:
+    """
+    Métriques internes du processus API : pools de connexions (attente au checkout,
+    connexions utilisées, overflow, timeouts), etc. Chaque processus (worker uvicorn,
+    worker Celery) a ses propres compteurs. Réservé au collecteur (jeton `METRICS_TOKEN`).
+    """
+    return collect_metrics()
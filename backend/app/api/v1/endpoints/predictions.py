@@ -1,28 +1,90 @@
 # Fichier : app/api/v1/endpoints/predictions.py
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Header, Query, status
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session
-from typing import Any
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Dict, Literal, Optional
 
+from app.db.base import get_async_session, AsyncSessionLocal
 from app.db.database import get_session
-from app.models.base import User, Company, Product, PredictionJob
+from app.models.base import User, Company, Product, PredictionJob, JobStatus
 from app.schemas.job_schemas import JobSubmission
-from app.api.deps import get_active_company_and_role
-from tasks.model_inference import run_prediction_for_product # Importer la tâche
+from app.api.deps import get_active_company_and_role, get_active_company_and_role_async, get_current_active_user
+from app.core.config import settings
+from app.core.model_registry import model_registry
+from app.core.replenishment import csv_lines, ndjson_lines, replenishment_rows
+from app.core.stock_optimization import DEFAULT_LEAD_TIME_DAYS, DEFAULT_LEAD_TIME_STD_DAYS, DEFAULT_SERVICE_LEVEL
+from app.crud import forecast_crud
+from app.crud.dashboard_crud import get_model_error_std_async, get_sales_watermark
+from app.crud.job_crud import (
+    get_job_by_idempotency_key, prediction_dedup_key, submit_prediction_job, update_job_state, FINISHED_STATUSES,
+)
+from tasks.model_inference import run_prediction_for_product, run_prediction_for_company # Importer les tâches
 
 router = APIRouter()
 
+
+def _reused_job_submission(job: PredictionJob) -> dict:
+    finished = job.status in FINISHED_STATUSES
+    return {
+        "job_id": job.id,
+        "status": job.status,
+        "message": "An identical prediction job already exists" + (" and has finished." if finished else "; returning it."),
+        "deduplicated": True,
+        "result": job.result_data if finished else None,
+    }
+
+
+def _schedule_job(db: Session, job: PredictionJob, task, **kwargs) -> None:
+    """
+    Envoie la tâche du job au broker. En cas d'échec (broker indisponible), le job passe
+    en échec plutôt que de rester PENDING (et réutilisé) sans worker pour le traiter.
+    """
+    try:
+        task.delay(job_id=job.id, **kwargs)
+    except Exception as e:
+        update_job_state(db, job, JobStatus.FAILED, result_data=f"The job could not be scheduled: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The task queue is unavailable; the job was not scheduled. Please retry later.",
+        )
+
+
 @router.post("/product/{product_id}", response_model=JobSubmission, status_code=status.HTTP_202_ACCEPTED)
 def trigger_product_prediction(
     product_id: int,
+    idempotency_key: Optional[str] = Header(
+        None, alias="Idempotency-Key", max_length=255,
+        description="Client key of the submission: replaying it returns the same job.",
+    ),
     db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
     active_company_info: tuple = Depends(get_active_company_and_role)
 ) -> Any:
     """
     Triggers an asynchronous demand forecast prediction for a specific product.
     The product must belong to the active company (specified in X-Company-ID).
+
+    Submissions are coalesced: if a job for the same product, sales data and model
+    version is pending, running or already succeeded, that job is returned
+    (`deduplicated: true`, with its result when finished) instead of a new one. A job
+    pending or running for longer than `PREDICTION_JOB_STALE_SECONDS` is considered
+    abandoned: it is marked failed and replaced.
     """
     active_company, _ = active_company_info
+    dedup_prefix = f"product:{product_id}:"
+
+    # Soumission rejouée (même Idempotency-Key) : le job d'origine, quel que soit son état
+    if idempotency_key:
+        job = get_job_by_idempotency_key(db, current_user.id, idempotency_key)
+        if job is not None:
+            if not (job.dedup_key or "").startswith(dedup_prefix):
+                raise HTTPException(
+                    status_code=422,
+                    detail="Idempotency-Key already used for a different request."
+                )
+            return _reused_job_submission(job)
     
     # Vérifier que le produit existe et appartient bien à l'entreprise active
     product = db.get(Product, product_id)
@@ -32,25 +94,100 @@ def trigger_product_prediction(
             detail="Product not found or you don't have access to it."
         )
 
-    # Récupérer l'utilisateur pour lier le job
-    # On pourrait aussi passer l'objet User via la dépendance si on le modifie
-    user_id = next(link.user_id for link in active_company.user_links if link.user.is_active)
+    # Même produit, mêmes ventes, même modèle : réutiliser le job en cours ou déjà réussi
+    dedup_key = prediction_dedup_key(
+        product.id, model_registry.active_version(active_company.id), get_sales_watermark(db, product.id)
+    )
+    new_job, created = submit_prediction_job(db, current_user.id, active_company.id, dedup_key, idempotency_key)
+    if not created:
+        return _reused_job_submission(new_job)
+
+    # Lancer la tâche Celery en arrière-plan
+    _schedule_job(db, new_job, run_prediction_for_product, product_id=product.id, company_id=active_company.id)
+
+    return {
+        "job_id": new_job.id,
+        "status": new_job.status,
+        "message": f"Prediction job for product SKU '{product.sku}' has been scheduled."
+    }
+
 
-    # Créer un enregistrement de job dans la BDD
-    new_job = PredictionJob(user_id=user_id)
+@router.post("/company", response_model=JobSubmission, status_code=status.HTTP_202_ACCEPTED)
+def trigger_company_prediction(
+    db: Session = Depends(get_session),
+    current_user: User = Depends(get_current_active_user),
+    active_company_info: tuple = Depends(get_active_company_and_role)
+) -> Any:
+    """
+    Triggers a single batched demand forecast for every product of the active company.
+    All series are scored together, which is much cheaper than one job per product.
+    """
+    active_company, _ = active_company_info
+
+    new_job = PredictionJob(user_id=current_user.id, company_id=active_company.id)
     db.add(new_job)
     db.commit()
     db.refresh(new_job)
 
-    # Lancer la tâche Celery en arrière-plan
-    run_prediction_for_product.delay(
-        job_id=new_job.id,
-        product_id=product.id,
-        company_id=active_company.id
-    )
+    _schedule_job(db, new_job, run_prediction_for_company, company_id=active_company.id)
 
     return {
         "job_id": new_job.id,
         "status": new_job.status,
-        "message": f"Prediction job for product SKU '{product.sku}' has been scheduled."
-    }
\ No newline at end of file
+        "message": f"Batch prediction job for company '{active_company.name}' has been scheduled."
+    }
+
+
+async def _replenishment_stream(
+    company_id: int, output: str, lead_time_days: float, lead_time_std_days: float, service_level: float
+):
+    error_std_by_version: Dict[str, Optional[float]] = {}
+    after_product_id = 0
+    if output == "csv":
+        yield csv_lines([], header=True)
+    while True:
+        # Session courte par page : le flux ne garde pas de connexion du pool entre deux pages
+        async with AsyncSessionLocal() as session:
+            page = await forecast_crud.get_latest_forecasts_page_async(
+                session, company_id, after_product_id, settings.REPLENISHMENT_PAGE_SIZE
+            )
+        if not page:
+            return
+        for version in {entry["model_version"] for entry in page if entry["model_version"]} - error_std_by_version.keys():
+            error_std_by_version[version] = await get_model_error_std_async(version)
+        rows = replenishment_rows(page, error_std_by_version, lead_time_days, lead_time_std_days, service_level)
+        yield csv_lines(rows) if output == "csv" else ndjson_lines(rows)
+        after_product_id = page[-1]["product_id"]
+
+
+@router.get("/replenishment")
+async def stream_replenishment_report(
+    output_format: Literal["ndjson", "csv"] = Query("ndjson", alias="format", description="Format des lignes du rapport."),
+    service_level: float = Query(DEFAULT_SERVICE_LEVEL, gt=0, lt=1, description="Taux de service visé (entre 0 et 1)."),
+    lead_time_days: float = Query(DEFAULT_LEAD_TIME_DAYS, ge=0, description="Délai de réapprovisionnement moyen (jours)."),
+    lead_time_std_days: float = Query(DEFAULT_LEAD_TIME_STD_DAYS, ge=0, description="Écart-type du délai (jours)."),
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
+) -> Any:
+    """
+    Streams the replenishment report of the active company: one row per product (sku,
+    forecast totals, safety stock, reorder point), computed from the latest stored
+    forecast of each product. Products are read by pages with a keyset cursor and each
+    page is sent as soon as it is computed. Fields of a product that was never
+    predicted are null (empty in CSV).
+    """
+    active_company, _ = active_company_info
+    # Le flux peut durer : rendre tout de suite la connexion de la session de la requête
+    await db.close()
+
+    if output_format == "csv":
+        media_type = "text/csv"
+        headers = {"Content-Disposition": 'attachment; filename="replenishment.csv"'}
+    else:
+        media_type = "application/x-ndjson"
+        headers = {}
+    return StreamingResponse(
+        _replenishment_stream(active_company.id, output_format, lead_time_days, lead_time_std_days, service_level),
+        media_type=media_type,
+        headers={**headers, "X-Accel-Buffering": "no"},
+    )
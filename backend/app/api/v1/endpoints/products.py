@@ -1,17 +1,44 @@
 # Fichier : app/api/v1/endpoints/products.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+import base64
+import binascii
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status, Query
+from sqlalchemy.exc import IntegrityError
 from sqlmodel import Session
-from typing import List, Any
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Any, Optional
 
 from app.db.database import get_session
+from app.db.base import get_async_session
 from app.crud import product_crud
 from app.schemas.product_schemas import ProductCreate, ProductUpdate, ProductInDB
 from app.models.base import Company, UserRole
-from app.api.deps import get_active_company_and_role
+from app.api.deps import get_active_company_and_role, get_active_company_and_role_async
 
 router = APIRouter()
 
+MAX_PAGE_SIZE = 1000
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _encode_cursor(last_id: int) -> str:
+    """Curseur opaque de la page suivante : le dernier id renvoyé, encodé en base64url."""
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str) -> int:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        last_id = payload["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError):
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+    if not isinstance(last_id, int):
+        raise HTTPException(status_code=422, detail="Invalid cursor.")
+    return last_id
+
 @router.post("/", response_model=ProductInDB, status_code=status.HTTP_201_CREATED)
 def create_new_product(
     product_in: ProductCreate,
@@ -36,32 +63,54 @@ def create_new_product(
             detail=f"Product with SKU '{product_in.sku}' already exists in this company.",
         )
     
-    return product_crud.create_product(db, product_in=product_in, company_id=active_company.id)
+    try:
+        return product_crud.create_product(db, product_in=product_in, company_id=active_company.id)
+    except IntegrityError:
+        # Création concurrente du même SKU : l'index unique (company_id, sku) tranche
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Product with SKU '{product_in.sku}' already exists in this company.",
+        )
 
 @router.get("/", response_model=List[ProductInDB])
-def list_products(
-    db: Session = Depends(get_session),
-    skip: int = Query(0, ge=0),
-    limit: int = Query(100, ge=1, le=200),
-    active_company_info: tuple = Depends(get_active_company_and_role)
+async def list_products(
+    response: Response,
+    db: AsyncSession = Depends(get_async_session),
+    cursor: Optional[str] = Query(None, description="Curseur de la page suivante (en-tête X-Next-Cursor de la page précédente)."),
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    search: Optional[str] = Query(None, min_length=1, max_length=255, description="Texte recherché dans le SKU ou le nom (casse ignorée)."),
+    search_mode: product_crud.SearchMode = Query("prefix", description="Recherche par préfixe ou par sous-chaîne."),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
 ) -> Any:
     """
-    Liste tous les produits de l'entreprise active. La pagination est supportée.
+    Liste les produits de l'entreprise active, triés par id, avec une recherche
+    optionnelle sur le SKU ou le nom. La pagination se fait par curseur : s'il reste
+    des produits, l'en-tête X-Next-Cursor contient le curseur de la page suivante.
     """
     active_company, _ = active_company_info
-    return product_crud.get_products_by_company(db, company_id=active_company.id, skip=skip, limit=limit)
+    after_id = _decode_cursor(cursor) if cursor else None
+    # Un produit de plus que demandé : indique s'il existe une page suivante
+    products = await product_crud.get_products_by_company_async(
+        db, company_id=active_company.id, after_id=after_id, limit=limit + 1,
+        search=search, search_mode=search_mode,
+    )
+    if len(products) > limit:
+        products = products[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(products[-1].id)
+    return products
 
 @router.get("/{product_id}", response_model=ProductInDB)
-def get_product_details(
+async def get_product_details(
     product_id: int,
-    db: Session = Depends(get_session),
-    active_company_info: tuple = Depends(get_active_company_and_role)
+    db: AsyncSession = Depends(get_async_session),
+    active_company_info: tuple = Depends(get_active_company_and_role_async)
 ) -> Any:
     """
     Récupère les détails d'un produit spécifique.
     """
     active_company, _ = active_company_info
-    product = product_crud.get_product_by_id(db, product_id=product_id)
+    product = await product_crud.get_product_by_id_async(db, product_id=product_id)
     
     if not product or product.company_id != active_company.id:
         raise HTTPException(
@@ -99,7 +148,14 @@ def update_existing_product(
                 detail=f"Another product with SKU '{product_in.sku}' already exists.",
             )
 
-    return product_crud.update_product(db, db_product=db_product, product_in=product_in)
+    try:
+        return product_crud.update_product(db, db_product=db_product, product_in=product_in)
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Another product with SKU '{product_in.sku}' already exists.",
+        )
 
 @router.delete("/{product_id}", status_code=status.HTTP_204_NO_CONTENT)
 def delete_existing_product(
@@ -1,20 +1,40 @@
 # Fichier : app/api/v1/endpoints/sales.py
 
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
-from sqlmodel import Session
-from typing import Any
+import asyncio
+import json
+import os
+
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from sqlmodel import Session, update
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import Any, Optional
 
 from app.db.database import get_session
-from app.models.base import User, Company, PredictionJob
+from app.db.base import get_async_session, AsyncSessionLocal
+from app.models.base import User, Company, PredictionJob, JobStatus
 from app.schemas.job_schemas import JobSubmission, JobStatusResponse
-from app.api.deps import get_current_active_user, get_active_company_and_role
+from app.api.deps import (
+    get_current_active_user, get_active_company_and_role, get_current_active_principal_async,
+    require_company_membership_async,
+)
+from app.core.auth_cache import AuthPrincipal
+from app.core.upload_spool import spool_upload_file, discard_spooled_file, resolve_spooled_file
+from app.crud.forecast_crud import get_run_forecasts_async, attach_forecasts
+from app.crud.job_crud import FINISHED_STATUSES, job_event, job_progress, update_job_state
+from app.core.config import settings
+from app.core.job_events import job_events
 from tasks.data_processing import process_sales_csv # Importer la tâche Celery
+from tasks.celery_app import PRIORITY_LOW, PRIORITY_NORMAL
 
 router = APIRouter()
 
 @router.post("/upload", response_model=JobSubmission, status_code=status.HTTP_202_ACCEPTED)
 async def upload_sales_data(
     file: UploadFile = File(..., description="CSV file with sales data."),
+    resume_job_id: Optional[int] = Query(
+        None, description="Failed import to resume: its already imported rows are skipped in this file.",
+    ),
     db: Session = Depends(get_session),
     current_user: User = Depends(get_current_active_user),
     active_company_info: tuple = Depends(get_active_company_and_role)
@@ -22,6 +42,10 @@ async def upload_sales_data(
     """
     Upload a CSV file with historical sales data.
     This triggers an asynchronous background job to process the file.
+
+    An import that failed part-way keeps the rows imported before the error. Upload the
+    corrected file with `resume_job_id` set to the failed job to import only the
+    remaining rows; a failed import can be resumed once, for the same company.
     """
     active_company, _ = active_company_info
 
@@ -32,21 +56,83 @@ async def upload_sales_data(
             detail="Invalid file type. Please upload a CSV file."
         )
 
-    # Créer un enregistrement de job dans la BDD
-    new_job = PredictionJob(user_id=current_user.id)
-    db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
-
-    # Lire le contenu du fichier pour le passer à Celery
-    file_content = await file.read()
-    
-    # Lancer la tâche Celery en arrière-plan
-    process_sales_csv.delay(
-        job_id=new_job.id, 
-        file_content_str=file_content.decode("utf-8"), 
-        company_id=active_company.id
-    )
+    skip_rows = 0
+    if resume_job_id is not None:
+        failed_job = db.get(PredictionJob, resume_job_id)
+        # Un import (sans entreprise, contrairement aux prédictions) lancé par l'utilisateur
+        if failed_job is None or failed_job.user_id != current_user.id or failed_job.company_id is not None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import job not found.")
+        if failed_job.import_company_id != active_company.id:
+            # Les lignes à sauter ont été importées dans une autre entreprise
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="This import was made for another company; switch to that company to resume it.",
+            )
+        if failed_job.status != JobStatus.FAILED or not failed_job.rows_processed:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Only a failed import with imported rows can be resumed.",
+            )
+        if failed_job.resumed_by_job_id is not None:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"This import was already resumed by job {failed_job.resumed_by_job_id}.",
+            )
+        skip_rows = failed_job.rows_processed
+
+    # Copier le fichier par morceaux dans la zone de spool partagée avec le worker
+    file_handle = await spool_upload_file(file)
+
+    try:
+        # Créer un enregistrement de job dans la BDD
+        new_job = PredictionJob(user_id=current_user.id, import_company_id=active_company.id)
+        db.add(new_job)
+        if resume_job_id is not None:
+            db.flush()  # Attribue new_job.id
+            # Réservation conditionnelle : deux reprises concurrentes, une seule gagne
+            claimed = db.exec(
+                update(PredictionJob)
+                .where(PredictionJob.id == resume_job_id, PredictionJob.resumed_by_job_id.is_(None))
+                .values(resumed_by_job_id=new_job.id)
+            ).rowcount
+            if not claimed:
+                db.rollback()
+                raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="This import was already resumed.")
+        db.commit()
+        db.refresh(new_job)
+    except Exception:
+        # Le worker ne recevra jamais ce fichier : le supprimer du spool
+        discard_spooled_file(file_handle)
+        raise
+
+    try:
+        # Lancer la tâche Celery en arrière-plan : seul le handle du fichier transite par le broker.
+        # Dans la file d'ingestion, les gros imports passent après les petits.
+        large_import = os.path.getsize(resolve_spooled_file(file_handle)) >= settings.SALES_IMPORT_LARGE_BYTES
+        process_sales_csv.apply_async(
+            kwargs={
+                "job_id": new_job.id,
+                "file_handle": file_handle,
+                "company_id": active_company.id,
+                "skip_rows": skip_rows,
+            },
+            priority=PRIORITY_LOW if large_import else PRIORITY_NORMAL,
+        )
+    except Exception as e:
+        discard_spooled_file(file_handle)
+        # Broker indisponible : le job n'a pas de tâche. Il passe en échec et l'import
+        # repris est libéré, pour qu'une nouvelle tentative puisse le reprendre.
+        if resume_job_id is not None:
+            db.exec(
+                update(PredictionJob)
+                .where(PredictionJob.id == resume_job_id, PredictionJob.resumed_by_job_id == new_job.id)
+                .values(resumed_by_job_id=None)
+            )
+        update_job_state(db, new_job, JobStatus.FAILED, result_data=f"The import could not be scheduled: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="The task queue is unavailable; the import was not scheduled. Please retry later.",
+        )
 
     return {
         "job_id": new_job.id,
@@ -55,23 +141,39 @@ async def upload_sales_data(
     }
 
 
+async def _get_visible_job(db: AsyncSession, job_id: int, principal: AuthPrincipal) -> PredictionJob:
+    job = await db.get(PredictionJob, job_id)
+
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
+
+    # Sécurité : un utilisateur voit ses propres jobs, et les jobs de prédiction des
+    # entreprises dont il est membre (une soumission peut réutiliser le job d'un collègue)
+    if job.user_id != principal.user_id:
+        if job.company_id is None:
+            raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this job.")
+        await require_company_membership_async(db, principal, job.company_id, "Not authorized to view this job.")
+    return job
+
+
 @router.get("/jobs/{job_id}", response_model=JobStatusResponse)
-def get_job_status(
+async def get_job_status(
     job_id: int,
-    db: Session = Depends(get_session),
-    current_user: User = Depends(get_current_active_user)
+    include_forecast: bool = Query(False, description="Include the forecast rows of a prediction job in the result."),
+    db: AsyncSession = Depends(get_async_session),
+    principal: AuthPrincipal = Depends(get_current_active_principal_async)
 ) -> Any:
     """
     Check the status of a previously submitted job (e.g., data upload).
+    Prediction jobs return a compact summary; the forecast rows are only
+    added with `include_forecast=true`.
     """
-    job = db.get(PredictionJob, job_id)
+    job = await _get_visible_job(db, job_id, principal)
 
-    if not job:
-        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found.")
-    
-    # Sécurité : un utilisateur ne peut voir que ses propres jobs
-    if job.user_id != current_user.id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not authorized to view this job.")
+    result = job.result_data # Contient le message de succès, l'erreur ou le résumé de la prévision
+    if include_forecast and job.forecast_run_id is not None:
+        forecasts = await get_run_forecasts_async(db, job.forecast_run_id)
+        result = json.dumps(attach_forecasts(json.loads(result), forecasts), separators=(",", ":"))
 
     return JobStatusResponse(
         job_id=job.id,
@@ -79,5 +181,67 @@ def get_job_status(
         created_at=job.created_at,
         started_at=job.started_at,
         completed_at=job.completed_at,
-        result=job.result_data # Contient le message de succès ou l'erreur
-    )
\ No newline at end of file
+        rows_processed=job.rows_processed,
+        rows_total=job.rows_total,
+        progress=job_progress(job),
+        forecast_run_id=job.forecast_run_id,
+        result=result
+    )
+
+
+# Ordre des états d'un job, pour écarter un événement plus ancien que le dernier envoyé
+_STATUS_RANK = {"PENDING": 0, "RUNNING": 1, "SUCCESS": 2, "FAILED": 2}
+
+
+def _server_sent_event(event: dict) -> str:
+    return f"event: job\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+async def _read_job_event(job_id: int) -> dict:
+    # Session courte par lecture : un flux ne garde pas de connexion du pool
+    async with AsyncSessionLocal() as session:
+        return job_event(await session.get(PredictionJob, job_id))
+
+
+async def _job_event_stream(job_id: int):
+    finished = {state.value for state in FINISHED_STATUSES}
+    async with job_events.subscribe(job_id) as queue:
+        # Abonné avant de lire l'état : aucune transition ne peut se glisser entre les deux
+        last = await _read_job_event(job_id)
+        yield _server_sent_event(last)
+        while last["status"] not in finished:
+            try:
+                event = await asyncio.wait_for(queue.get(), settings.JOB_EVENTS_HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                # Rien reçu : relecture en base (événement perdu) et maintien de la connexion
+                event = await _read_job_event(job_id)
+                if event == last:
+                    yield ": keep-alive\n\n"
+                    continue
+            rank = (_STATUS_RANK[event["status"]], event["rows_processed"] or 0)
+            if event == last or rank < (_STATUS_RANK[last["status"]], last["rows_processed"] or 0):
+                continue
+            last = event
+            yield _server_sent_event(event)
+
+
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_session),
+    principal: AuthPrincipal = Depends(get_current_active_principal_async)
+) -> Any:
+    """
+    Stream the state of a job as server-sent events (`event: job`, JSON data with
+    status, rows_processed, rows_total, progress and, once finished, result).
+    The current state is sent first; the stream ends after SUCCESS or FAILED.
+    """
+    await _get_visible_job(db, job_id, principal)
+    # Le flux peut durer : rendre tout de suite la connexion de la session de la requête
+    await db.close()
+
+    return StreamingResponse(
+        _job_event_stream(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
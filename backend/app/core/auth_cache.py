@@ -0,0 +1,140 @@
+# Fichier : app/core/auth_cache.py
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+from app.models.base import User, Company, UserRole
+
+
+@dataclass(frozen=True)
+class Membership:
+    company_id: int
+    company_name: str
+    role: UserRole
+
+    def to_company(self) -> Company:
+        """Entreprise détachée (hors session) : seuls `id` et `name` sont renseignés."""
+        return Company(id=self.company_id, name=self.company_name)
+
+
+@dataclass(frozen=True)
+class AuthPrincipal:
+    """
+    Identité et appartenances d'un utilisateur authentifié, suffisantes pour autoriser
+    une requête sans accès à la base.
+
+    `source` indique l'origine : "db" (chargé à l'instant), "cache" ou "token" (claims
+    signés). Seul un principal venant de la base est garanti à jour.
+    """
+    user_id: int
+    email: str
+    is_active: bool
+    memberships: Dict[int, Membership] = field(default_factory=dict)
+    source: str = "db"
+
+    @classmethod
+    def from_user(cls, user: User) -> "AuthPrincipal":
+        """Construit le principal d'un utilisateur dont les liens et entreprises sont chargés."""
+        return cls(
+            user_id=user.id,
+            email=user.email,
+            is_active=user.is_active,
+            memberships={
+                link.company_id: Membership(link.company_id, link.company.name, link.role)
+                for link in user.company_links
+            },
+        )
+
+    def to_user(self) -> User:
+        """Utilisateur détaché (hors session) : `id`, `email` et `is_active` uniquement."""
+        return User(id=self.user_id, email=self.email, is_active=self.is_active)
+
+    def to_claims(self) -> dict:
+        """Claims d'appartenance à ajouter au token d'accès (signés avec lui)."""
+        return {
+            "uid": self.user_id,
+            "act": self.is_active,
+            "mbr": {str(m.company_id): [m.role.value, m.company_name] for m in self.memberships.values()},
+        }
+
+    @classmethod
+    def from_claims(cls, email: str, payload: dict) -> Optional["AuthPrincipal"]:
+        """Reconstruit le principal depuis les claims d'un token, s'ils sont présents."""
+        if "uid" not in payload or "mbr" not in payload:
+            return None
+        return cls(
+            user_id=payload["uid"],
+            email=email,
+            is_active=payload.get("act", True),
+            memberships={
+                int(company_id): Membership(int(company_id), name, UserRole(role))
+                for company_id, (role, name) in payload["mbr"].items()
+            },
+            source="token",
+        )
+
+
+class AuthCache:
+    """
+    Cache LRU à durée de vie limitée des principaux, indexé par email (le `sub` du token).
+    Propre à chaque processus ; les écritures qui changent les appartenances l'invalident
+    explicitement, le TTL borne le décalage des autres processus.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, email: str) -> Optional[AuthPrincipal]:
+        with self._lock:
+            entry = self._entries.get(email)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return None
+            self._entries.move_to_end(email)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, principal: AuthPrincipal) -> None:
+        if self.ttl_seconds <= 0:
+            return
+        cached = AuthPrincipal(
+            user_id=principal.user_id,
+            email=principal.email,
+            is_active=principal.is_active,
+            memberships=principal.memberships,
+            source="cache",
+        )
+        with self._lock:
+            self._entries[principal.email] = (time.monotonic() + self.ttl_seconds, cached)
+            self._entries.move_to_end(principal.email)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, email: str) -> None:
+        with self._lock:
+            self._entries.pop(email, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+auth_cache = AuthCache(
+    ttl_seconds=settings.AUTH_CACHE_TTL_SECONDS,
+    max_entries=settings.AUTH_CACHE_MAX_ENTRIES,
+)
+register_metrics_source("auth_cache", auth_cache.stats)
@@ -0,0 +1,122 @@
+# Fichier : app/core/chart_builder.py
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+CHART_COLUMNS = ["date", "actual_sales", "prediction", "confidence_min", "confidence_max"]
+
+
+def build_chart_columns(
+    history_dates: np.ndarray,
+    actual_sales: np.ndarray,
+    history_predictions: np.ndarray,
+    future_dates: np.ndarray,
+    future_predictions: np.ndarray,
+    confidence_range: float,
+) -> Dict[str, np.ndarray]:
+    """
+    Assemble les séries du graphique en une seule passe vectorisée.
+
+    Les prédictions historiques sont alignées ligne à ligne sur l'historique (elles sont
+    calculées sur les mêmes lignes), les dates futures suivent l'historique : la jointure
+    par date se réduit donc à une concaténation, sans recherche point par point.
+
+    Returns:
+        Un dictionnaire de colonnes parallèles (NaN pour les valeurs absentes).
+    """
+    n_history, n_future = len(history_dates), len(future_dates)
+    predictions = np.maximum(np.concatenate([history_predictions, future_predictions]).astype(np.float64), 0)
+
+    return {
+        "date": np.concatenate([
+            np.asarray(history_dates, dtype="datetime64[D]"),
+            np.asarray(future_dates, dtype="datetime64[D]"),
+        ]),
+        "actual_sales": np.concatenate([np.asarray(actual_sales, dtype=np.float64), np.full(n_future, np.nan)]),
+        "prediction": np.round(predictions, 2),
+        "confidence_min": np.round(np.maximum(predictions - confidence_range, 0), 2),
+        "confidence_max": np.round(predictions + confidence_range, 2),
+        "n_history": n_history,
+    }
+
+
+def lttb_indices(y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Indices retenus par l'algorithme Largest-Triangle-Three-Buckets (points équidistants
+    en abscisse). Conserve le premier et le dernier point ; coût linéaire.
+    """
+    n = len(y)
+    if n_out >= n:
+        return np.arange(n)
+    if n_out < 3:
+        return np.linspace(0, n - 1, max(n_out, 1)).round().astype(np.int64)
+
+    y = np.nan_to_num(np.asarray(y, dtype=np.float64))
+    x = np.arange(n, dtype=np.float64)
+    # Bornes des seaux internes (le premier et le dernier point forment leur propre seau)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    previous = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Point moyen du seau suivant
+        next_start = end
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else n
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+
+        # Aire du triangle formé avec le point précédent et le point moyen suivant
+        areas = np.abs(
+            (x[previous] - avg_x) * (y[start:end] - y[previous])
+            - (x[previous] - x[start:end]) * (avg_y - y[previous])
+        )
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+    selected[-1] = n - 1
+    return selected
+
+
+def downsample_chart_columns(columns: Dict[str, np.ndarray], max_points: int) -> Dict[str, np.ndarray]:
+    """
+    Réduit le graphique à `max_points` points avec LTTB. Le budget est partagé entre
+    l'historique (ventes réelles) et le futur (prédictions) au prorata de leur taille,
+    afin de conserver la jonction entre les deux segments.
+    """
+    n_total = len(columns["date"])
+    if n_total <= max_points:
+        return columns
+
+    n_history = columns["n_history"]
+    history_budget = min(n_history, max(2, round(max_points * n_history / n_total)))
+    future_budget = min(n_total - n_history, max(2, max_points - history_budget))
+
+    history_indices = lttb_indices(columns["actual_sales"][:n_history], history_budget)
+    future_indices = n_history + lttb_indices(columns["prediction"][n_history:], future_budget)
+    indices = np.concatenate([history_indices, future_indices])
+
+    downsampled = {name: columns[name][indices] for name in CHART_COLUMNS}
+    downsampled["n_history"] = len(history_indices)
+    return downsampled
+
+
+def _as_list(values: np.ndarray) -> List[Optional[float]]:
+    # v != v n'est vrai que pour NaN
+    return [None if v != v else v for v in values.tolist()]
+
+
+def chart_columns_to_response(columns: Dict[str, np.ndarray]) -> Dict[str, list]:
+    """Format colonnes : des listes parallèles, None pour les valeurs absentes."""
+    response = {"date": np.datetime_as_string(columns["date"], unit="D").tolist()}
+    for name in CHART_COLUMNS[1:]:
+        response[name] = _as_list(columns[name])
+    response["n_history"] = columns["n_history"]
+    return response
+
+
+def chart_columns_to_points(columns: Dict[str, np.ndarray]) -> List[dict]:
+    """Format historique : une liste de points {date, actual_sales, prediction, ...}."""
+    data = chart_columns_to_response(columns)
+    return [dict(zip(CHART_COLUMNS, values)) for values in zip(*(data[name] for name in CHART_COLUMNS))]
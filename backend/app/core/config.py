@@ -1,5 +1,6 @@
 # app/core/config.py
 import os
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 
@@ -7,14 +8,104 @@ load_dotenv()
 
 class Settings(BaseSettings):
     # Base de données
-    DATABASE_URL: str = os.getenv("DATABASE_URL")
+    DATABASE_URL: Optional[str] = os.getenv("DATABASE_URL")
     
+    # Pools de connexions (voir app/db/database.py)
+    DB_ECHO: bool = False # Journaliser les requêtes SQL (développement)
+    # Taille du pool de threads de l'API (endpoints synchrones) ; le pool de l'API a la même taille
+    API_THREADPOOL_SIZE: int = 40
+    DB_API_MAX_OVERFLOW: int = 10
+    # Pool des sessions asynchrones de l'API (app/db/base.py)
+    DB_ASYNC_POOL_SIZE: int = 20
+    DB_ASYNC_MAX_OVERFLOW: int = 10
+    # Pool de chaque processus worker Celery (créé après le fork)
+    DB_WORKER_POOL_SIZE: int = 2
+    DB_WORKER_MAX_OVERFLOW: int = 2
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+
     # Sécurité JWT
-    SECRET_KEY: str = os.getenv("SECRET_KEY")
+    SECRET_KEY: Optional[str] = os.getenv("SECRET_KEY")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    # Hachage des mots de passe (voir app/core/password_hashing.py)
+    BCRYPT_ROUNDS: int = 12
+    # Processus dédiés au hachage et nombre maximal de demandes en attente au-delà (503 ensuite)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 32
+    # Cache des identités et appartenances utilisées pour autoriser les requêtes
+    AUTH_CACHE_TTL_SECONDS: float = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10_000
+    # Ajouter les appartenances (entreprise -> rôle) signées dans le token d'accès
+    AUTH_TOKEN_MEMBERSHIP_CLAIMS: bool = False
+
+    # Import des ventes
+    # Répertoire partagé entre l'API et le worker où les uploads sont déposés
+    SALES_UPLOAD_SPOOL_DIR: str = "/app/spool/uploads"
+    SALES_UPLOAD_CHUNK_BYTES: int = 1024 * 1024
+    SALES_CSV_CHUNK_ROWS: int = 100_000
+    # Partitions mensuelles de `sale` créées à l'avance (si la table est partitionnée)
+    SALE_PARTITION_MONTHS_AHEAD: int = 3
+
+    # Registre des modèles de demande
+    MODEL_REGISTRY_DIR: str = "/app/models_artefacts"
+    # Version utilisée quand aucun épinglage n'existe (active_models.json absent)
+    MODEL_DEFAULT_VERSION: str = "v1"
+    # Intervalle minimal entre deux vérifications du fichier des épinglages
+    MODEL_PINS_CHECK_SECONDS: float = 5
+    # Moteur d'inférence : "lightgbm", "compiled" (arbres NumPy .npz, sans lightgbm) ou
+    # "auto" (lightgbm s'il est installé, sinon la version compilée)
+    MODEL_BACKEND: str = "auto"
+    # Threads LightGBM par prédiction (0 = tous les cœurs) ; dans les processus worker Celery,
+    # WORKER_MODEL_THREADS s'applique (un processus enfant par cœur avec le pool prefork)
+    MODEL_PREDICT_THREADS: int = 0
+    WORKER_MODEL_THREADS: int = 1
+    # Regroupement des prédictions concurrentes de l'API (tableaux de bord) en un appel au modèle
+    INFERENCE_BATCHING: bool = True
+    INFERENCE_BATCH_MAX_ROWS: int = 4096
+    INFERENCE_BATCH_MAX_WAIT_MS: float = 5
+    # Durée accordée à un appel au modèle avant qu'un appelant en attente ne prédise lui-même
+    INFERENCE_BATCH_PREDICT_BUDGET_SECONDS: float = 5
+
+    # Flux d'avancement des jobs (SSE) : Redis pub/sub entre les workers et l'API ;
+    # vide = diffusion en mémoire dans le processus (tests, Celery en mode eager)
+    JOB_EVENTS_REDIS_URL: Optional[str] = os.getenv("CELERY_BROKER_URL")
+    # Intervalle des commentaires de maintien d'un flux, et de la relecture du job en base
+    JOB_EVENTS_HEARTBEAT_SECONDS: float = 15
+
+    # Files Celery : tâches simultanées maximales par entreprise et par file (<= 0 : sans limite),
+    # baux partagés par Redis entre les workers (vide = en mémoire dans le processus)
+    TENANT_INGESTION_CONCURRENCY: int = 1
+    TENANT_INFERENCE_CONCURRENCY: int = 4
+    TENANT_REFRESH_CONCURRENCY: int = 1
+    TENANT_LIMITS_REDIS_URL: Optional[str] = os.getenv("CELERY_BROKER_URL")
+    # Durée d'un bail (libéré en fin de tâche ; l'échéance ne sert qu'aux workers arrêtés)
+    TENANT_SLOT_TTL_SECONDS: float = 3600
+    # Délai avant de retenter une tâche dont l'entreprise est à sa limite
+    TENANT_LIMIT_RETRY_SECONDS: float = 5
+    # Imports à partir de cette taille traités après les petits imports (priorité basse)
+    SALES_IMPORT_LARGE_BYTES: int = 20 * 1024 * 1024
+    # Charger les modèles au démarrage du worker (inutile pour un worker d'ingestion seul)
+    WORKER_PRELOAD_MODELS: bool = True
+
+    # Job de prédiction PENDING/RUNNING sans fin depuis ce délai (depuis son démarrage, ou
+    # sa création s'il n'a pas démarré) : considéré abandonné (broker, worker tué), il n'est
+    # plus réutilisé et une nouvelle soumission de même clé le remplace
+    PREDICTION_JOB_STALE_SECONDS: float = 900
+
+    # Cache des tableaux de bord
+    DASHBOARD_CACHE_MAX_ENTRIES: int = 1024
+    # Servir l'instantané précédent pendant qu'un seul rafraîchissement tourne en arrière-plan
+    DASHBOARD_CACHE_STALE_WHILE_REVALIDATE: bool = False
+
+    # Jeton (Authorization: Bearer) du collecteur de /api/v1/metrics ; vide = métriques désactivées
+    METRICS_TOKEN: Optional[str] = os.getenv("METRICS_TOKEN")
+
+    # Rapport de réapprovisionnement : produits lus (et envoyés) par page
+    REPLENISHMENT_PAGE_SIZE: int = 500
 
     class Config:
         case_sensitive = True
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
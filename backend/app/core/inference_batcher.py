@@ -0,0 +1,203 @@
+# Fichier : app/core/inference_batcher.py
+
+import os
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.metrics import Histogram, register_metrics_source
+from app.core.model_registry import ModelVersion
+
+# Seaux des histogrammes : lignes et demandes par lot, attente en file (ms)
+BATCH_ROWS_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+BATCH_REQUESTS_BUCKETS = (1, 2, 4, 8, 16, 32, 64)
+QUEUE_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 2, 5, 10, 25, 50, 100)
+# Attente maximale d'une demande : quelques fenêtres de regroupement (lots déjà en file)
+# plus le budget d'un appel au modèle ; au-delà, l'appelant prédit lui-même
+QUEUED_BATCHES_WAIT = 4
+
+
+@dataclass
+class _Request:
+    model_version: ModelVersion
+    X: np.ndarray
+    future: Future
+    enqueued_at: float
+
+
+class InferenceBatcher:
+    """
+    Regroupe les prédictions concurrentes du processus en un seul appel au modèle.
+
+    Les appelants (threads du pool de FastAPI) déposent leur matrice de caractéristiques
+    et attendent le résultat ; un thread consommateur unique fusionne les demandes en
+    attente (par version du modèle) en un appel `predict_raw`, puis redistribue les lignes.
+    Un lot part dès que `max_batch_rows` lignes sont en attente, que chaque session ouverte
+    a déposé une demande, ou au plus tard `max_wait_seconds` après la première demande.
+
+    Une session (`with batcher.session():`) signale un appelant sur le point de prédire
+    plusieurs fois (prévision récursive) : seul, il prédit directement dans son thread ;
+    à plusieurs, leurs pas successifs sont prédits ensemble.
+
+    Un appelant qui n'a pas son résultat après `QUEUED_BATCHES_WAIT` fenêtres plus
+    `predict_budget_seconds` (consommateur bloqué) annule sa demande et prédit directement.
+    """
+
+    def __init__(self, max_batch_rows: int, max_wait_seconds: float, enabled: bool = True, predict_budget_seconds: float = 5):
+        self.max_batch_rows = max_batch_rows
+        self.max_wait_seconds = max_wait_seconds
+        self.enabled = enabled
+        self.result_timeout_seconds = QUEUED_BATCHES_WAIT * max_wait_seconds + predict_budget_seconds
+        self.batch_rows = Histogram(BATCH_ROWS_BUCKETS)
+        self.batch_requests = Histogram(BATCH_REQUESTS_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_BUCKETS_MS)
+        self.inline_calls = 0
+        self.timeouts = 0
+        self._reset()
+
+    def _reset(self) -> None:
+        # État propre au processus : recréé après un fork (le thread consommateur n'est pas hérité)
+        self._pid = os.getpid()
+        self._cond = threading.Condition()
+        self._pending: List[_Request] = []
+        self._sessions = 0
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+
+    @contextmanager
+    def session(self):
+        if self._pid != os.getpid():
+            self._reset()
+        with self._cond:
+            self._sessions += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._sessions -= 1
+                self._cond.notify_all()
+
+    def predictor(self, model_version: ModelVersion) -> Callable[[np.ndarray], np.ndarray]:
+        """Fonction de prédiction (n, n_features) -> (n,) passant par le batcher."""
+        return lambda X: self.predict(model_version, X)
+
+    def predict(self, model_version: ModelVersion, X: np.ndarray) -> np.ndarray:
+        if not self.enabled:
+            return model_version.predict_raw(X)
+        if self._pid != os.getpid():
+            self._reset()
+        with self._cond:
+            # Appelant seul : rien à regrouper, prédiction directe sans passer par le thread
+            alone = self._sessions <= 1 and not self._pending and not self._busy
+            if alone:
+                self.inline_calls += 1
+        if alone:
+            return model_version.predict_raw(X)
+
+        # Copie : l'appelant réutilise souvent sa matrice (prévision récursive)
+        request = _Request(model_version, np.array(X, dtype=np.float32), Future(), time.monotonic())
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._consume, name="inference-batcher", daemon=True)
+                self._thread.start()
+            self._pending.append(request)
+            self._cond.notify_all()
+        try:
+            return request.future.result(timeout=self.result_timeout_seconds)
+        except FutureTimeoutError:
+            # Annulée avant d'être prise dans un lot, la demande ne sera pas prédite ;
+            # déjà en cours, son résultat est ignoré
+            with self._cond:
+                request.future.cancel()
+                self.timeouts += 1
+            return model_version.predict_raw(X)
+
+    def _pending_rows(self) -> int:
+        return sum(len(request.X) for request in self._pending)
+
+    def _next_batch(self) -> List[_Request]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = self._pending[0].enqueued_at + self.max_wait_seconds
+            while self._pending_rows() < self.max_batch_rows and len(self._pending) < self._sessions:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch, rows = [], 0
+            while self._pending and (not batch or rows + len(self._pending[0].X) <= self.max_batch_rows):
+                request = self._pending.pop(0)
+                if not request.future.set_running_or_notify_cancel():
+                    continue
+                batch.append(request)
+                rows += len(request.X)
+            self._busy = True
+            return batch
+
+    def _consume(self) -> None:
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                with self._cond:
+                    self._busy = False
+                continue
+            now = time.monotonic()
+            for request in batch:
+                self.queue_wait_ms.observe((now - request.enqueued_at) * 1000)
+            self.batch_requests.observe(len(batch))
+            self.batch_rows.observe(sum(len(request.X) for request in batch))
+
+            groups = {}
+            for request in batch:
+                groups.setdefault(id(request.model_version), []).append(request)
+            for requests in groups.values():
+                self._run_group(requests)
+            with self._cond:
+                self._busy = False
+
+    @staticmethod
+    def _run_group(requests: List[_Request]) -> None:
+        """Un appel au modèle pour des demandes de la même version, puis découpage du résultat."""
+        try:
+            X = requests[0].X if len(requests) == 1 else np.concatenate([request.X for request in requests])
+            predictions = requests[0].model_version.predict_raw(X)
+        except Exception as e:
+            for request in requests:
+                request.future.set_exception(e)
+            return
+        offsets = np.cumsum([len(request.X) for request in requests])[:-1]
+        for request, result in zip(requests, np.split(predictions, offsets)):
+            request.future.set_result(result)
+
+    def stats(self) -> dict:
+        with self._cond:
+            pending, sessions = len(self._pending), self._sessions
+        return {
+            "enabled": self.enabled,
+            "max_batch_rows": self.max_batch_rows,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+            "pending": pending,
+            "sessions": sessions,
+            "inline_calls": self.inline_calls,
+            "timeouts": self.timeouts,
+            "batch_rows": self.batch_rows.snapshot(),
+            "batch_requests": self.batch_requests.snapshot(),
+            "queue_wait_ms": self.queue_wait_ms.snapshot(),
+        }
+
+
+inference_batcher = InferenceBatcher(
+    max_batch_rows=settings.INFERENCE_BATCH_MAX_ROWS,
+    max_wait_seconds=settings.INFERENCE_BATCH_MAX_WAIT_MS / 1000,
+    enabled=settings.INFERENCE_BATCHING,
+    predict_budget_seconds=settings.INFERENCE_BATCH_PREDICT_BUDGET_SECONDS,
+)
+register_metrics_source("inference_batcher", inference_batcher.stats)
@@ -0,0 +1,214 @@
+# Fichier : app/core/inventory_simulation.py
+
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.stock_optimization import (
+    DEFAULT_LEAD_TIME_DAYS,
+    DEFAULT_LEAD_TIME_STD_DAYS,
+    DEFAULT_SERVICE_LEVEL,
+)
+
+# Cellules (jour x produit x scénario) simulées à la fois : borne la mémoire d'un bloc
+# (demande en float32 et indices des résidus tirés, ~4 Mo chacun) et le garde en cache
+CHUNK_CELLS = 1 << 20
+DEFAULT_SCENARIOS = 1000
+# Quantité commandée par défaut (fill rate) : demande prévue sur un cycle de commande
+DEFAULT_ORDER_CYCLE_DAYS = 30
+
+
+def _per_sku(values, n_skus: int, dtype=np.float64) -> np.ndarray:
+    """Scalaire ou tableau (n_skus,) diffusé en un tableau (n_skus,)."""
+    return np.broadcast_to(np.asarray(values, dtype=dtype), (n_skus,))
+
+
+def _residual_pools(residuals, n_skus: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Résidus empiriques triés (pour les tirages antithétiques) en un tableau (n_skus,
+    taille) float32, et la longueur utile de chaque ligne. Accepte un pool commun (1 dimension), un tableau (n_skus, taille), ou
+    une liste d'un pool par produit, de longueurs différentes (complétés par des zéros).
+    """
+    if isinstance(residuals, (list, tuple)) and len(residuals) and np.ndim(residuals[0]) > 0:
+        if len(residuals) != n_skus:
+            raise ValueError("One residual pool per SKU is required.")
+        lengths = np.array([len(pool) for pool in residuals], dtype=np.int32)
+        pools = np.zeros((n_skus, max(lengths.max(), 1)), dtype=np.float32)
+        for row, pool in enumerate(residuals):
+            pools[row, :len(pool)] = np.sort(np.asarray(pool, dtype=np.float32))
+    else:
+        pools = np.sort(np.asarray(residuals, dtype=np.float32), axis=-1)
+        if pools.ndim == 1:
+            pools = pools[np.newaxis, :]
+        pools = np.broadcast_to(pools, (n_skus, pools.shape[1]))
+        lengths = np.full(n_skus, pools.shape[1], dtype=np.int32)
+    if np.any(lengths == 0):
+        raise ValueError("Residual pools must not be empty.")
+    return pools, lengths
+
+
+def _sample_lead_times(rng: np.random.Generator, mean, std, shape: tuple, max_days: int) -> np.ndarray:
+    """
+    Délais entiers (jours) d'une loi gamma de moyenne `mean` et d'écart-type `std` (un
+    par produit), arrondis au jour le plus proche et bornés à [1, max_days]. La loi gamma est
+    positive et asymétrique comme les retards fournisseurs ; std = 0 donne un délai fixe.
+    """
+    mean = mean[:, np.newaxis]
+    std = std[:, np.newaxis]
+    fixed = std <= 0
+    safe_std = np.where(fixed, 1.0, std)
+    shape_k = (mean / safe_std) ** 2
+    scale = safe_std ** 2 / mean
+    lead_times = np.where(fixed, mean, rng.gamma(shape_k, scale, size=shape))
+    return np.clip(np.rint(lead_times), 1, max_days).astype(np.intp)
+
+
+def simulate_inventory(
+    forecast,
+    lead_time_days=DEFAULT_LEAD_TIME_DAYS,
+    lead_time_std_days=DEFAULT_LEAD_TIME_STD_DAYS,
+    service_level=DEFAULT_SERVICE_LEVEL,
+    residual_std=None,
+    residuals=None,
+    reorder_point=None,
+    order_quantity=None,
+    scenarios: int = DEFAULT_SCENARIOS,
+    seed: Optional[int] = None,
+    chunk_cells: int = CHUNK_CELLS,
+) -> Dict[str, np.ndarray]:
+    """
+    Simulation Monte-Carlo de la demande pendant le délai de réapprovisionnement, sans
+    l'hypothèse de normalité de `calculate_stock_levels` (fausse pour les produits à
+    demande faible ou intermittente : demande jamais négative, nombreux jours à 0).
+
+    Pour chaque produit et chaque scénario, une trajectoire de demande journalière est
+    tirée (prévision + résidu, tronquée à 0) ainsi qu'un délai aléatoire ; la demande
+    pendant le délai est la somme de la trajectoire sur ce délai. Les calculs sont
+    vectorisés sur des tableaux (jour x produit x scénario), par blocs de produits d'au
+    plus `chunk_cells` cellules.
+
+    Args:
+        forecast: Demande journalière prévue, tableau (n_produits, horizon). Les délais
+            tirés sont bornés à l'horizon.
+        lead_time_days, lead_time_std_days: Moyenne et écart-type du délai (jours),
+            scalaires ou un par produit.
+        service_level: Taux de service visé (probabilité de ne pas rompre pendant le délai),
+            scalaire ou un par produit.
+        residual_std: Résidus gaussiens d'écart-type donné (scalaire ou un par produit).
+        residuals: Résidus empiriques (réel - prédiction), rééchantillonnés jour par jour :
+            pool commun, tableau (n_produits, taille) ou liste d'un pool par produit.
+            Prioritaires sur `residual_std`.
+        reorder_point: Points de commande à évaluer en plus du point requis (un par produit).
+        order_quantity: Quantité commandée par cycle, pour le fill rate ; par défaut la
+            demande prévue sur `DEFAULT_ORDER_CYCLE_DAYS` jours.
+        scenarios: Nombre de scénarios par produit.
+        seed: Graine du générateur (résultats reproductibles).
+
+    Returns:
+        Tableaux (n_produits,) : "lead_time_demand_mean", "lead_time_demand_std",
+        "reorder_point" (quantile de la demande pendant le délai au taux de service),
+        "stockout_probability" et "fill_rate" à ce point de commande, et, si
+        `reorder_point` est donné, "evaluated_stockout_probability" et "evaluated_fill_rate".
+    """
+    forecast = np.asarray(forecast, dtype=np.float32)
+    if forecast.ndim == 1:
+        forecast = forecast[np.newaxis, :]
+    n_skus, horizon = forecast.shape
+    if horizon == 0:
+        raise ValueError("The forecast horizon must not be empty.")
+    if scenarios < 1:
+        raise ValueError("At least one scenario is required.")
+
+    levels = _per_sku(service_level, n_skus)
+    if not np.all((levels > 0) & (levels < 1)):
+        raise ValueError("Service level must be between 0 and 1.")
+    lead_mean = _per_sku(lead_time_days, n_skus)
+    lead_std = _per_sku(lead_time_std_days, n_skus)
+    if np.any(lead_mean <= 0) or np.any(lead_std < 0):
+        raise ValueError("Lead times must be positive.")
+
+    if residuals is not None:
+        pools, pool_lengths = _residual_pools(residuals, n_skus)
+        noise_std = None
+    else:
+        pools = None
+        noise_std = _per_sku(0.0 if residual_std is None else residual_std, n_skus, np.float32)
+
+    if order_quantity is None:
+        cycle = min(DEFAULT_ORDER_CYCLE_DAYS, horizon)
+        order_quantity = forecast[:, :cycle].mean(axis=1, dtype=np.float64) * DEFAULT_ORDER_CYCLE_DAYS
+    order_quantity = _per_sku(order_quantity, n_skus)
+    evaluated = None if reorder_point is None else _per_sku(reorder_point, n_skus)
+
+    # Rang du quantile empirique : P(demande <= point de commande) >= taux de service
+    quantile_rank = np.clip(np.ceil(levels * scenarios).astype(np.intp) - 1, 0, scenarios - 1)
+
+    result = {
+        name: np.empty(n_skus)
+        for name in ("lead_time_demand_mean", "lead_time_demand_std", "reorder_point", "stockout_probability", "fill_rate")
+    }
+    if evaluated is not None:
+        result["evaluated_stockout_probability"] = np.empty(n_skus)
+        result["evaluated_fill_rate"] = np.empty(n_skus)
+
+    rng = np.random.default_rng(seed)
+    # Délai maximal simulé : moyenne + 6 écarts-types, borné à l'horizon de la prévision
+    max_days = int(min(horizon, np.ceil((lead_mean + 6 * lead_std).max())))
+    chunk_skus = max(1, chunk_cells // (scenarios * max_days))
+    half = (scenarios + 1) // 2
+
+    for start in range(0, n_skus, chunk_skus):
+        stop = min(start + chunk_skus, n_skus)
+        rows = stop - start
+        lead_times = _sample_lead_times(rng, lead_mean[start:stop], lead_std[start:stop], (rows, scenarios), max_days)
+        # Disposition jour x produit x scénario, jusqu'au plus long délai tiré dans le bloc
+        days = int(lead_times.max())
+        demand = np.empty((days, rows, scenarios), dtype=np.float32)
+
+        # Variables antithétiques : la seconde moitié des scénarios rejoue la première en
+        # miroir (z et -z, ou rangs opposés du pool trié). Chaque scénario garde la loi
+        # des résidus, avec deux fois moins de tirages aléatoires.
+        if pools is None:
+            demand[..., :half] = rng.standard_normal(size=(days, rows, half), dtype=np.float32)
+            np.negative(demand[..., :scenarios - half], out=demand[..., half:])
+            demand *= noise_std[start:stop, np.newaxis]
+        else:
+            lengths = pool_lengths[start:stop, np.newaxis]
+            picks = rng.random(size=(days, rows, half), dtype=np.float32)
+            picks *= lengths
+            picks = np.minimum(picks.astype(np.int32), lengths - 1)
+            offsets = (np.arange(rows, dtype=np.int32) * pools.shape[1])[:, np.newaxis]
+            flat_pools = np.ascontiguousarray(pools[start:stop]).ravel()
+            np.take(flat_pools, picks + offsets, out=demand[..., :half])
+            np.take(flat_pools, lengths - 1 - picks[..., :scenarios - half] + offsets, out=demand[..., half:])
+            del picks
+        demand += forecast[start:stop, :days].T[:, :, np.newaxis]
+        np.maximum(demand, 0, out=demand)
+
+        # Demande cumulée jour par jour (une addition de lignes contiguës par jour), lue
+        # au dernier jour du délai de chaque scénario
+        cells = rows * scenarios
+        cumulative = demand.reshape(days, cells)
+        for day in range(1, days):
+            np.add(cumulative[day - 1], cumulative[day], out=cumulative[day])
+        lead_demand = cumulative.ravel()[(lead_times.ravel() - 1) * cells + np.arange(cells)].reshape(rows, scenarios)
+        del demand, cumulative
+        lead_demand = np.sort(lead_demand.astype(np.float64), axis=1)
+
+        required = np.take_along_axis(lead_demand, quantile_rank[start:stop, np.newaxis], axis=1)[:, 0]
+        quantity = order_quantity[start:stop]
+        result["lead_time_demand_mean"][start:stop] = lead_demand.mean(axis=1)
+        result["lead_time_demand_std"][start:stop] = lead_demand.std(axis=1)
+        result["reorder_point"][start:stop] = required
+        for prefix, point in (("", required), ("evaluated_", None if evaluated is None else evaluated[start:stop])):
+            if point is None:
+                continue
+            shortage = np.maximum(lead_demand - point[:, np.newaxis], 0)
+            result[f"{prefix}stockout_probability"][start:stop] = (shortage > 0).mean(axis=1)
+            # Fill rate : part de la demande d'un cycle servie depuis le stock
+            expected_shortage = shortage.mean(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                fill_rate = np.where(quantity > 0, 1 - expected_shortage / quantity, 1.0)
+            result[f"{prefix}fill_rate"][start:stop] = np.clip(fill_rate, 0, 1)
+
+    return result
@@ -0,0 +1,175 @@
+# Fichier : app/core/job_events.py
+
+import asyncio
+import json
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set, Tuple
+
+import redis
+
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+
+# Canal Redis commun à tous les jobs (l'identifiant du job est dans l'événement)
+CHANNEL = "job_events"
+# Événements en attente par flux ; au-delà, les plus anciens (avancement) sont abandonnés
+SUBSCRIBER_QUEUE_SIZE = 64
+RECONNECT_DELAY_SECONDS = 1.0
+
+
+class JobEventBus:
+    """
+    Diffusion des changements d'état des jobs vers les flux SSE de l'API.
+
+    Les événements (dict JSON contenant `job_id`) sont publiés par les tâches et remis
+    aux flux abonnés à ce job dans le processus (une file asyncio par flux).
+    Cette classe fait la diffusion en mémoire : elle suffit quand les tâches s'exécutent
+    dans le processus de l'API (tests, Celery en mode eager).
+    """
+
+    backend = "memory"
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[Tuple[asyncio.AbstractEventLoop, asyncio.Queue]]] = {}
+        self._lock = threading.Lock()
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+
+    def publish(self, event: dict) -> None:
+        """Publie un événement. Appel synchrone, depuis n'importe quel thread ; ne lève pas."""
+        self.published += 1
+        self._dispatch(event)
+
+    def _dispatch(self, event: dict) -> None:
+        with self._lock:
+            targets = list(self._subscribers.get(event["job_id"], ()))
+        for loop, queue in targets:
+            try:
+                loop.call_soon_threadsafe(self._offer, queue, event)
+            except RuntimeError:
+                pass  # Boucle fermée : le flux est déjà terminé
+
+    def _offer(self, queue: asyncio.Queue, event: dict) -> None:
+        if queue.full():
+            queue.get_nowait()
+            self.dropped += 1
+        queue.put_nowait(event)
+        self.delivered += 1
+
+    @asynccontextmanager
+    async def subscribe(self, job_id: int):
+        """File des événements d'un job, alimentée tant que le contexte est ouvert."""
+        queue: asyncio.Queue = asyncio.Queue(SUBSCRIBER_QUEUE_SIZE)
+        entry = (asyncio.get_running_loop(), queue)
+        with self._lock:
+            self._subscribers.setdefault(job_id, set()).add(entry)
+        try:
+            await self._ensure_listening()
+            yield queue
+        finally:
+            with self._lock:
+                entries = self._subscribers.get(job_id)
+                if entries is not None:
+                    entries.discard(entry)
+                    if not entries:
+                        del self._subscribers[job_id]
+
+    async def _ensure_listening(self) -> None:
+        pass
+
+    async def close(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            jobs = len(self._subscribers)
+            streams = sum(len(entries) for entries in self._subscribers.values())
+        return {
+            "backend": self.backend,
+            "watched_jobs": jobs,
+            "streams": streams,
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+        }
+
+
+class RedisJobEventBus(JobEventBus):
+    """
+    Diffusion entre processus par Redis pub/sub : les workers publient sur `CHANNEL`,
+    chaque processus API y est abonné par une seule connexion (ouverte au premier flux)
+    et redistribue les événements à ses flux locaux.
+
+    Une publication qui échoue est comptée et ignorée : la tâche n'échoue pas pour
+    autant, et les flux relisent l'état du job en base à chaque battement.
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str):
+        super().__init__()
+        self.url = url
+        self.publish_errors = 0
+        self._client: Optional[redis.Redis] = None
+        self._client_pid: Optional[int] = None
+        self._listener: Optional[asyncio.Task] = None
+
+    def publish(self, event: dict) -> None:
+        self.published += 1
+        try:
+            # Client propre au processus : non partagé avec le parent après un fork
+            if self._client is None or self._client_pid != os.getpid():
+                self._client = redis.Redis.from_url(self.url, socket_timeout=2, socket_connect_timeout=2)
+                self._client_pid = os.getpid()
+            self._client.publish(CHANNEL, json.dumps(event, separators=(",", ":")))
+        except redis.RedisError as e:
+            self.publish_errors += 1
+            print(f"Job events: publication impossible pour le job {event.get('job_id')} ({e}).")
+
+    async def _ensure_listening(self) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+
+    async def _listen(self) -> None:
+        import redis.asyncio as aioredis
+
+        while True:
+            client = aioredis.Redis.from_url(self.url)
+            try:
+                async with client.pubsub() as pubsub:
+                    await pubsub.subscribe(CHANNEL)
+                    async for message in pubsub.listen():
+                        if message["type"] == "message":
+                            self._dispatch(json.loads(message["data"]))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Job events: abonnement Redis interrompu ({e}), nouvelle tentative.")
+                await asyncio.sleep(RECONNECT_DELAY_SECONDS)
+            finally:
+                await client.aclose()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._listener = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "publish_errors": self.publish_errors}
+
+
+def _create_job_event_bus() -> JobEventBus:
+    if settings.JOB_EVENTS_REDIS_URL:
+        return RedisJobEventBus(settings.JOB_EVENTS_REDIS_URL)
+    return JobEventBus()
+
+
+job_events = _create_job_event_bus()
+register_metrics_source("job_events", job_events.stats)
@@ -0,0 +1,63 @@
+# Fichier : app/core/metrics.py
+
+import threading
+from typing import Callable, Dict, Sequence
+
+
+class Histogram:
+    """
+    Histogramme à seaux fixes, protégé par un verrou (un par processus).
+    Les seaux sont cumulatifs, comme dans Prometheus : "<=10" compte toutes les
+    observations inférieures ou égales à 10.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        index = len(self.buckets)
+        for position, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = position
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self.count += 1
+            self.total += value
+            if value > self.max:
+                self.max = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            counts = list(self._counts)
+            count, total, maximum = self.count, self.total, self.max
+        cumulative, buckets = 0, {}
+        for bound, bucket_count in zip(self.buckets, counts):
+            cumulative += bucket_count
+            buckets[f"<={bound:g}"] = cumulative
+        buckets["+Inf"] = count
+        return {
+            "count": count,
+            "sum": round(total, 6),
+            "mean": round(total / count, 6) if count else 0.0,
+            "max": round(maximum, 6),
+            "buckets": buckets,
+        }
+
+
+# Sources de métriques exposées par GET /api/v1/metrics (nom -> fonction sans argument)
+_sources: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics_source(name: str, collect: Callable[[], dict]) -> None:
+    """Enregistre une fonction retournant un instantané (dict sérialisable en JSON)."""
+    _sources[name] = collect
+
+
+def collect_metrics() -> dict:
+    return {name: collect() for name, collect in _sources.items()}
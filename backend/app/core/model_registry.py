@@ -0,0 +1,304 @@
+# Fichier : app/core/model_registry.py
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import importlib.util
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.tree_ensemble import CompiledTreeEnsemble
+from app.core.metrics import register_metrics_source
+
+# Fichier des versions actives (global et par entreprise), relu quand il change
+PINS_FILENAME = "active_models.json"
+_VERSION_PATTERNS = (
+    re.compile(r"^lgbm_demand_model_(?P<version>[\w.-]+)\.joblib$"),
+    re.compile(r"^model_(?P<version>[\w.-]+)_compiled\.npz$"),
+)
+# Moteurs d'inférence : modèle LightGBM (joblib) ou arbres compilés en NumPy (.npz)
+BACKEND_LIGHTGBM, BACKEND_COMPILED, BACKEND_AUTO = "lightgbm", "compiled", "auto"
+
+# Paramètres passés au Booster à chaque prédiction (voir `set_predict_threads`)
+_predict_params: dict = {}
+
+
+def set_predict_threads(threads: int) -> None:
+    """
+    Nombre de threads OpenMP utilisés par LightGBM pour chaque prédiction du processus
+    (0 = défaut de LightGBM, tous les cœurs). Un worker prefork qui exécute un processus
+    par cœur doit utiliser 1 : sinon chaque enfant lance autant de threads que de cœurs.
+    """
+    global _predict_params
+    _predict_params = {"num_threads": threads} if threads > 0 else {}
+
+
+class ModelNotFoundError(LookupError):
+    """La version demandée n'a pas d'artefacts dans le répertoire du registre."""
+
+
+@dataclass(frozen=True)
+class ModelVersion:
+    """
+    Artefacts d'une version publiée du modèle : le modèle, la liste ordonnée de ses
+    caractéristiques et ses statistiques d'erreur (mesurées à l'entraînement).
+    Le modèle est soit le modèle LightGBM (`model`), soit sa version compilée (`compiled`).
+    Immuable : une prédiction en cours garde sa version même si une autre est activée.
+    """
+    version: str
+    model: Optional[object]
+    features: List[str]
+    error_std: float
+    compiled: Optional[CompiledTreeEnsemble] = None
+
+    @property
+    def backend(self) -> str:
+        return BACKEND_LIGHTGBM if self.model is not None else BACKEND_COMPILED
+
+    def predict_raw(self, X: np.ndarray) -> np.ndarray:
+        """
+        Prédit directement avec le Booster LightGBM sous-jacent (ou les arbres compilés),
+        sans DataFrame ni validation du wrapper scikit-learn. `X` est une matrice
+        (n, n_features) dans l'ordre de `features` ; une matrice float32 contiguë est
+        transmise sans copie à LightGBM. Le nombre de threads est celui de `set_predict_threads`.
+        """
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        if self.model is None:
+            return self.compiled.predict(X)
+        return self.model.booster_.predict(X, **_predict_params)
+
+
+def _read_json(path: str):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+class ModelRegistry:
+    """
+    Registre des versions du modèle de demande, propre à chaque processus.
+
+    Une version `vX` correspond aux fichiers `lgbm_demand_model_vX.joblib` (ou sa version
+    compilée `model_vX_compiled.npz`, voir `app.core.tree_ensemble`), `model_vX_features.json`
+    et `model_vX_metrics.json` du répertoire du registre. Avec le moteur "auto", le modèle
+    LightGBM est utilisé si lightgbm est installé, sinon la version compilée.
+    Les versions sont chargées à la première utilisation puis gardées en mémoire.
+
+    La version active est épinglée globalement ou par entreprise dans `active_models.json`
+    ({"default": "v1", "companies": {"42": "v2"}}). Ce fichier est relu quand sa date de
+    modification change (vérifiée au plus toutes les `check_interval` secondes) : publier
+    une version dans un processus l'active dans tous les autres sans redémarrage.
+    La nouvelle version est chargée avant le remplacement des épinglages, qui se fait
+    en une affectation : aucune prédiction en cours n'est interrompue.
+    """
+
+    def __init__(self, directory: str, default_version: str, check_interval: float, backend: str = BACKEND_AUTO):
+        if backend not in (BACKEND_LIGHTGBM, BACKEND_COMPILED, BACKEND_AUTO):
+            raise ValueError(f"Unknown model backend '{backend}'.")
+        self.directory = directory
+        self.backend = backend
+        self.check_interval = check_interval
+        self._fallback_version = default_version
+        self._versions: Dict[str, ModelVersion] = {}
+        self._load_lock = threading.Lock()
+        self._pins_lock = threading.Lock()
+        # (version par défaut, {company_id: version}), remplacé d'un bloc
+        self._pins = (default_version, {})
+        self._pins_mtime: Optional[float] = None
+        self._next_check = 0.0
+        self.loads = 0
+
+    @property
+    def pins_path(self) -> str:
+        return os.path.join(self.directory, PINS_FILENAME)
+
+    def _paths(self, version: str) -> dict:
+        return {
+            "model": os.path.join(self.directory, f"lgbm_demand_model_{version}.joblib"),
+            "compiled": os.path.join(self.directory, f"model_{version}_compiled.npz"),
+            "features": os.path.join(self.directory, f"model_{version}_features.json"),
+            "metrics": os.path.join(self.directory, f"model_{version}_metrics.json"),
+        }
+
+    def available_versions(self) -> List[str]:
+        """Versions dont le modèle est présent dans le répertoire du registre."""
+        versions = set()
+        for filename in os.listdir(self.directory):
+            for pattern in _VERSION_PATTERNS:
+                match = pattern.match(filename)
+                if match:
+                    versions.add(match.group("version"))
+        return sorted(versions)
+
+    def get(self, version: str) -> ModelVersion:
+        """Retourne une version, en la chargeant si c'est sa première utilisation."""
+        loaded = self._versions.get(version)
+        if loaded is not None:
+            return loaded
+        with self._load_lock:
+            loaded = self._versions.get(version)
+            if loaded is None:
+                loaded = self._load(version)
+                self._versions = {**self._versions, version: loaded}
+            return loaded
+
+    def _backend_for(self, paths: dict) -> str:
+        if self.backend != BACKEND_AUTO:
+            return self.backend
+        if importlib.util.find_spec("lightgbm") is not None and os.path.exists(paths["model"]):
+            return BACKEND_LIGHTGBM
+        return BACKEND_COMPILED
+
+    def _load(self, version: str) -> ModelVersion:
+        paths = self._paths(version)
+        backend = self._backend_for(paths)
+        model_path = paths["model" if backend == BACKEND_LIGHTGBM else "compiled"]
+        missing = [path for path in (model_path, paths["features"], paths["metrics"]) if not os.path.exists(path)]
+        if missing:
+            raise ModelNotFoundError(f"Model version '{version}' is incomplete, missing: {', '.join(missing)}")
+        print(f"Chargement du modèle {version} depuis : {model_path}")
+        features = _read_json(paths["features"])
+        model, compiled = None, None
+        if backend == BACKEND_LIGHTGBM:
+            import joblib
+            model = joblib.load(model_path)
+        else:
+            compiled = CompiledTreeEnsemble.load(model_path)
+            if compiled.feature_names != features:
+                raise ValueError(f"Compiled model {version} features do not match model_{version}_features.json.")
+        model_version = ModelVersion(
+            version=version,
+            model=model,
+            features=features,
+            error_std=float(_read_json(paths["metrics"])["error_std"]),
+            compiled=compiled,
+        )
+        self.loads += 1
+        print(f"Modèle {version} chargé.")
+        return model_version
+
+    def preload(self) -> List[str]:
+        """
+        Charge la version par défaut et toutes les versions épinglées. Appelé dans le
+        processus parent d'un worker prefork : les enfants héritent des modèles chargés
+        (partagés en copie sur écriture) au lieu de les charger chacun.
+        """
+        self._refresh_pins()
+        default, companies = self._pins
+        versions = sorted({default, *companies.values()})
+        for version in versions:
+            self.get(version)
+        return versions
+
+    def _refresh_pins(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._pins_lock:
+            self._next_check = now + self.check_interval
+            try:
+                mtime = os.stat(self.pins_path).st_mtime
+            except FileNotFoundError:
+                self._pins, self._pins_mtime = (self._fallback_version, {}), None
+                return
+            if mtime == self._pins_mtime:
+                return
+            pins = _read_json(self.pins_path)
+            self._pins = (
+                pins.get("default", self._fallback_version),
+                {int(company_id): version for company_id, version in pins.get("companies", {}).items()},
+            )
+            self._pins_mtime = mtime
+
+    def active_version(self, company_id: Optional[int] = None) -> str:
+        """Nom de la version active pour une entreprise (sans charger le modèle)."""
+        self._refresh_pins()
+        default, companies = self._pins
+        return companies.get(company_id, default)
+
+    def active(self, company_id: Optional[int] = None) -> ModelVersion:
+        """Version active pour une entreprise (ou globale), chargée si besoin."""
+        return self.get(self.active_version(company_id))
+
+    def publish(self, version: str, company_id: Optional[int] = None) -> ModelVersion:
+        """
+        Active une version globalement ou pour une entreprise.
+        La version est chargée (et donc validée) avant d'être activée ; le fichier
+        des épinglages est remplacé atomiquement pour les autres processus.
+        """
+        model_version = self.get(version)
+
+        def activate(pins: dict) -> None:
+            if company_id is None:
+                pins["default"] = version
+            else:
+                pins.setdefault("companies", {})[str(company_id)] = version
+
+        self._update_pins(activate)
+        return model_version
+
+    def unpin(self, company_id: int) -> None:
+        """Retire l'épinglage d'une entreprise, qui revient à la version par défaut."""
+        self._update_pins(lambda pins: pins.get("companies", {}).pop(str(company_id), None))
+
+    def _update_pins(self, mutate) -> None:
+        """Modifie le fichier des épinglages et le remplace atomiquement (écriture + rename)."""
+        with self._pins_lock:
+            pins = _read_json(self.pins_path) if os.path.exists(self.pins_path) else {}
+            mutate(pins)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".active_models.")
+            with os.fdopen(fd, "w") as f:
+                json.dump(pins, f, indent=2)
+            os.replace(tmp_path, self.pins_path)
+            # Forcer la relecture au prochain appel
+            self._pins_mtime, self._next_check = None, 0.0
+
+    def stats(self) -> dict:
+        default, companies = self._pins
+        return {
+            "default_version": default,
+            "company_pins": len(companies),
+            "loaded_versions": {version: loaded.backend for version, loaded in sorted(self._versions.items())},
+            "loads": self.loads,
+        }
+
+
+model_registry = ModelRegistry(
+    directory=settings.MODEL_REGISTRY_DIR,
+    default_version=settings.MODEL_DEFAULT_VERSION,
+    check_interval=settings.MODEL_PINS_CHECK_SECONDS,
+    backend=settings.MODEL_BACKEND,
+)
+set_predict_threads(settings.MODEL_PREDICT_THREADS)
+register_metrics_source("model_registry", model_registry.stats)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Gestion des versions actives du modèle de demande.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    subcommands.add_parser("list", help="Lister les versions disponibles et les épinglages.")
+    publish = subcommands.add_parser("publish", help="Activer une version (globalement ou pour une entreprise).")
+    publish.add_argument("version")
+    publish.add_argument("--company-id", type=int, default=None)
+    unpin = subcommands.add_parser("unpin", help="Ramener une entreprise sur la version par défaut.")
+    unpin.add_argument("company_id", type=int)
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        model_registry.publish(args.version, company_id=args.company_id)
+    elif args.command == "unpin":
+        model_registry.unpin(args.company_id)
+    model_registry.active_version()
+    default, companies = model_registry._pins
+    print(f"Versions disponibles : {', '.join(model_registry.available_versions())}")
+    print(f"Version par défaut : {default}")
+    for company_id, version in sorted(companies.items()):
+        print(f"  entreprise {company_id} : {version}")
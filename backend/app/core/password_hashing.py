@@ -0,0 +1,90 @@
+# Fichier : app/core/password_hashing.py
+
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+from app.core import security
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+
+
+class PasswordHasherBusy(RuntimeError):
+    """Trop de hachages en attente : la demande est refusée au lieu d'être mise en file."""
+
+
+class PasswordHasherPool:
+    """
+    Exécute le hachage et la vérification bcrypt dans un pool de processus dédié.
+
+    bcrypt est lié au CPU : dans le pool de threads partagé de FastAPI, un pic de connexions
+    occuperait tous les threads et bloquerait les autres endpoints. Ici, le travail part dans
+    `workers` processus (le GIL n'intervient pas) et au plus `max_queue` demandes attendent
+    au-delà ; les suivantes échouent immédiatement avec `PasswordHasherBusy`.
+    Les processus sont lancés en mode "spawn" (pas de fork d'un processus multi-thread).
+    """
+
+    def __init__(self, workers: int, max_queue: int):
+        self.workers = workers
+        self.max_pending = workers + max_queue
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+
+    def start(self) -> None:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+                )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise PasswordHasherBusy("Password hashing capacity exceeded.")
+            self.pending += 1
+        try:
+            self.start()
+            result = await asyncio.wrap_future(self._executor.submit(fn, *args))
+            with self._lock:
+                self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password)
+
+    async def verify_and_update(self, password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+        """Voir `security.verify_and_update_password`."""
+        return await self._run(security.verify_and_update_password, password, hashed_password)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "pending": self.pending,
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "bcrypt_rounds": settings.BCRYPT_ROUNDS,
+            }
+
+
+password_hasher = PasswordHasherPool(
+    workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+register_metrics_source("password_hasher", password_hasher.stats)
@@ -1,41 +1,54 @@
 # Fichier : app/core/prediction_logic.py
 
+import numpy as np
 import pandas as pd
-import joblib
-import json
-import os
-from scipy.stats import norm
-from typing import List
-from app.core.stock_optimization import calculate_optimal_stock_levels
-
-# Définir les chemins des artefacts du modèle
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) # Remonte au dossier /app
-MODEL_DIR = os.path.join("/app/models_artefacts") # Puis va dans /models_artefacts
-MODEL_PATH = os.path.join(MODEL_DIR, "lgbm_demand_model_v1.joblib")
-FEATURES_PATH = os.path.join(MODEL_DIR, "model_v1_features.json")
-
-# Charger les artefacts une seule fois au démarrage du module pour la performance
-print(f"Chargement du modèle depuis : {MODEL_PATH}")
-model = joblib.load(MODEL_PATH)
-print("Modèle chargé.")
-
-print(f"Chargement des caractéristiques depuis : {FEATURES_PATH}")
-with open(FEATURES_PATH, 'r') as f:
-    model_features = json.load(f)
-print("Caractéristiques chargées.")
+from typing import Callable, Dict, Optional
+from app.core.model_registry import ModelVersion
+from app.core.stock_optimization import stock_recommendations
+from app.core.recursive_forecast import recursive_forecast, future_dates
+
+
+def forecast_future(
+    sales_df: pd.DataFrame,
+    future_periods: int,
+    model_version: ModelVersion,
+    predict: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+) -> tuple:
+    """
+    Prévision récursive des `future_periods` jours suivant l'historique, avec la
+    version du modèle donnée (voir `model_registry`). `predict` remplace l'appel
+    direct au modèle (par exemple `inference_batcher.predictor(model_version)`).
+
+    Returns:
+        Un tuple (dates futures en datetime64[D], prédictions).
+    """
+    last_date = sales_df['ds'].max()
+    predictions = recursive_forecast(
+        predict or model_version.predict_raw,
+        model_version.features,
+        histories=[sales_df['y'].to_numpy(dtype=float)],
+        last_dates=[last_date],
+        horizon=future_periods,
+    )[0]
+    return future_dates(last_date, future_periods), predictions
 
 
 def create_features_for_inference(df: pd.DataFrame, future_periods: int) -> pd.DataFrame:
     """
     Crée les caractéristiques pour l'historique ET les périodes futures.
+    Les lags des périodes futures ne sont renseignés que sur les premiers jours :
+    pour prévoir au-delà, utiliser `forecast_future` (prévision récursive).
     """
-    # Créer les dates futures
-    last_date = df['ds'].max()
-    future_dates = pd.to_datetime([last_date + pd.Timedelta(days=i) for i in range(1, future_periods + 1)])
-    future_df = pd.DataFrame({'ds': future_dates})
-    
-    # Concaténer l'historique et le futur pour calculer les lags/rolling features
-    full_df = pd.concat([df, future_df], ignore_index=True)
+    if future_periods > 0:
+        # Créer les dates futures
+        last_date = df['ds'].max()
+        new_dates = pd.to_datetime([last_date + pd.Timedelta(days=i) for i in range(1, future_periods + 1)])
+        future_df = pd.DataFrame({'ds': new_dates})
+        
+        # Concaténer l'historique et le futur pour calculer les lags/rolling features
+        full_df = pd.concat([df, future_df], ignore_index=True)
+    else:
+        full_df = df.copy()
 
     # Réutiliser la même logique de création de features que pour l'entraînement
     full_df['day_of_week'] = full_df['ds'].dt.dayofweek
@@ -54,57 +67,88 @@ def create_features_for_inference(df: pd.DataFrame, future_periods: int) -> pd.D
     return full_df
 
 
-def run_prediction_pipeline(sales_df: pd.DataFrame) -> dict:
+def _forecast_block(dates, predictions: np.ndarray) -> dict:
+    return {
+        "dates": np.datetime_as_string(np.asarray(dates, dtype="datetime64[D]"), unit="D").tolist(),
+        "predicted_demand": np.round(predictions, 2).tolist()
+    }
+
+
+def build_prediction_result(dates, predictions, model_error_std: float) -> dict:
     """
-    Exécute le pipeline de prédiction en utilisant le modèle chargé.
+    Construit le résultat combiné (prévision + recommandations de stock)
+    à partir des prédictions d'une série. `model_error_std` est l'écart-type de
+    l'erreur du modèle utilisé (artefact de sa version).
+    """
+    # S'assurer que les prédictions ne sont pas négatives (opérations vectorisées)
+    predictions = np.maximum(np.asarray(predictions, dtype=np.float64), 0)
+
+    # Optimisation du stock à partir de la demande moyenne prévue (paramètres métier par défaut)
+    stock_optimization_results = stock_recommendations(predictions.mean(), model_error_std)[0]
+
+    return {
+        "forecast_90_days": _forecast_block(dates, predictions),
+        "stock_optimization": stock_optimization_results
+    }
+
+
+def run_prediction_pipeline(sales_df: pd.DataFrame, model_version: ModelVersion) -> dict:
+    """
+    Exécute le pipeline de prédiction avec une version du modèle. La version est résolue
+    une fois par l'appelant : tout le job utilise le même modèle, même si une autre
+    version est activée entre-temps.
     """
     print(f"Starting REAL prediction pipeline for dataframe with {len(sales_df)} records...")
     
     # --- PRÉDICTION ---
-    # Générer les caractéristiques pour les 90 prochains jours
+    # Prévision récursive des 90 prochains jours : chaque prédiction alimente
+    # les lags et moyennes mobiles des jours suivants
     future_periods = 90
-    df_with_features = create_features_for_inference(sales_df, future_periods)
-    
-    # Isoler les lignes futures pour lesquelles nous voulons prédire
-    future_data = df_with_features.iloc[-future_periods:].copy()
-    
-    # S'assurer que les colonnes sont dans le bon ordre et que toutes sont présentes
-    X_future = future_data[model_features]
-    
-    # Faire la prédiction
-    predictions = model.predict(X_future)
-    # S'assurer que les prédictions ne sont pas négatives
-    predictions = [max(0, p) for p in predictions]
-
-    forecast = {
-        "dates": [d.strftime('%Y-%m-%d') for d in future_data['ds']],
-        "predicted_demand": [round(p, 2) for p in predictions]
-    }
-    
-     # --- 2. OPTIMISATION DU STOCK (Partie Algorithmique) ---
-    # Préparer les entrées pour le module d'optimisation
-    predicted_daily_demand = sum(predictions) / len(predictions)
-    # L'erreur du modèle devrait être un artefact stocké avec le modèle.
-    model_error_std = 17.06 # Valeur de notre expérimentation
-
-    # Paramètres métier (devraient venir de la BDD à terme)
-    lead_time_days = 30
-    lead_time_std_days = 5
-    service_level = 0.95
-    
-    # Appeler le module d'optimisation dédié
-    stock_optimization_results = calculate_optimal_stock_levels(
-        avg_daily_demand=predicted_daily_demand,
-        model_error_std=model_error_std,
-        lead_time_days=lead_time_days,
-        lead_time_std_days=lead_time_std_days,
-        service_level=service_level
-    )
+    dates, predictions = forecast_future(sales_df, future_periods, model_version)
+    results = build_prediction_result(dates, predictions, model_version.error_std)
+    results["model_version"] = model_version.version
     
     print("Real prediction pipeline finished.")
-    
-    # --- 3. RETOURNER LE RÉSULTAT COMBINÉ ---
-    return {
-        "forecast_90_days": forecast,
-        "stock_optimization": stock_optimization_results
-    }
\ No newline at end of file
+    return results
+
+
+def run_batch_prediction_pipeline(sales_by_product: Dict[int, pd.DataFrame], model_version: ModelVersion) -> Dict[int, dict]:
+    """
+    Exécute le pipeline de prédiction pour plusieurs produits à la fois.
+
+    Les séries sont empilées dans une même matrice de caractéristiques et avancées
+    ensemble : un seul appel au modèle par jour d'horizon pour tout le catalogue,
+    au lieu d'un pipeline complet par produit.
+
+    Args:
+        sales_by_product: Historique ({"ds", "y"}, ordre chronologique) de chaque produit.
+        model_version: Version du modèle utilisée pour tout le catalogue.
+
+    Returns:
+        Le résultat de `build_prediction_result` pour chaque produit.
+    """
+    print(f"Starting batch prediction pipeline for {len(sales_by_product)} products...")
+    future_periods = 90
+    product_ids = list(sales_by_product)
+    last_dates = [sales_by_product[pid]['ds'].max() for pid in product_ids]
+
+    predictions = recursive_forecast(
+        model_version.predict_raw,
+        model_version.features,
+        histories=[sales_by_product[pid]['y'].to_numpy(dtype=float) for pid in product_ids],
+        last_dates=last_dates,
+        horizon=future_periods,
+    )
+
+    # Recommandations de stock de tout le catalogue en un seul calcul vectorisé
+    predictions = np.maximum(np.asarray(predictions, dtype=np.float64), 0)
+    recommendations = stock_recommendations(predictions.mean(axis=1), model_version.error_std)
+    results = {
+        pid: {
+            "forecast_90_days": _forecast_block(future_dates(last_date, future_periods), row),
+            "stock_optimization": recommendation,
+        }
+        for pid, last_date, row, recommendation in zip(product_ids, last_dates, predictions, recommendations)
+    }
+    print("Batch prediction pipeline finished.")
+    return results
@@ -0,0 +1,210 @@
+# Fichier : app/core/recursive_forecast.py
+
+from typing import Callable, Dict, List, Sequence
+
+import numpy as np
+
+# Caractéristiques de décalage du modèle v1 (voir model_v1_features.json) ; une version
+# du modèle peut en utiliser d'autres, lues dans ses `feature_names`
+LAGS = (7, 14, 30)
+ROLLING_WINDOWS = (7, 14)
+BUFFER_SIZE = max(max(LAGS), max(ROLLING_WINDOWS))
+
+
+def calendar_features(dates: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Calcule les caractéristiques calendaires pour un tableau de dates `datetime64[D]`,
+    sans pandas. Les conventions sont celles de `Series.dt` (lundi = 0, semaine ISO).
+    """
+    dates = dates.astype("datetime64[D]")
+    days = dates.astype(np.int64)
+    # Le 1er janvier 1970 était un jeudi (jour 3 avec lundi = 0)
+    day_of_week = (days + 3) % 7
+    month_start = dates.astype("datetime64[M]")
+    year_start = dates.astype("datetime64[Y]")
+
+    # Semaine ISO : numéro de la semaine contenant le jeudi de la semaine courante
+    thursday = dates - day_of_week + 3
+    iso_year_start = thursday.astype("datetime64[Y]").astype("datetime64[D]")
+    week_of_year = (thursday - iso_year_start).astype(np.int64) // 7 + 1
+
+    return {
+        "day_of_week": day_of_week,
+        "day_of_month": (dates - month_start.astype("datetime64[D]")).astype(np.int64) + 1,
+        "day_of_year": (dates - year_start.astype("datetime64[D]")).astype(np.int64) + 1,
+        "week_of_year": week_of_year,
+        "month": month_start.astype(np.int64) % 12 + 1,
+        "year": year_start.astype(np.int64) + 1970,
+    }
+
+
+class LagRingBuffer:
+    """
+    Tampon circulaire des dernières valeurs de chaque série (une ligne par série).
+
+    Les décalages sont lus directement dans le tampon et les moyennes mobiles sont
+    maintenues par sommes glissantes : chaque pas de temps coûte O(1) par série,
+    quelle que soit la longueur de l'historique ou de l'horizon.
+    Une fenêtre contenant une valeur manquante donne NaN, comme
+    `Series.rolling(window).mean()`.
+    """
+
+    def __init__(
+        self,
+        histories: Sequence[Sequence[float]],
+        size: int = BUFFER_SIZE,
+        windows: Sequence[int] = ROLLING_WINDOWS,
+    ):
+        if any(window < 1 or window > size for window in windows):
+            raise ValueError(f"Rolling windows must be between 1 and the buffer size ({size}).")
+        self.size = size
+        self.windows = tuple(windows)
+        self.values = np.full((len(histories), size), np.nan)
+        for row, history in enumerate(histories):
+            tail = np.asarray(history, dtype=np.float64)[-size:]
+            if len(tail):
+                self.values[row, size - len(tail):] = tail
+        # Position où sera écrite la prochaine valeur (la plus ancienne du tampon)
+        self.position = 0
+
+        self._sums = {}
+        self._missing = {}
+        for window in self.windows:
+            recent = self.values[:, size - window:]
+            self._sums[window] = np.nansum(recent, axis=1)
+            self._missing[window] = np.isnan(recent).sum(axis=1)
+        # Cas courant (historique complet) : aucun NaN, les masques deviennent inutiles
+        self._any_missing = bool(np.isnan(self.values).any())
+
+    def lag(self, k: int) -> np.ndarray:
+        """Valeur observée k pas avant le pas courant (1 <= k <= taille du tampon)."""
+        if not 1 <= k <= self.size:
+            raise ValueError(f"Lag {k} is outside the buffer (1 to {self.size} days).")
+        return self.values[:, (self.position - k) % self.size]
+
+    def rolling_mean(self, window: int) -> np.ndarray:
+        """Moyenne des `window` dernières valeurs (hors pas courant)."""
+        means = self._sums[window] / window
+        if not self._any_missing:
+            return means
+        return np.where(self._missing[window] > 0, np.nan, means)
+
+    def push(self, new_values: np.ndarray) -> None:
+        """Ajoute la valeur du pas courant pour chaque série et avance d'un pas."""
+        new_values = np.asarray(new_values, dtype=np.float64)
+        new_missing = np.isnan(new_values)
+        if not self._any_missing and not new_missing.any():
+            for window in self.windows:
+                self._sums[window] += new_values - self.lag(window)
+        else:
+            for window in self.windows:
+                leaving = self.lag(window)
+                leaving_missing = np.isnan(leaving)
+                self._sums[window] += np.where(new_missing, 0.0, new_values) - np.where(leaving_missing, 0.0, leaving)
+                self._missing[window] += new_missing.astype(np.int64) - leaving_missing.astype(np.int64)
+        self.values[:, self.position] = new_values
+        self.position = (self.position + 1) % self.size
+        if self._any_missing:
+            self._any_missing = bool(np.isnan(self.values).any())
+
+
+def recursive_forecast(
+    predict: Callable[[np.ndarray], np.ndarray],
+    feature_names: List[str],
+    histories: Sequence[Sequence[float]],
+    last_dates: Sequence,
+    horizon: int,
+) -> np.ndarray:
+    """
+    Prévision récursive multi-pas : chaque jour prédit est réinjecté dans le tampon
+    pour calculer les décalages et moyennes mobiles des jours suivants.
+
+    Plusieurs séries sont avancées ensemble : un seul appel à `predict` par pas de
+    temps, pour toutes les séries à la fois.
+
+    Args:
+        predict: Fonction de prédiction prenant une matrice (n_series, n_features).
+        feature_names: Ordre des colonnes attendu par le modèle.
+        histories: Historique des ventes journalières de chaque série (ordre chronologique).
+        last_dates: Dernière date observée de chaque série.
+        horizon: Nombre de jours à prédire.
+
+    Returns:
+        Un tableau (n_series, horizon) de prédictions positives ou nulles.
+    """
+    lag_columns = [(column, int(name.rsplit("_", 1)[1])) for column, name in enumerate(feature_names) if name.startswith("sales_lag_")]
+    rolling_columns = [(column, int(name.rsplit("_", 1)[1])) for column, name in enumerate(feature_names) if name.startswith("rolling_mean_")]
+    # Tampon dimensionné sur les décalages et fenêtres du modèle, quels qu'ils soient
+    windows = sorted({window for _, window in rolling_columns})
+    size = max([lag for _, lag in lag_columns] + windows, default=1)
+    buffer = LagRingBuffer(histories, size=size, windows=windows)
+    n_series = len(histories)
+    predictions = np.empty((n_series, horizon))
+    # Matrice float32 contiguë : transmise telle quelle au Booster, sans conversion
+    X = np.empty((n_series, len(feature_names)), dtype=np.float32)
+
+    # Les caractéristiques calendaires ne dépendent pas des prédictions :
+    # elles sont calculées une seule fois pour tout l'horizon, forme (n_series, horizon)
+    start_dates = np.asarray(last_dates, dtype="datetime64[D]").reshape(-1, 1)
+    calendar = calendar_features(start_dates + np.arange(1, horizon + 1))
+    calendar_columns = [(column, calendar[name]) for column, name in enumerate(feature_names) if name in calendar]
+
+    for step in range(horizon):
+        for column, values in calendar_columns:
+            X[:, column] = values[:, step]
+        for column, lag in lag_columns:
+            X[:, column] = buffer.lag(lag)
+        for column, window in rolling_columns:
+            X[:, column] = buffer.rolling_mean(window)
+
+        step_predictions = np.maximum(predict(X), 0)
+        predictions[:, step] = step_predictions
+        buffer.push(step_predictions)
+
+    return predictions
+
+
+def _shift(values: np.ndarray, k: int) -> np.ndarray:
+    """Valeur k pas avant chaque pas (NaN pour les k premiers), comme `Series.shift(k)`."""
+    shifted = np.full(len(values), np.nan)
+    if k < len(values):
+        shifted[k:] = values[:len(values) - k]
+    return shifted
+
+
+def _trailing_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """Moyenne des `window` valeurs précédant chaque pas, comme `shift(1).rolling(window).mean()`."""
+    means = np.full(len(values), np.nan)
+    if window < len(values):
+        windows = np.lib.stride_tricks.sliding_window_view(values, window)
+        means[window:] = windows[:len(values) - window].mean(axis=1)
+    return means
+
+
+def history_feature_matrix(dates, values, feature_names: List[str]) -> np.ndarray:
+    """
+    Caractéristiques des jours observés d'une série, dans l'ordre de `feature_names`,
+    sous forme de matrice float32 contiguë prête pour le Booster.
+
+    Équivalent sans pandas de `create_features_for_inference(df, 0)[feature_names]` :
+    décalages et moyennes mobiles valent NaN tant que l'historique est insuffisant.
+    """
+    dates = np.asarray(dates, dtype="datetime64[D]")
+    values = np.asarray(values, dtype=np.float64)
+    calendar = calendar_features(dates)
+    X = np.empty((len(values), len(feature_names)), dtype=np.float32)
+    for column, name in enumerate(feature_names):
+        if name in calendar:
+            X[:, column] = calendar[name]
+        elif name.startswith("sales_lag_"):
+            X[:, column] = _shift(values, int(name.rsplit("_", 1)[1]))
+        elif name.startswith("rolling_mean_"):
+            X[:, column] = _trailing_mean(values, int(name.rsplit("_", 1)[1]))
+        else:
+            raise ValueError(f"Unsupported feature: {name}")
+    return X
+
+
+def future_dates(last_date, horizon: int) -> np.ndarray:
+    """Dates des `horizon` jours suivant `last_date`, au format `datetime64[D]`."""
+    return np.datetime64(last_date, "D") + np.arange(1, horizon + 1)
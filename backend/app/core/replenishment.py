@@ -0,0 +1,83 @@
+# Fichier : app/core/replenishment.py
+
+import csv
+import io
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from app.core.stock_optimization import calculate_stock_levels
+
+# Colonnes du rapport de réapprovisionnement, dans l'ordre du CSV
+REPLENISHMENT_COLUMNS = (
+    "product_id", "sku", "run_id", "model_version", "horizon_days",
+    "forecast_30d", "forecast_total", "avg_daily_demand",
+    "safety_stock", "reorder_point",
+)
+
+
+def replenishment_rows(
+    page: List[dict],
+    error_std_by_version: Dict[str, float],
+    lead_time_days: float,
+    lead_time_std_days: float,
+    service_level: float,
+) -> List[dict]:
+    """
+    Lignes du rapport pour une page de `get_latest_forecasts_page_async`. Les niveaux de
+    stock de toute la page sont calculés en un appel, avec la même demande moyenne
+    (sur l'horizon) que la recommandation du job de prédiction. Les champs d'un produit
+    sans prévision sont à None, ainsi que ses niveaux de stock si l'écart-type d'erreur
+    de sa version du modèle est inconnu (None dans `error_std_by_version`).
+    """
+    forecasted = [
+        entry for entry in page
+        if entry["yhat"] and error_std_by_version.get(entry["model_version"]) is not None
+    ]
+    stock_by_product = {}
+    if forecasted:
+        demand = np.array([np.mean(entry["yhat"]) for entry in forecasted])
+        error_std = np.array([error_std_by_version[entry["model_version"]] for entry in forecasted])
+        levels = calculate_stock_levels(demand, error_std, lead_time_days, lead_time_std_days, service_level)
+        safety_stocks = np.round(levels["safety_stock"]).astype(int).tolist()
+        reorder_points = np.round(levels["reorder_point"]).astype(int).tolist()
+        stock_by_product = {
+            entry["product_id"]: (safety, reorder)
+            for entry, safety, reorder in zip(forecasted, safety_stocks, reorder_points)
+        }
+
+    rows = []
+    for entry in page:
+        row = dict.fromkeys(REPLENISHMENT_COLUMNS)
+        row["product_id"] = entry["product_id"]
+        row["sku"] = entry["sku"]
+        if entry["yhat"]:
+            yhat = entry["yhat"]
+            row.update(
+                run_id=entry["run_id"],
+                model_version=entry["model_version"],
+                horizon_days=len(yhat),
+                forecast_30d=round(sum(yhat[:30]), 2),
+                forecast_total=round(sum(yhat), 2),
+                avg_daily_demand=round(sum(yhat) / len(yhat), 2),
+            )
+            if entry["product_id"] in stock_by_product:
+                row["safety_stock"], row["reorder_point"] = stock_by_product[entry["product_id"]]
+        rows.append(row)
+    return rows
+
+
+def ndjson_lines(rows: List[dict]) -> str:
+    """Une ligne JSON par produit."""
+    return "".join(json.dumps(row, separators=(",", ":")) + "\n" for row in rows)
+
+
+def csv_lines(rows: List[dict], header: bool = False) -> str:
+    """Lignes CSV (colonnes de `REPLENISHMENT_COLUMNS`), précédées de l'en-tête si demandé."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=REPLENISHMENT_COLUMNS, lineterminator="\n")
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
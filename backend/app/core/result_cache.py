@@ -0,0 +1,79 @@
+# Fichier : app/core/result_cache.py
+
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Hashable, Optional, Tuple
+
+from app.core.config import settings
+
+
+@dataclass
+class Snapshot:
+    key: Tuple[Hashable, ...]
+    value: Any
+
+
+class SnapshotCache:
+    """
+    Cache LRU borné de résultats calculés, un instantané par produit.
+
+    La clé complète d'un instantané est (product_id, version du modèle, watermark des
+    ventes) : un instantané n'est valide que si sa clé est identique à la clé courante.
+    Un instantané périmé est conservé (jusqu'à son remplacement) pour pouvoir être
+    servi en mode stale-while-revalidate. Aucune invalidation explicite : un import de
+    ventes (dans un worker) change le watermark, donc la clé courante du produit.
+    Les instances sont propres à chaque processus et protégées par un verrou.
+    """
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Snapshot]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[Hashable, ...]) -> Optional[Any]:
+        """Retourne la valeur si un instantané frais existe pour exactement cette clé."""
+        with self._lock:
+            snapshot = self._entries.get(key[0])
+            if snapshot is None or snapshot.key != key:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key[0])
+            self.hits += 1
+            return snapshot.value
+
+    def get_stale(self, product_id: Hashable) -> Optional[Any]:
+        """Retourne le dernier instantané connu du produit, même périmé."""
+        with self._lock:
+            snapshot = self._entries.get(product_id)
+            return snapshot.value if snapshot is not None else None
+
+    def put(self, key: Tuple[Hashable, ...], value: Any) -> None:
+        with self._lock:
+            self._entries[key[0]] = Snapshot(key=key, value=value)
+            self._entries.move_to_end(key[0])
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, product_id: Hashable) -> bool:
+        """Réserve le rafraîchissement d'un produit ; False s'il est déjà en cours."""
+        with self._lock:
+            if product_id in self._refreshing:
+                return False
+            self._refreshing.add(product_id)
+            return True
+
+    def end_refresh(self, product_id: Hashable) -> None:
+        with self._lock:
+            self._refreshing.discard(product_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+# Cache des données de tableau de bord (voir app/crud/dashboard_crud.py)
+dashboard_cache = SnapshotCache(max_entries=settings.DASHBOARD_CACHE_MAX_ENTRIES)
@@ -0,0 +1,217 @@
+# Fichier : app/core/sales_ingestion.py
+
+import io
+from typing import Dict, List, Tuple
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlmodel import Session
+
+from app.models.base import Sale, DailySales
+
+REQUIRED_COLUMNS = {"transaction_date", "sku", "quantity_sold", "unit_price"}
+
+# Ordre des colonnes utilisé pour le chargement en masse dans la table `sale`
+SALE_COLUMNS = ["transaction_date", "quantity_sold", "unit_price", "product_id"]
+
+# Taille des lots pour le repli executemany (SQLite, etc.)
+INSERT_BATCH_SIZE = 10_000
+
+# Colonnes de l'agrégat journalier `daily_sales`
+DAILY_SALES_COLUMNS = ["product_id", "day", "quantity", "revenue", "transaction_count"]
+
+# Nombre maximal d'erreurs détaillées renvoyées à l'utilisateur
+MAX_REPORTED_ERRORS = 100
+
+# INSERT ... ON CONFLICT DO UPDATE de l'agrégat journalier, par dialecte de base
+_UPSERT_INSERTS = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+
+def prepare_sales_frame(
+    df: pd.DataFrame, sku_to_product_id: Dict[str, int]
+) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Valide et convertit un DataFrame de ventes brut en une seule passe vectorisée.
+
+    Le mapping SKU -> product_id, l'analyse des dates et la conversion des types
+    sont effectués sur des colonnes entières au lieu d'itérer ligne par ligne.
+
+    Args:
+        df: Le DataFrame tel que lu depuis le CSV.
+        sku_to_product_id: Dictionnaire des SKU de l'entreprise vers leurs IDs.
+
+    Returns:
+        Un tuple (DataFrame prêt à être inséré avec les colonnes SALE_COLUMNS,
+        liste des messages d'erreur).
+    """
+    if not REQUIRED_COLUMNS.issubset(df.columns):
+        raise ValueError(f"CSV file must contain the following columns: {REQUIRED_COLUMNS}")
+
+    skus = df["sku"].astype(str).str.strip()
+    product_ids = skus.map(sku_to_product_id)
+
+    dates = pd.to_datetime(df["transaction_date"], errors="coerce")
+    # Repli sur une analyse au format mixte uniquement pour les valeurs non reconnues
+    unparsed = dates.isna() & df["transaction_date"].notna()
+    if unparsed.any():
+        dates.loc[unparsed] = pd.to_datetime(
+            df.loc[unparsed, "transaction_date"], errors="coerce", format="mixed"
+        )
+
+    quantities = pd.to_numeric(df["quantity_sold"], errors="coerce")
+    prices = pd.to_numeric(df["unit_price"], errors="coerce")
+
+    unknown_sku = product_ids.isna()
+    invalid_format = ~unknown_sku & (dates.isna() | quantities.isna() | prices.isna())
+
+    errors = []
+    # Les numéros de ligne correspondent à ceux du fichier (en-tête = ligne 1)
+    line_numbers = df.index + 2
+    for line, sku in zip(line_numbers[unknown_sku.to_numpy()], skus[unknown_sku]):
+        errors.append((line, f"Row {line}: SKU '{sku}' not found in your products."))
+    if invalid_format.any():
+        bad_columns = pd.DataFrame({
+            "transaction_date": dates.isna(),
+            "quantity_sold": quantities.isna(),
+            "unit_price": prices.isna(),
+        })[invalid_format]
+        for line, (_, flags) in zip(line_numbers[invalid_format.to_numpy()], bad_columns.iterrows()):
+            columns = ", ".join(col for col, is_bad in flags.items() if is_bad)
+            errors.append((line, f"Row {line}: Invalid data format - {columns}"))
+    errors = [message for _, message in sorted(errors, key=lambda item: item[0])]
+
+    valid = ~(unknown_sku | invalid_format)
+    sales = pd.DataFrame({
+        "transaction_date": dates[valid].dt.date,
+        "quantity_sold": quantities[valid].astype("int64"),
+        "unit_price": prices[valid].astype("float64"),
+        "product_id": product_ids[valid].astype("int64"),
+    }, columns=SALE_COLUMNS)
+    return sales, errors
+
+
+def summarize_errors(errors: List[str]) -> str:
+    """Construit le message d'échec de validation en limitant sa taille."""
+    shown = errors[:MAX_REPORTED_ERRORS]
+    message = "Validation failed. Errors: " + "; ".join(shown)
+    if len(errors) > len(shown):
+        message += f"; ... and {len(errors) - len(shown)} more errors."
+    return message
+
+
+def bulk_insert_sales(db: Session, sales: pd.DataFrame, batch_size: int = INSERT_BATCH_SIZE) -> int:
+    """
+    Charge en masse les ventes préparées dans la table `sale`, dans la transaction
+    courante de la session (le commit reste à la charge de l'appelant).
+
+    Utilise COPY sur PostgreSQL et un executemany par lots pour les autres moteurs.
+    """
+    if sales.empty:
+        return 0
+
+    connection = db.connection()
+    if connection.dialect.name == "postgresql":
+        _copy_sales_postgres(connection, sales)
+    else:
+        _insert_sales_batched(connection, sales, batch_size)
+    return len(sales)
+
+
+def _copy_sales_postgres(connection, sales: pd.DataFrame) -> None:
+    """Chargement via COPY ... FROM STDIN sur la connexion DBAPI sous-jacente."""
+    buffer = io.StringIO()
+    sales.to_csv(buffer, columns=SALE_COLUMNS, index=False, header=False)
+    buffer.seek(0)
+
+    table = Sale.__tablename__
+    columns = ", ".join(SALE_COLUMNS)
+    cursor = connection.connection.dbapi_connection.cursor()
+    try:
+        cursor.copy_expert(f"COPY {table} ({columns}) FROM STDIN WITH (FORMAT csv)", buffer)
+    finally:
+        cursor.close()
+
+
+def _insert_sales_batched(connection, sales: pd.DataFrame, batch_size: int) -> None:
+    """Repli générique : INSERT exécuté en executemany par lots de `batch_size` lignes."""
+    statement = insert(Sale.__table__)
+    for start in range(0, len(sales), batch_size):
+        batch = sales.iloc[start:start + batch_size]
+        records = [
+            dict(zip(SALE_COLUMNS, values))
+            for values in zip(
+                batch["transaction_date"],
+                batch["quantity_sold"].tolist(),
+                batch["unit_price"].tolist(),
+                batch["product_id"].tolist(),
+            )
+        ]
+        connection.execute(statement, records)
+
+
+def aggregate_daily_sales(sales: pd.DataFrame) -> pd.DataFrame:
+    """Agrège des ventes préparées par (produit, jour), triées par clé."""
+    frame = pd.DataFrame({
+        "product_id": sales["product_id"],
+        "day": sales["transaction_date"],
+        "quantity": sales["quantity_sold"],
+        "revenue": sales["quantity_sold"] * sales["unit_price"],
+    })
+    grouped = frame.groupby(["product_id", "day"], sort=True)
+    daily = grouped[["quantity", "revenue"]].sum()
+    daily["transaction_count"] = grouped.size()
+    return daily.reset_index()[DAILY_SALES_COLUMNS]
+
+
+def check_daily_sales_dialect(dialect: str) -> None:
+    """Vérifie que la base sait maintenir `daily_sales` (upsert) : PostgreSQL ou SQLite."""
+    if dialect not in _UPSERT_INSERTS:
+        raise RuntimeError(
+            f"daily_sales upsert is not supported on {dialect}; use PostgreSQL or SQLite."
+        )
+
+
+def upsert_daily_sales(db: Session, sales: pd.DataFrame, batch_size: int = INSERT_BATCH_SIZE) -> int:
+    """
+    Ajoute des ventes préparées à l'agrégat `daily_sales` dans la transaction courante.
+
+    Les ventes sont d'abord agrégées par (produit, jour), puis chaque ligne est insérée
+    ou additionnée à la ligne existante (INSERT ... ON CONFLICT DO UPDATE). L'addition
+    est faite par la base : deux imports concurrents du même produit restent corrects.
+    Les lignes sont écrites dans l'ordre de la clé pour éviter les interblocages.
+
+    Returns:
+        Le nombre de lignes (produit, jour) touchées.
+    """
+    if sales.empty:
+        return 0
+
+    connection = db.connection()
+    check_daily_sales_dialect(connection.dialect.name)
+    table = DailySales.__table__
+    statement = _UPSERT_INSERTS[connection.dialect.name](table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.product_id, table.c.day],
+        set_={
+            "quantity": table.c.quantity + statement.excluded.quantity,
+            "revenue": table.c.revenue + statement.excluded.revenue,
+            "transaction_count": table.c.transaction_count + statement.excluded.transaction_count,
+        },
+    )
+
+    daily = aggregate_daily_sales(sales)
+    for start in range(0, len(daily), batch_size):
+        batch = daily.iloc[start:start + batch_size]
+        records = [
+            dict(zip(DAILY_SALES_COLUMNS, values))
+            for values in zip(
+                batch["product_id"].tolist(),
+                batch["day"],
+                batch["quantity"].tolist(),
+                batch["revenue"].tolist(),
+                batch["transaction_count"].tolist(),
+            )
+        ]
+        connection.execute(statement, records)
+    return len(daily)
@@ -5,8 +5,18 @@ from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 
-# Contexte pour le hachage des mots de passe
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from app.core.config import settings
+
+# Contexte pour le hachage des mots de passe.
+# Le coût bcrypt est fixé par BCRYPT_ROUNDS (min = max = défaut) : un hash d'un autre coût,
+# plus élevé ou plus faible, est recalculé à la prochaine connexion (verify_and_update).
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__max_rounds=settings.BCRYPT_ROUNDS,
+)
 
 # Charger les secrets depuis les variables d'environnement
 SECRET_KEY = os.getenv("SECRET_KEY")
@@ -21,6 +31,13 @@ def get_password_hash(password: str) -> str:
     """Hache un mot de passe."""
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> tuple[bool, Optional[str]]:
+    """
+    Vérifie un mot de passe et, si son hash n'utilise pas le coût configuré,
+    retourne le nouveau hash à enregistrer (sinon None).
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Crée un token d'accès JWT."""
     to_encode = data.copy()
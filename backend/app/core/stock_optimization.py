@@ -1,7 +1,103 @@
 # Fichier : app/core/stock_optimization.py
 
+from functools import lru_cache
+from typing import Dict, List
+
+import numpy as np
 from scipy.stats import norm
 
+# Paramètres métier par défaut (devraient venir de la BDD à terme)
+DEFAULT_LEAD_TIME_DAYS = 30
+DEFAULT_LEAD_TIME_STD_DAYS = 5
+DEFAULT_SERVICE_LEVEL = 0.95
+
+
+@lru_cache(maxsize=4096)
+def service_level_z_score(service_level: float) -> float:
+    """Coefficient de sécurité (quantile de la loi normale) d'un taux de service, mis en cache."""
+    return float(norm.ppf(service_level))
+
+
+def service_level_z_scores(service_levels) -> np.ndarray:
+    """
+    Z-scores d'un tableau de taux de service. `norm.ppf` n'est appelé que pour les
+    valeurs distinctes encore absentes du cache : un catalogue n'utilise que quelques
+    taux de service différents.
+    """
+    levels = np.asarray(service_levels, dtype=np.float64)
+    if not np.all((levels > 0) & (levels < 1)):
+        raise ValueError("Service level must be between 0 and 1.")
+    unique, inverse = np.unique(levels, return_inverse=True)
+    z_scores = np.array([service_level_z_score(float(level)) for level in unique])
+    return z_scores[inverse].reshape(levels.shape)
+
+
+def calculate_stock_levels(
+    avg_daily_demand,
+    model_error_std,
+    lead_time_days,
+    lead_time_std_days,
+    service_level=DEFAULT_SERVICE_LEVEL,
+) -> Dict[str, np.ndarray]:
+    """
+    Version vectorisée de `calculate_optimal_stock_levels` : chaque argument est un
+    scalaire ou un tableau, diffusés ensemble selon les règles de NumPy (par exemple
+    un produit par ligne et un taux de service par colonne).
+
+    Returns:
+        Tableaux de même forme : "z_score", "safety_stock" et "reorder_point" (non arrondis).
+    """
+    demand = np.asarray(avg_daily_demand, dtype=np.float64)
+    error_std = np.asarray(model_error_std, dtype=np.float64)
+    lead_time = np.asarray(lead_time_days, dtype=np.float64)
+    lead_time_std = np.asarray(lead_time_std_days, dtype=np.float64)
+    z_score = service_level_z_scores(service_level)
+
+    # Écart-type de la demande pendant le délai : variabilité de la demande et du délai
+    combined_std_dev = np.sqrt(lead_time * error_std ** 2 + demand ** 2 * lead_time_std ** 2)
+    safety_stock = z_score * combined_std_dev
+    reorder_point = demand * lead_time + safety_stock
+    return {
+        "z_score": np.broadcast_to(z_score, safety_stock.shape),
+        "safety_stock": safety_stock,
+        "reorder_point": reorder_point,
+    }
+
+
+def stock_recommendations(
+    avg_daily_demand,
+    model_error_std,
+    lead_time_days: int = DEFAULT_LEAD_TIME_DAYS,
+    lead_time_std_days: int = DEFAULT_LEAD_TIME_STD_DAYS,
+    service_level: float = DEFAULT_SERVICE_LEVEL,
+) -> List[dict]:
+    """
+    Recommandations au format de `calculate_optimal_stock_levels` pour un tableau de
+    produits (demande et écart-type d'erreur par produit), calculées en un seul appel.
+    """
+    demand = np.atleast_1d(np.asarray(avg_daily_demand, dtype=np.float64))
+    error_std = np.broadcast_to(np.asarray(model_error_std, dtype=np.float64), demand.shape)
+    levels = calculate_stock_levels(demand, error_std, lead_time_days, lead_time_std_days, service_level)
+    return [
+        {
+            "service_level_percent": service_level * 100,
+            "recommended_safety_stock": int(safety_stock),
+            "reorder_point": int(reorder_point),
+            "inputs_summary": {
+                "avg_daily_demand_forecast": round(float(product_demand), 2),
+                "model_error_std_dev": round(float(product_error_std), 2),
+                "lead_time_days": lead_time_days
+            }
+        }
+        for safety_stock, reorder_point, product_demand, product_error_std in zip(
+            np.round(levels["safety_stock"]).tolist(),
+            np.round(levels["reorder_point"]).tolist(),
+            demand.tolist(),
+            error_std.tolist(),
+        )
+    ]
+
+
 def calculate_optimal_stock_levels(
     avg_daily_demand: float,
     model_error_std: float,
@@ -23,31 +119,6 @@ def calculate_optimal_stock_levels(
     Returns:
         Un dictionnaire contenant les recommandations de stock.
     """
-    if not (0 < service_level < 1):
-        raise ValueError("Service level must be between 0 and 1.")
-
-    # 1. Coefficient de sécurité (Z-score)
-    z_score = norm.ppf(service_level)
-
-    # 2. Écart-type de la demande pendant le délai de réapprovisionnement
-    demand_variance = lead_time_days * (model_error_std ** 2)
-    lead_time_variance = (avg_daily_demand ** 2) * (lead_time_std_days ** 2)
-    combined_std_dev = (demand_variance + lead_time_variance) ** 0.5
-    
-    # 3. Stock de Sécurité
-    safety_stock = z_score * combined_std_dev
-    
-    # 4. Point de Commande
-    demand_during_lead_time = avg_daily_demand * lead_time_days
-    reorder_point = demand_during_lead_time + safety_stock
-
-    return {
-        "service_level_percent": service_level * 100,
-        "recommended_safety_stock": round(safety_stock),
-        "reorder_point": round(reorder_point),
-        "inputs_summary": {
-            "avg_daily_demand_forecast": round(avg_daily_demand, 2),
-            "model_error_std_dev": round(model_error_std, 2),
-            "lead_time_days": lead_time_days
-        }
-    }
\ No newline at end of file
+    return stock_recommendations(
+        avg_daily_demand, model_error_std, lead_time_days, lead_time_std_days, service_level
+    )[0]
@@ -0,0 +1,152 @@
+# Fichier : app/core/tenant_limits.py
+
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+import redis
+
+from app.core.config import settings
+from app.core.metrics import register_metrics_source
+
+# Réserve un bail si l'entreprise a moins de `limit` baux actifs (ou détient déjà celui-ci).
+# L'heure vient de Redis : les baux ne dépendent pas de l'horloge des workers.
+_ACQUIRE_SCRIPT = """
+local now = redis.call('TIME')
+now = tonumber(now[1]) + tonumber(now[2]) / 1000000
+local ttl, limit, token = tonumber(ARGV[1]), tonumber(ARGV[2]), ARGV[3]
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now)
+if redis.call('ZSCORE', KEYS[1], token) or redis.call('ZCARD', KEYS[1]) < limit then
+    redis.call('ZADD', KEYS[1], now + ttl, token)
+    redis.call('EXPIRE', KEYS[1], math.ceil(ttl))
+    return 1
+end
+return 0
+"""
+
+
+class TenantLimiter:
+    """
+    Nombre maximal de tâches simultanées par entreprise et par file de tâches
+    (ingestion, inference, refresh), pour qu'une entreprise ne monopolise pas les workers.
+
+    Chaque tâche en cours détient un bail nommé par son identifiant de tâche ; un bail
+    expire après `ttl_seconds` (worker arrêté sans libérer). Une limite <= 0 désactive
+    la limitation de la file. Cette classe garde les baux en mémoire, dans le processus
+    (tests, Celery en mode eager).
+    """
+
+    backend = "memory"
+
+    def __init__(self, limits: Dict[str, int], ttl_seconds: float):
+        self.limits = limits
+        self.ttl_seconds = ttl_seconds
+        self._leases: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+        self.acquired = 0
+        self.rejected = 0
+
+    @staticmethod
+    def _key(kind: str, company_id: int) -> str:
+        return f"tenant_slots:{kind}:{company_id}"
+
+    def try_acquire(self, kind: str, company_id: int, token: str) -> bool:
+        """Réserve un bail pour la tâche `token` ; False si l'entreprise est à sa limite."""
+        limit = self.limits.get(kind, 0)
+        if limit <= 0:
+            return True
+        granted = self._acquire(self._key(kind, company_id), limit, token)
+        if granted:
+            self.acquired += 1
+        else:
+            self.rejected += 1
+        return granted
+
+    def _acquire(self, key: str, limit: int, token: str) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            leases = self._leases.setdefault(key, {})
+            for expired in [t for t, expiry in leases.items() if expiry <= now]:
+                del leases[expired]
+            if token not in leases and len(leases) >= limit:
+                return False
+            leases[token] = now + self.ttl_seconds
+            return True
+
+    def release(self, kind: str, company_id: int, token: str) -> None:
+        if self.limits.get(kind, 0) > 0:
+            self._release(self._key(kind, company_id), token)
+
+    def _release(self, key: str, token: str) -> None:
+        with self._lock:
+            leases = self._leases.get(key)
+            if leases is not None:
+                leases.pop(token, None)
+                if not leases:
+                    del self._leases[key]
+
+    def stats(self) -> dict:
+        return {
+            "backend": self.backend,
+            "limits": dict(self.limits),
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+        }
+
+
+class RedisTenantLimiter(TenantLimiter):
+    """
+    Baux partagés entre tous les workers : un ensemble trié Redis par (file, entreprise),
+    score = échéance du bail. Si Redis est injoignable, la tâche passe (pas de limitation
+    plutôt qu'un blocage des imports et prédictions).
+    """
+
+    backend = "redis"
+
+    def __init__(self, url: str, limits: Dict[str, int], ttl_seconds: float):
+        super().__init__(limits, ttl_seconds)
+        self.url = url
+        self.errors = 0
+        self._client: Optional[redis.Redis] = None
+        self._client_pid: Optional[int] = None
+
+    def _redis(self) -> redis.Redis:
+        # Client propre au processus : non partagé avec le parent après un fork
+        if self._client is None or self._client_pid != os.getpid():
+            self._client = redis.Redis.from_url(self.url, socket_timeout=2, socket_connect_timeout=2)
+            self._client_pid = os.getpid()
+        return self._client
+
+    def _acquire(self, key: str, limit: int, token: str) -> bool:
+        try:
+            return bool(self._redis().eval(_ACQUIRE_SCRIPT, 1, key, self.ttl_seconds, limit, token))
+        except redis.RedisError as e:
+            self.errors += 1
+            print(f"Tenant limits: Redis injoignable, tâche non limitée ({e}).")
+            return True
+
+    def _release(self, key: str, token: str) -> None:
+        try:
+            self._redis().zrem(key, token)
+        except redis.RedisError as e:
+            self.errors += 1
+            print(f"Tenant limits: libération du bail impossible, il expirera ({e}).")
+
+    def stats(self) -> dict:
+        return {**super().stats(), "errors": self.errors}
+
+
+def _create_tenant_limiter() -> TenantLimiter:
+    limits = {
+        "ingestion": settings.TENANT_INGESTION_CONCURRENCY,
+        "inference": settings.TENANT_INFERENCE_CONCURRENCY,
+        "refresh": settings.TENANT_REFRESH_CONCURRENCY,
+    }
+    if settings.TENANT_LIMITS_REDIS_URL:
+        return RedisTenantLimiter(settings.TENANT_LIMITS_REDIS_URL, limits, settings.TENANT_SLOT_TTL_SECONDS)
+    return TenantLimiter(limits, settings.TENANT_SLOT_TTL_SECONDS)
+
+
+tenant_limiter = _create_tenant_limiter()
+register_metrics_source("tenant_limits", tenant_limiter.stats)
@@ -0,0 +1,207 @@
+# Fichier : app/core/tree_ensemble.py
+
+from typing import List
+
+import numpy as np
+
+# Codes de `missing_type` de LightGBM
+MISSING_NONE, MISSING_ZERO, MISSING_NAN = 0, 1, 2
+_MISSING_TYPES = {"None": MISSING_NONE, "Zero": MISSING_ZERO, "NaN": MISSING_NAN}
+# Seuil sous lequel LightGBM considère une valeur comme nulle (kZeroThreshold)
+ZERO_THRESHOLD = 1e-35
+# Nombre maximal de cellules (lignes x arbres) évaluées à la fois
+CHUNK_CELLS = 1 << 21
+
+
+class CompiledTreeEnsemble:
+    """
+    Ensemble d'arbres de décision compilé en tableaux NumPy à plat, évalué sans lightgbm.
+
+    Les nœuds internes de tous les arbres sont numérotés à la suite (`split_feature`,
+    `threshold`, `default_left`, `missing_type`, `left_child`, `right_child`) ; un enfant
+    négatif `~k` désigne la feuille k de `leaf_value`. `roots` donne le nœud racine de
+    chaque arbre (ou `~k` pour un arbre réduit à une feuille).
+
+    L'évaluation avance tous les arbres d'un niveau à la fois pour tout le lot (seules les
+    cellules ligne x arbre pas encore arrivées en feuille sont traitées), avec les règles
+    de `NumericalDecision` de LightGBM pour les valeurs manquantes. La prédiction
+    est la somme des feuilles atteintes (objectifs de régression sans transformation).
+    """
+
+    ARRAYS = ("split_feature", "threshold", "default_left", "missing_type",
+              "left_child", "right_child", "leaf_value", "roots")
+
+    def __init__(self, split_feature, threshold, default_left, missing_type,
+                 left_child, right_child, leaf_value, roots, feature_names, max_depth):
+        self.split_feature = np.asarray(split_feature, dtype=np.int32)
+        self.threshold = np.asarray(threshold, dtype=np.float64)
+        self.default_left = np.asarray(default_left, dtype=bool)
+        self.missing_type = np.asarray(missing_type, dtype=np.uint8)
+        self.left_child = np.asarray(left_child, dtype=np.int32)
+        self.right_child = np.asarray(right_child, dtype=np.int32)
+        self.leaf_value = np.asarray(leaf_value, dtype=np.float64)
+        self.roots = np.asarray(roots, dtype=np.int32)
+        self.feature_names = list(feature_names)
+        self.max_depth = int(max_depth)
+        # Direction d'une valeur NaN, selon `NumericalDecision` de LightGBM : branche par
+        # défaut si le nœud traite les manquants (NaN ou zéro), sinon NaN est comparé comme 0
+        self._nan_left = np.where(self.missing_type == MISSING_NONE, 0.0 <= self.threshold, self.default_left)
+        self._has_zero_missing = bool((self.missing_type == MISSING_ZERO).any())
+        # Enfants entrelacés (droite, gauche) : un seul accès indexé par niveau
+        self._children = np.column_stack([self.right_child, self.left_child]).astype(np.intp).ravel()
+        self._split_feature = self.split_feature.astype(np.intp)
+
+    @property
+    def num_trees(self) -> int:
+        return len(self.roots)
+
+    @classmethod
+    def load(cls, path: str) -> "CompiledTreeEnsemble":
+        with np.load(path, allow_pickle=False) as data:
+            arrays = {name: data[name] for name in cls.ARRAYS}
+            return cls(**arrays, feature_names=data["feature_names"].tolist(), max_depth=int(data["max_depth"]))
+
+    def save(self, path: str) -> None:
+        np.savez_compressed(
+            path,
+            **{name: getattr(self, name) for name in self.ARRAYS},
+            feature_names=np.asarray(self.feature_names),
+            max_depth=np.int32(self.max_depth),
+        )
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Prédictions pour une matrice (n, n_features) dans l'ordre de `feature_names`."""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim != 2 or X.shape[1] != len(self.feature_names):
+            raise ValueError(f"Expected a (n, {len(self.feature_names)}) matrix, got {X.shape}.")
+        chunk_rows = max(1, CHUNK_CELLS // max(self.num_trees, 1))
+        if len(X) <= chunk_rows:
+            return self._predict_chunk(X)
+        return np.concatenate([self._predict_chunk(X[start:start + chunk_rows]) for start in range(0, len(X), chunk_rows)])
+
+    def _predict_chunk(self, X: np.ndarray) -> np.ndarray:
+        n_rows, n_features = X.shape
+        flat_X = np.ascontiguousarray(X).ravel()
+        # Une cellule par (ligne, arbre) ; seules les cellules pas encore en feuille avancent
+        node = np.tile(self.roots.astype(np.intp), n_rows)
+        leaf = np.where(node < 0, ~node, 0)
+        cells = np.flatnonzero(node >= 0)
+        current = node[cells]
+        offsets = (cells // self.num_trees) * n_features
+        while cells.size:
+            values = flat_X[offsets + self._split_feature[current]]
+            go_left = values <= self.threshold[current]
+            is_nan = np.isnan(values)
+            if is_nan.any():
+                go_left[is_nan] = self._nan_left[current[is_nan]]
+            if self._has_zero_missing:
+                is_zero = (np.abs(values) <= ZERO_THRESHOLD) & (self.missing_type[current] == MISSING_ZERO)
+                go_left[is_zero] = self.default_left[current[is_zero]]
+            current = self._children[2 * current + go_left]
+            reached = current < 0
+            if reached.any():
+                leaf[cells[reached]] = ~current[reached]
+                remaining = ~reached
+                cells, current, offsets = cells[remaining], current[remaining], offsets[remaining]
+        return self.leaf_value[leaf].reshape(n_rows, self.num_trees).sum(axis=1)
+
+
+def compile_booster(booster) -> CompiledTreeEnsemble:
+    """
+    Compile un `lightgbm.Booster` (ou `booster_` d'un modèle scikit-learn) à partir de
+    `dump_model()`. Seuls les arbres de régression à décisions numériques (`<=`) sont
+    pris en charge ; un autre modèle lève ValueError.
+    """
+    dump = booster.dump_model()
+    if dump.get("num_tree_per_iteration", 1) != 1 or dump.get("average_output"):
+        raise ValueError("Only single-output, non-averaged tree ensembles can be compiled.")
+    if dump.get("objective", "").split(" ")[0] not in ("regression", "regression_l1", "huber", "fair", "quantile"):
+        raise ValueError(f"Objective '{dump.get('objective')}' needs an output transformation.")
+
+    nodes: List[tuple] = []
+    leaves: List[float] = []
+    roots: List[int] = []
+    max_depth = 0
+
+    def visit(tree: dict, depth: int) -> int:
+        nonlocal max_depth
+        if "split_index" not in tree:
+            leaves.append(float(tree["leaf_value"]))
+            max_depth = max(max_depth, depth)
+            return ~(len(leaves) - 1)
+        if tree["decision_type"] != "<=":
+            raise ValueError(f"Unsupported decision type '{tree['decision_type']}'.")
+        index = len(nodes)
+        nodes.append(None)
+        left = visit(tree["left_child"], depth + 1)
+        right = visit(tree["right_child"], depth + 1)
+        nodes[index] = (
+            tree["split_feature"], tree["threshold"], tree["default_left"],
+            _MISSING_TYPES[tree["missing_type"]], left, right,
+        )
+        return index
+
+    for tree_info in dump["tree_info"]:
+        roots.append(visit(tree_info["tree_structure"], 0))
+
+    columns = list(zip(*nodes)) if nodes else [[]] * 6
+    return CompiledTreeEnsemble(
+        *columns, leaf_value=leaves, roots=roots,
+        feature_names=dump["feature_names"], max_depth=max_depth,
+    )
+
+
+def verification_matrix(ensemble: CompiledTreeEnsemble, rows: int, nan_fraction: float = 0.05, seed: int = 0) -> np.ndarray:
+    """
+    Matrice de contrôle couvrant les seuils de chaque caractéristique : valeurs tirées
+    autour des seuils, valeurs exactement égales à un seuil, et une part de NaN.
+    """
+    rng = np.random.default_rng(seed)
+    X = np.empty((rows, len(ensemble.feature_names)))
+    for feature in range(X.shape[1]):
+        thresholds = ensemble.threshold[ensemble.split_feature == feature]
+        if len(thresholds) == 0:
+            X[:, feature] = rng.normal(size=rows)
+            continue
+        low, high = thresholds.min(), thresholds.max()
+        margin = max(high - low, 1.0) * 0.1
+        X[:, feature] = rng.uniform(low - margin, high + margin, rows)
+        exact = rng.random(rows) < 0.1
+        X[exact, feature] = rng.choice(thresholds, exact.sum())
+    X[rng.random(X.shape) < nan_fraction] = np.nan
+    return X
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import time
+
+    import joblib
+
+    from app.core.config import settings
+
+    parser = argparse.ArgumentParser(description="Compile un modèle LightGBM du registre en tableaux NumPy (.npz).")
+    parser.add_argument("version", help="Version du modèle (ex. v1).")
+    parser.add_argument("--directory", default=settings.MODEL_REGISTRY_DIR)
+    parser.add_argument("--check-rows", type=int, default=100_000)
+    parser.add_argument("--tolerance", type=float, default=1e-6)
+    args = parser.parse_args()
+
+    model = joblib.load(os.path.join(args.directory, f"lgbm_demand_model_{args.version}.joblib"))
+    booster = getattr(model, "booster_", model)
+    ensemble = compile_booster(booster)
+    output = os.path.join(args.directory, f"model_{args.version}_compiled.npz")
+
+    X = verification_matrix(ensemble, args.check_rows)
+    expected = booster.predict(X)
+    start = time.perf_counter()
+    actual = ensemble.predict(X)
+    elapsed = time.perf_counter() - start
+    gap = float(np.abs(expected - actual).max())
+    print(f"{ensemble.num_trees} arbres, {len(ensemble.split_feature)} nœuds, {len(ensemble.leaf_value)} feuilles, profondeur {ensemble.max_depth}")
+    print(f"Contrôle sur {args.check_rows} lignes : écart max {gap:.3g} ({elapsed * 1000:.0f} ms)")
+    if gap > args.tolerance:
+        raise SystemExit(f"Compiled model differs from LightGBM by {gap:.3g} (> {args.tolerance}); not written.")
+    ensemble.save(output)
+    print(f"Écrit : {output} ({os.path.getsize(output) / 1024:.0f} Ko)")
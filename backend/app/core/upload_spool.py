@@ -0,0 +1,75 @@
+# Fichier : app/core/upload_spool.py
+
+import os
+import tempfile
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+from app.core.config import settings
+
+
+def _spool_dir() -> str:
+    os.makedirs(settings.SALES_UPLOAD_SPOOL_DIR, exist_ok=True)
+    return settings.SALES_UPLOAD_SPOOL_DIR
+
+
+async def spool_upload_file(upload: UploadFile, prefix: str = "sales_") -> str:
+    """
+    Copie un fichier uploadé dans la zone de spool locale, par morceaux de taille fixe,
+    sans jamais charger le fichier complet en mémoire.
+
+    Returns:
+        Le handle du fichier (son nom dans la zone de spool), à transmettre au worker
+        à la place du contenu.
+    """
+    fd, path = tempfile.mkstemp(prefix=prefix, suffix=".csv", dir=_spool_dir())
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(settings.SALES_UPLOAD_CHUNK_BYTES)
+                if not chunk:
+                    break
+                await run_in_threadpool(out.write, chunk)
+    except BaseException:
+        os.remove(path)
+        raise
+    return os.path.basename(path)
+
+
+def resolve_spooled_file(handle: str) -> str:
+    """Retourne le chemin absolu d'un fichier spoolé à partir de son handle."""
+    # Le handle est un simple nom de fichier : on refuse tout chemin qui sortirait du spool
+    if os.path.basename(handle) != handle:
+        raise ValueError(f"Invalid spooled file handle: {handle}")
+    path = os.path.join(settings.SALES_UPLOAD_SPOOL_DIR, handle)
+    if not os.path.isfile(path):
+        raise ValueError(f"Spooled file not found: {handle}")
+    return path
+
+
+def count_spooled_rows(handle: str) -> int:
+    """
+    Nombre de lignes de données d'un CSV spoolé (hors en-tête), compté par blocs
+    sans l'analyser. Une valeur entre guillemets contenant un saut de ligne est
+    comptée en trop : le résultat sert d'estimation pour l'avancement.
+    """
+    lines, last = 0, b"\n"
+    with open(resolve_spooled_file(handle), "rb") as f:
+        while True:
+            block = f.read(settings.SALES_UPLOAD_CHUNK_BYTES)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1  # Dernière ligne sans saut de ligne final
+    return max(lines - 1, 0)
+
+
+def discard_spooled_file(handle: str) -> None:
+    """Supprime un fichier spoolé une fois traité (ou en cas d'abandon)."""
+    try:
+        os.remove(os.path.join(settings.SALES_UPLOAD_SPOOL_DIR, os.path.basename(handle)))
+    except FileNotFoundError:
+        pass
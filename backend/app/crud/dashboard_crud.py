@@ -1,50 +1,148 @@
 # Fichier: app/crud/dashboard_crud.py
 
-from sqlmodel import Session, select
+from concurrent.futures import ThreadPoolExecutor
+from fastapi.concurrency import run_in_threadpool
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
 import pandas as pd
-from typing import List
+import numpy as np
+from typing import List, Optional
 
-from app.models.base import Product, Sale
-from app.core.prediction_logic import model, model_features # Importer le modèle chargé
+from app.db.database import get_engine
+from app.models.base import Product, DailySales
+from app.core.config import settings
+from app.core.model_registry import ModelNotFoundError, ModelVersion, model_registry
+from app.core.inference_batcher import inference_batcher
+from app.core.prediction_logic import forecast_future
+from app.core.recursive_forecast import history_feature_matrix
+from app.core.result_cache import dashboard_cache
+from app.core.chart_builder import build_chart_columns
+from app.core.inventory_simulation import simulate_inventory
+from app.core.stock_optimization import calculate_stock_levels
+from app.crud.sales_crud import get_daily_sales_df
 
-def get_dashboard_data_for_product(db: Session, product: Product) -> dict:
+# Historique utilisé pour les résidus de la simulation de stock, et nombre minimal de
+# jours en dessous duquel la simulation se rabat sur des résidus gaussiens
+RESIDUAL_HISTORY_DAYS = 180
+MIN_EMPIRICAL_RESIDUALS = 30
+
+# Un seul thread suffit : chaque produit n'a jamais plus d'un rafraîchissement en cours
+_refresh_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="dashboard-refresh")
+
+
+def _sales_watermark_statement(product_id: int):
+    return select(func.max(DailySales.day), func.sum(DailySales.transaction_count)).where(DailySales.product_id == product_id)
+
+
+def get_sales_watermark(db: Session, product_id: int) -> tuple:
     """
-    Récupère les données historiques, génère des prédictions à la volée
-    et calcule les KPIs pour le dashboard d'un produit.
+    Watermark des ventes d'un produit : (dernier jour de vente, nombre de ventes agrégées),
+    lu dans l'agrégat journalier. Il change dès qu'une vente est importée.
     """
-    # 1. Récupérer l'historique des ventes
-    sales_records = db.exec(select(Sale).where(Sale.product_id == product.id).order_by(Sale.transaction_date.desc()).limit(180)).all()
-    sales_records.reverse() # Remettre dans l'ordre chronologique
+    return tuple(db.exec(_sales_watermark_statement(product_id)).one())
 
-    if not sales_records:
-        return {"kpis": {}, "chart_data": [], "influencing_factors": {}}
 
-    sales_df = pd.DataFrame(
-        [{"ds": s.transaction_date, "y": s.quantity_sold} for s in sales_records]
-    )
-    sales_df['ds'] = pd.to_datetime(sales_df['ds'])
+async def get_sales_watermark_async(db: AsyncSession, product_id: int) -> tuple:
+    """Version asynchrone de `get_sales_watermark`."""
+    return tuple((await db.exec(_sales_watermark_statement(product_id))).one())
+
+
+async def get_model_error_std_async(version: str) -> Optional[float]:
+    """Écart-type d'erreur d'une version du modèle, None si ses artefacts sont introuvables."""
+    try:
+        # Chargement éventuel de la version depuis le disque : hors de la boucle d'événements
+        return (await run_in_threadpool(model_registry.get, version)).error_std
+    except ModelNotFoundError:
+        return None
+
+
+async def get_dashboard_data_for_product(db: AsyncSession, product: Product) -> dict:
+    """
+    Retourne les données du dashboard d'un produit depuis le cache si elles sont à jour,
+    sinon les recalcule. La clé du cache est (produit, version du modèle active pour
+    l'entreprise, watermark des ventes) : activer une autre version invalide l'instantané.
+
+    La lecture du watermark et du cache ne bloque pas la boucle d'événements ; seul un
+    recalcul (requêtes synchrones + modèle, liés au CPU) part dans le pool de threads.
+    """
+    version = model_registry.active_version(product.company_id)
+    key = (product.id, version, await get_sales_watermark_async(db, product.id))
+    cached = dashboard_cache.get(key)
+    if cached is not None:
+        return cached
+
+    if settings.DASHBOARD_CACHE_STALE_WHILE_REVALIDATE:
+        stale = dashboard_cache.get_stale(product.id)
+        if stale is not None:
+            # Servir l'instantané précédent et lancer un seul recalcul en arrière-plan
+            if dashboard_cache.begin_refresh(product.id):
+                _refresh_executor.submit(_refresh_dashboard_data, product.id)
+            return stale
+
+    return await run_in_threadpool(_compute_and_cache_dashboard_data, product.id, key)
+
+
+def _compute_and_cache_dashboard_data(product_id: int, key: tuple) -> dict:
+    """Recalcule l'instantané d'un produit avec une session synchrone propre au thread."""
+    model_version = model_registry.get(key[1])
+    with Session(get_engine()) as db:
+        product = db.get(Product, product_id)
+        data = compute_dashboard_data_for_product(db, product, model_version)
+    dashboard_cache.put(key, data)
+    return data
+
+
+def _refresh_dashboard_data(product_id: int) -> None:
+    """Recalcule l'instantané d'un produit avec sa propre session (thread d'arrière-plan)."""
+    try:
+        with Session(get_engine()) as db:
+            product = db.get(Product, product_id)
+            if product is None:
+                return
+            model_version = model_registry.active(product.company_id)
+            key = (product_id, model_version.version, get_sales_watermark(db, product_id))
+            dashboard_cache.put(key, compute_dashboard_data_for_product(db, product, model_version))
+    except Exception as e:
+        print(f"Dashboard refresh failed for product {product_id}: {e}")
+    finally:
+        dashboard_cache.end_refresh(product_id)
+
+
+def compute_dashboard_data_for_product(db: Session, product: Product, model_version: ModelVersion) -> dict:
+    """
+    Récupère les données historiques, génère des prédictions à la volée avec la
+    version du modèle donnée et calcule les KPIs pour le dashboard d'un produit.
+    """
+    # 1. Récupérer l'historique journalier des 180 derniers jours (jours sans vente à 0)
+    sales_df = get_daily_sales_df(db, product.id, last_days=180)
+
+    if sales_df.empty:
+        return {"kpis": {}, "chart_columns": None, "influencing_factors": {}}
 
     # 2. Générer les caractéristiques et les prédictions
-    # Utiliser une version modifiée de la logique de prédiction
-    from app.core.prediction_logic import create_features_for_inference
-    
-    # Prédire pour l'historique (pour le calcul de la précision) et le futur
+    # Prédire sur l'historique (pour le calcul de la précision) : matrice float32 construite
+    # sans pandas, passée directement au Booster
     future_periods = 90
-    df_with_features = create_features_for_inference(sales_df.copy(), future_periods)
-    
-    # Prédictions sur l'ensemble (historique + futur)
-    X_full = df_with_features[model_features]
-    full_predictions = model.predict(X_full)
+    history_dates = sales_df['ds'].to_numpy()
+    actual_sales = sales_df['y'].to_numpy(dtype=np.float64)
+    X_history = history_feature_matrix(history_dates, actual_sales, model_version.features)
+
+    # Les prédictions passent par le batcher : les tableaux de bord calculés en même temps
+    # partagent chaque appel au modèle (historique, puis chaque pas de la prévision récursive)
+    predict = inference_batcher.predictor(model_version)
+    with inference_batcher.session():
+        historical_predictions = predict(X_history)
+        # Prévision récursive du futur
+        future_dates, future_predictions = forecast_future(sales_df, future_periods, model_version, predict)
 
     # 3. Calculer les KPIs
-    # Précision du modèle (MAPE inversé) sur les données historiques
-    historical_df = df_with_features.head(len(sales_df))
-    mape = (abs(historical_df['y'] - full_predictions[:len(sales_df)]) / historical_df['y']).mean()
-    model_accuracy = max(0, 100 * (1 - mape))
+    # Précision du modèle (MAPE inversé) sur les données historiques (jours avec ventes)
+    sold = actual_sales > 0
+    mape = (np.abs(actual_sales[sold] - historical_predictions[sold]) / actual_sales[sold]).mean()
+    model_accuracy = max(0, 100 * (1 - mape)) if sold.any() else 0
 
     # Prédictions sur les 30 prochains jours
-    future_predictions_30d = full_predictions[-future_periods:-future_periods+30]
-    total_forecast_30d = sum(future_predictions_30d)
+    total_forecast_30d = float(future_predictions[:30].sum())
     avg_daily_demand_30d = total_forecast_30d / 30
 
     kpis = {
@@ -53,34 +151,16 @@ def get_dashboard_data_for_product(db: Session, product: Product) -> dict:
         "avg_daily_demand_30d": round(avg_daily_demand_30d, 2),
     }
 
-    # 4. Formater les données pour le graphique
-    chart_data = []
-    # Données historiques
-    for _, row in historical_df.iterrows():
-        chart_data.append({
-            "date": row['ds'].strftime('%Y-%m-%d'),
-            "actual_sales": row['y'],
-        })
-    # Données de prédiction (on les ajoute/met à jour)
-    for i, prediction in enumerate(full_predictions):
-        index_date = df_with_features.iloc[i]['ds'].strftime('%Y-%m-%d')
-        # Trouver le point de donnée correspondant s'il existe
-        point = next((item for item in chart_data if item["date"] == index_date), None)
-        confidence_range = 17.06 * 1.96 # Simulation (RMSE * Z-score pour 95%)
-        if point:
-            point.update({
-                "prediction": round(max(0, prediction), 2),
-                "confidence_min": round(max(0, prediction - confidence_range), 2),
-                "confidence_max": round(max(0, prediction + confidence_range), 2)
-            })
-        else: # C'est un point futur
-             chart_data.append({
-                "date": index_date,
-                "prediction": round(max(0, prediction), 2),
-                "confidence_min": round(max(0, prediction - confidence_range), 2),
-                "confidence_max": round(max(0, prediction + confidence_range), 2)
-            })
-
+    # 4. Assembler les séries du graphique (format colonnes, en une passe)
+    confidence_range = model_version.error_std * 1.96 # Écart-type de l'erreur du modèle * Z-score pour 95%
+    chart_columns = build_chart_columns(
+        history_dates=history_dates,
+        actual_sales=actual_sales,
+        history_predictions=historical_predictions,
+        future_dates=future_dates,
+        future_predictions=future_predictions,
+        confidence_range=confidence_range,
+    )
 
     # 5. Simuler les facteurs d'influence
     influencing_factors = {
@@ -90,6 +170,63 @@ def get_dashboard_data_for_product(db: Session, product: Product) -> dict:
 
     return {
         "kpis": kpis,
-        "chart_data": chart_data,
+        "chart_columns": chart_columns,
         "influencing_factors": influencing_factors
-    }
\ No newline at end of file
+    }
+
+def product_residuals(db: Session, product_id: int, model_version: ModelVersion) -> np.ndarray:
+    """
+    Résidus in-sample (ventes réelles - prédiction) du modèle sur l'historique journalier
+    récent du produit, jours sans vente compris : la loi empirique de son erreur, qui
+    garde l'intermittence d'un produit à faible volume.
+    """
+    sales_df = get_daily_sales_df(db, product_id, last_days=RESIDUAL_HISTORY_DAYS)
+    if sales_df.empty:
+        return np.empty(0)
+    actual_sales = sales_df['y'].to_numpy(dtype=np.float64)
+    X_history = history_feature_matrix(sales_df['ds'].to_numpy(), actual_sales, model_version.features)
+    return actual_sales - inference_batcher.predict(model_version, X_history)
+
+
+def simulate_product_stock(
+    product_id: int,
+    model_version: str,
+    forecast: np.ndarray,
+    lead_time_days: float,
+    lead_time_std_days: float,
+    service_level: float,
+    scenarios: int,
+    seed=None,
+) -> dict:
+    """
+    Simule la demande pendant le délai d'un produit à partir de sa prévision enregistrée
+    et des résidus de son historique (thread à part, session synchrone propre), et
+    compare le point de commande obtenu à celui de l'approximation normale.
+    """
+    version = model_registry.get(model_version)
+    with Session(get_engine()) as db:
+        residuals = product_residuals(db, product_id, version)
+
+    empirical = len(residuals) >= MIN_EMPIRICAL_RESIDUALS
+    # Même demande moyenne que la recommandation du job de prédiction
+    avg_daily_demand = float(forecast.mean())
+    normal_reorder_point = float(
+        calculate_stock_levels(avg_daily_demand, version.error_std, lead_time_days, lead_time_std_days, service_level)["reorder_point"]
+    )
+    simulation = simulate_inventory(
+        forecast[np.newaxis, :],
+        lead_time_days=lead_time_days,
+        lead_time_std_days=lead_time_std_days,
+        service_level=service_level,
+        residual_std=version.error_std,
+        residuals=residuals if empirical else None,
+        reorder_point=normal_reorder_point,
+        scenarios=scenarios,
+        seed=seed,
+    )
+    return {
+        "residuals": "empirical" if empirical else "gaussian",
+        "avg_daily_demand_forecast": avg_daily_demand,
+        "normal_reorder_point": normal_reorder_point,
+        **{name: float(values[0]) for name, values in simulation.items()},
+    }
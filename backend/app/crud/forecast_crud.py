@@ -0,0 +1,157 @@
+# Fichier : app/crud/forecast_crud.py
+
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import insert
+from sqlmodel import Session, select, func
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.models.base import Forecast, ForecastRun, Product
+
+# Quantile de la loi normale de l'intervalle de confiance à 95 %
+CONFIDENCE_Z = 1.96
+# Lignes par INSERT exécuté en executemany
+INSERT_BATCH_SIZE = 10_000
+
+
+def create_forecast_run(
+    db: Session, company_id: int, model_version: str, model_error_std: float, forecasts: Dict[int, dict]
+) -> ForecastRun:
+    """
+    Enregistre une exécution de prévision et ses lignes dans la transaction courante.
+
+    Args:
+        forecasts: Prévision par produit, au format `forecast_90_days` de
+            `build_prediction_result` ({"dates": [...], "predicted_demand": [...]}).
+
+    Les bornes sont yhat ∓ 1,96 × écart-type de l'erreur du modèle (borne basse à 0).
+    Toutes les lignes sont écrites par un INSERT exécuté en executemany.
+    """
+    horizon_days = max((len(forecast["dates"]) for forecast in forecasts.values()), default=0)
+    run = ForecastRun(company_id=company_id, model_version=model_version, horizon_days=horizon_days)
+    db.add(run)
+    db.flush()  # Attribue run.id
+
+    margin = CONFIDENCE_Z * model_error_std
+    records = []
+    for product_id, forecast in forecasts.items():
+        dates = np.asarray(forecast["dates"], dtype="datetime64[D]").astype(object)
+        yhat = np.asarray(forecast["predicted_demand"], dtype=np.float64)
+        lower = np.round(np.maximum(yhat - margin, 0), 2).tolist()
+        upper = np.round(yhat + margin, 2).tolist()
+        records.extend(
+            {
+                "run_id": run.id, "product_id": int(product_id), "date": day, "model_version": model_version,
+                "yhat": value, "yhat_lower": low, "yhat_upper": high,
+            }
+            for day, value, low, high in zip(dates, yhat.tolist(), lower, upper)
+        )
+
+    connection = db.connection()
+    statement = insert(Forecast.__table__)
+    for start in range(0, len(records), INSERT_BATCH_SIZE):
+        connection.execute(statement, records[start:start + INSERT_BATCH_SIZE])
+    return run
+
+
+async def get_run_forecasts_async(db: AsyncSession, run_id: int) -> Dict[int, dict]:
+    """Lignes d'une exécution, regroupées par produit et triées par date."""
+    statement = (
+        select(Forecast.product_id, Forecast.date, Forecast.yhat, Forecast.yhat_lower, Forecast.yhat_upper)
+        .where(Forecast.run_id == run_id)
+        .order_by(Forecast.product_id, Forecast.date)
+    )
+    forecasts: Dict[int, dict] = {}
+    for product_id, day, yhat, lower, upper in (await db.exec(statement)).all():
+        forecast = forecasts.get(product_id)
+        if forecast is None:
+            forecast = forecasts[product_id] = {"dates": [], "predicted_demand": [], "lower_bound": [], "upper_bound": []}
+        forecast["dates"].append(day.isoformat())
+        forecast["predicted_demand"].append(yhat)
+        forecast["lower_bound"].append(lower)
+        forecast["upper_bound"].append(upper)
+    return forecasts
+
+
+async def get_latest_product_forecast_async(db: AsyncSession, product_id: int) -> Optional[Tuple[int, str, float]]:
+    """(run_id, model_version, demande journalière moyenne prévue) de la dernière prévision du produit."""
+    latest_run = select(func.max(Forecast.run_id)).where(Forecast.product_id == product_id).scalar_subquery()
+    statement = (
+        select(Forecast.run_id, Forecast.model_version, func.avg(Forecast.yhat))
+        .where(Forecast.product_id == product_id, Forecast.run_id == latest_run)
+        .group_by(Forecast.run_id, Forecast.model_version)
+    )
+    row = (await db.exec(statement)).first()
+    return tuple(row) if row is not None else None
+
+
+async def get_latest_product_forecast_path_async(db: AsyncSession, product_id: int) -> Optional[Tuple[int, str, np.ndarray]]:
+    """(run_id, model_version, demande prévue jour par jour) de la dernière prévision du produit."""
+    latest_run = select(func.max(Forecast.run_id)).where(Forecast.product_id == product_id).scalar_subquery()
+    statement = (
+        select(Forecast.run_id, Forecast.model_version, Forecast.yhat)
+        .where(Forecast.product_id == product_id, Forecast.run_id == latest_run)
+        .order_by(Forecast.date)
+    )
+    rows = (await db.exec(statement)).all()
+    if not rows:
+        return None
+    run_id, model_version, _ = rows[0]
+    return run_id, model_version, np.array([yhat for _, _, yhat in rows], dtype=np.float64)
+
+
+async def get_latest_forecasts_page_async(
+    db: AsyncSession, company_id: int, after_product_id: int = 0, limit: int = 500
+) -> List[dict]:
+    """
+    Page (pagination par clé sur l'id produit, après `after_product_id`) des produits
+    d'une entreprise, chacun avec la demande prévue jour par jour de sa dernière
+    prévision ("yhat", None si le produit n'a jamais été prédit).
+    """
+    products = (await db.exec(
+        select(Product.id, Product.sku)
+        .where(Product.company_id == company_id, Product.id > after_product_id)
+        .order_by(Product.id)
+        .limit(limit)
+    )).all()
+    if not products:
+        return []
+
+    latest = (
+        select(Forecast.product_id, func.max(Forecast.run_id).label("run_id"))
+        .where(Forecast.product_id.in_([product_id for product_id, _ in products]))
+        .group_by(Forecast.product_id)
+        .subquery()
+    )
+    statement = (
+        select(Forecast.product_id, Forecast.run_id, Forecast.model_version, Forecast.yhat)
+        .join(latest, (Forecast.product_id == latest.c.product_id) & (Forecast.run_id == latest.c.run_id))
+        .order_by(Forecast.product_id, Forecast.date)
+    )
+    forecasts: Dict[int, dict] = {}
+    for product_id, run_id, model_version, yhat in (await db.exec(statement)).all():
+        forecast = forecasts.get(product_id)
+        if forecast is None:
+            forecast = forecasts[product_id] = {"run_id": run_id, "model_version": model_version, "yhat": []}
+        forecast["yhat"].append(yhat)
+
+    page = []
+    for product_id, sku in products:
+        forecast = forecasts.get(product_id, {"run_id": None, "model_version": None, "yhat": None})
+        page.append({"product_id": product_id, "sku": sku, **forecast})
+    return page
+
+
+def attach_forecasts(summary: dict, forecasts: Dict[int, dict]) -> dict:
+    """
+    Réinjecte les prévisions d'une exécution dans le résumé stocké dans
+    `PredictionJob.result_data` (job produit ou job entreprise), sous la clé
+    `forecast_90_days` du format historique.
+    """
+    if "products" in summary:
+        for entry in summary["products"].values():
+            entry["forecast_90_days"] = forecasts.get(entry["product_id"])
+    else:
+        summary["forecast_90_days"] = forecasts.get(summary["product_id"])
+    return summary
@@ -0,0 +1,155 @@
+# Fichier : app/crud/job_crud.py
+
+import datetime
+from typing import Optional, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, select
+
+from app.core.config import settings
+from app.core.job_events import job_events
+from app.models.base import JobStatus, PredictionJob
+
+FINISHED_STATUSES = (JobStatus.SUCCESS, JobStatus.FAILED)
+ACTIVE_STATUSES = (JobStatus.PENDING, JobStatus.RUNNING)
+
+
+def job_progress(job: PredictionJob) -> Optional[int]:
+    """Avancement en pourcentage ; None si inconnu (job en cours sans nombre total de lignes)."""
+    if job.status in FINISHED_STATUSES:
+        return 100
+    if job.status == JobStatus.PENDING:
+        return 0
+    if job.rows_total:
+        # 100 est réservé au job terminé (l'estimation du total peut être dépassée)
+        return min(99, job.rows_processed * 100 // job.rows_total)
+    return None
+
+
+def job_event(job: PredictionJob) -> dict:
+    """État d'un job tel que poussé aux clients ; le résultat n'est joint qu'une fois le job terminé."""
+    return {
+        "job_id": job.id,
+        "status": job.status.value,
+        "rows_processed": job.rows_processed,
+        "rows_total": job.rows_total,
+        "progress": job_progress(job),
+        "result": job.result_data if job.status in FINISHED_STATUSES else None,
+    }
+
+
+def update_job_state(db: Session, job: PredictionJob, status: Optional[JobStatus] = None, **fields) -> PredictionJob:
+    """
+    Applique une transition d'état et/ou des champs (rows_processed, result_data...) à un
+    job, commite la transaction courante, puis publie le nouvel état aux flux abonnés.
+    Le passage à RUNNING renseigne `started_at`, la fin (SUCCESS/FAILED) `completed_at`.
+    """
+    if status is not None:
+        job.status = status
+        if status == JobStatus.RUNNING:
+            job.started_at = datetime.datetime.utcnow()
+        elif status in FINISHED_STATUSES:
+            job.completed_at = datetime.datetime.utcnow()
+    for name, value in fields.items():
+        setattr(job, name, value)
+    # Événement construit avant le commit (qui expire les attributs), publié après
+    event = job_event(job)
+    db.add(job)
+    db.commit()
+    job_events.publish(event)
+    return job
+
+
+def prediction_dedup_key(product_id: int, model_version: str, sales_watermark: tuple) -> str:
+    """
+    Clé d'une prédiction de produit : deux soumissions de même clé portent sur les
+    mêmes ventes (watermark de `get_sales_watermark`) avec la même version du modèle.
+    """
+    last_day, sales_count = sales_watermark
+    return f"product:{product_id}:{model_version}:{last_day}:{sales_count}"
+
+
+def get_job_by_idempotency_key(db: Session, user_id: int, idempotency_key: str) -> Optional[PredictionJob]:
+    statement = select(PredictionJob).where(
+        PredictionJob.user_id == user_id, PredictionJob.idempotency_key == idempotency_key
+    )
+    return db.exec(statement).first()
+
+
+def _stale_job_filter():
+    """Jobs actifs sans fin depuis `PREDICTION_JOB_STALE_SECONDS` (démarrage, sinon création)."""
+    cutoff = datetime.datetime.utcnow() - datetime.timedelta(seconds=settings.PREDICTION_JOB_STALE_SECONDS)
+    return (
+        col(PredictionJob.status).in_(ACTIVE_STATUSES)
+        & (func.coalesce(PredictionJob.started_at, PredictionJob.created_at) < cutoff)
+    )
+
+
+def find_reusable_prediction_job(db: Session, dedup_key: str) -> Optional[PredictionJob]:
+    """
+    Dernier job de même clé qui n'a pas échoué : en attente ou en cours (sauf abandonné,
+    voir `PREDICTION_JOB_STALE_SECONDS`), ou réussi (la clé incluant le watermark des
+    ventes, son résultat est encore à jour).
+    """
+    statement = (
+        select(PredictionJob)
+        .where(
+            PredictionJob.dedup_key == dedup_key,
+            PredictionJob.status != JobStatus.FAILED,
+            ~_stale_job_filter(),
+        )
+        .order_by(PredictionJob.id.desc())
+        .limit(1)
+    )
+    return db.exec(statement).first()
+
+
+def fail_stale_prediction_jobs(db: Session, dedup_key: str) -> int:
+    """
+    Passe en échec les jobs abandonnés de même clé : l'index unique partiel sur les jobs
+    actifs empêcherait sinon de créer leur remplaçant. Retourne le nombre de jobs concernés.
+    """
+    stale_jobs = db.exec(
+        select(PredictionJob).where(PredictionJob.dedup_key == dedup_key, _stale_job_filter())
+    ).all()
+    for job in stale_jobs:
+        update_job_state(
+            db, job, JobStatus.FAILED,
+            result_data=f"Job abandoned after {settings.PREDICTION_JOB_STALE_SECONDS:g} seconds without completing; replaced by a new submission.",
+        )
+    return len(stale_jobs)
+
+
+def submit_prediction_job(
+    db: Session, user_id: int, company_id: int, dedup_key: str, idempotency_key: Optional[str] = None
+) -> Tuple[PredictionJob, bool]:
+    """
+    Réutilise un job équivalent ou en crée un nouveau (PENDING).
+
+    Deux soumissions concurrentes de même clé ne créent qu'un job : l'index unique
+    partiel sur les jobs actifs fait échouer la seconde insertion, qui retourne alors
+    le job de la première. Un job abandonné de même clé est d'abord passé en échec.
+
+    Returns:
+        (job, created) : `created` est faux si un job existant est retourné.
+    """
+    existing = find_reusable_prediction_job(db, dedup_key)
+    if existing is not None:
+        return existing, False
+    fail_stale_prediction_jobs(db, dedup_key)
+
+    job = PredictionJob(user_id=user_id, company_id=company_id, dedup_key=dedup_key, idempotency_key=idempotency_key)
+    db.add(job)
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = (
+            idempotency_key and get_job_by_idempotency_key(db, user_id, idempotency_key)
+        ) or find_reusable_prediction_job(db, dedup_key)
+        if existing is None:
+            raise
+        return existing, False
+    db.refresh(job)
+    return job, True
@@ -1,7 +1,8 @@
 # Fichier : app/crud/product_crud.py
 
-from sqlmodel import Session, select
-from typing import List, Optional
+from sqlmodel import Session, select, func, or_
+from sqlmodel.ext.asyncio.session import AsyncSession
+from typing import List, Literal, Optional
 
 from app.models.base import Product
 from app.schemas.product_schemas import ProductCreate, ProductUpdate
@@ -10,15 +11,61 @@ def get_product_by_id(db: Session, product_id: int) -> Optional[Product]:
     """Récupère un produit par son ID."""
     return db.get(Product, product_id)
 
+SearchMode = Literal["prefix", "substring"]
+
 def get_product_by_sku_for_company(db: Session, sku: str, company_id: int) -> Optional[Product]:
-    """Récupère un produit par son SKU pour une entreprise spécifique."""
-    statement = select(Product).where(Product.sku == sku, Product.company_id == company_id)
+    """Récupère un produit par son SKU pour une entreprise spécifique (index unique (company_id, sku))."""
+    statement = select(Product).where(Product.company_id == company_id, Product.sku == sku)
     return db.exec(statement).first()
 
-def get_products_by_company(db: Session, company_id: int, skip: int = 0, limit: int = 100) -> List[Product]:
-    """Récupère une liste paginée de produits pour une entreprise spécifique."""
-    statement = select(Product).where(Product.company_id == company_id).offset(skip).limit(limit)
-    return db.exec(statement).all()
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+def _company_products_statement(
+    company_id: int, after_id: Optional[int], limit: int, search: Optional[str], search_mode: SearchMode
+):
+    """
+    Produits d'une entreprise triés par id, après `after_id` (pagination par clé : le
+    coût d'une page ne dépend pas de sa profondeur). `search` filtre le SKU ou le nom,
+    sans tenir compte de la casse, par préfixe ou par sous-chaîne.
+    """
+    statement = select(Product).where(Product.company_id == company_id)
+    if after_id is not None:
+        statement = statement.where(Product.id > after_id)
+    if search:
+        term = _escape_like(search.lower())
+        pattern = f"{term}%" if search_mode == "prefix" else f"%{term}%"
+        statement = statement.where(or_(
+            func.lower(Product.sku).like(pattern, escape="\\"),
+            func.lower(Product.name).like(pattern, escape="\\"),
+        ))
+    return statement.order_by(Product.id).limit(limit)
+
+def get_products_by_company(
+    db: Session,
+    company_id: int,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+    search_mode: SearchMode = "prefix",
+) -> List[Product]:
+    """Récupère une page de produits d'une entreprise (pagination par clé sur l'id, recherche optionnelle)."""
+    return db.exec(_company_products_statement(company_id, after_id, limit, search, search_mode)).all()
+
+async def get_product_by_id_async(db: AsyncSession, product_id: int) -> Optional[Product]:
+    """Version asynchrone de `get_product_by_id`."""
+    return await db.get(Product, product_id)
+
+async def get_products_by_company_async(
+    db: AsyncSession,
+    company_id: int,
+    after_id: Optional[int] = None,
+    limit: int = 100,
+    search: Optional[str] = None,
+    search_mode: SearchMode = "prefix",
+) -> List[Product]:
+    """Version asynchrone de `get_products_by_company`."""
+    return (await db.exec(_company_products_statement(company_id, after_id, limit, search, search_mode))).all()
 
 def create_product(db: Session, product_in: ProductCreate, company_id: int) -> Product:
     """Crée un nouveau produit pour une entreprise."""
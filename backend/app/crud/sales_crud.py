@@ -0,0 +1,61 @@
+# Fichier : app/crud/sales_crud.py
+
+from typing import Optional
+
+import pandas as pd
+from sqlmodel import Session, select, func
+
+from app.models.base import DailySales, Product
+
+
+def fill_missing_days(daily: pd.DataFrame) -> pd.DataFrame:
+    """
+    Complète une série journalière (colonnes ds, y) avec des ventes nulles pour
+    les jours sans transaction, entre son premier et son dernier jour.
+    """
+    if daily.empty:
+        return daily.reset_index(drop=True)
+    days = pd.date_range(daily["ds"].min(), daily["ds"].max(), freq="D")
+    filled = daily.set_index("ds")["y"].reindex(days, fill_value=0)
+    return pd.DataFrame({"ds": days, "y": filled.to_numpy(dtype=float)})
+
+
+def get_daily_sales_df(db: Session, product_id: int, last_days: Optional[int] = None) -> pd.DataFrame:
+    """
+    Récupère l'historique journalier d'un produit depuis l'agrégat `daily_sales`,
+    sous forme d'un DataFrame (ds, y) complété des jours sans vente.
+
+    Args:
+        last_days: Si fourni, ne conserve que les `last_days` derniers jours.
+    """
+    statement = select(DailySales.day, DailySales.quantity).where(DailySales.product_id == product_id)
+    if last_days is not None:
+        statement = statement.order_by(DailySales.day.desc()).limit(last_days)
+    daily = pd.DataFrame(db.exec(statement).all(), columns=["ds", "y"])
+    daily["ds"] = pd.to_datetime(daily["ds"])
+    daily = fill_missing_days(daily.sort_values("ds"))
+    if last_days is not None:
+        daily = daily.tail(last_days).reset_index(drop=True)
+    return daily
+
+
+def count_sales_days(db: Session, product_id: int) -> int:
+    """Nombre de jours ayant au moins une vente pour un produit."""
+    statement = select(func.count()).select_from(DailySales).where(DailySales.product_id == product_id)
+    return db.exec(statement).one()
+
+
+def get_company_daily_sales(db: Session, company_id: int) -> pd.DataFrame:
+    """
+    Récupère en une requête l'agrégat journalier de tous les produits d'une entreprise,
+    trié par produit puis par jour. Colonnes : product_id, sku, ds, y (sans complétion).
+    """
+    statement = (
+        select(DailySales.product_id, Product.sku, DailySales.day, DailySales.quantity)
+        .join(Product, Product.id == DailySales.product_id)
+        .where(Product.company_id == company_id)
+        .order_by(DailySales.product_id, DailySales.day)
+    )
+    daily = pd.DataFrame(db.exec(statement).all(), columns=["product_id", "sku", "ds", "y"])
+    daily["ds"] = pd.to_datetime(daily["ds"])
+    return daily
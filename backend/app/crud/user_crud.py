@@ -1,8 +1,10 @@
 from sqlmodel import Session, select
+from sqlmodel.ext.asyncio.session import AsyncSession
 from app.models.base import User, Company, CompanyUserLink, UserRole
 from app.schemas.user_schemas import UserRegister, UserInvite, CompanyCreate
 from app.core.security import get_password_hash
-from typing import List, Any
+from app.core.auth_cache import auth_cache
+from typing import List, Any, Optional
 from sqlalchemy.orm import selectinload
 
 
@@ -11,6 +13,24 @@ def get_user_by_email(db: Session, email: str) -> User | None:
     statement = select(User).where(User.email == email)
     return db.exec(statement).first()
 
+def get_user_with_memberships(db: Session, email: str) -> User | None:
+    """Récupère un utilisateur par son email, avec ses liens et entreprises pré-chargés."""
+    statement = (
+        select(User)
+        .where(User.email == email)
+        .options(selectinload(User.company_links).selectinload(CompanyUserLink.company))
+    )
+    return db.exec(statement).first()
+
+async def get_user_by_email_async(db: AsyncSession, email: str) -> User | None:
+    """Récupère un utilisateur par son email, avec ses entreprises pré-chargées (session asynchrone)."""
+    statement = (
+        select(User)
+        .where(User.email == email)
+        .options(selectinload(User.company_links).selectinload(CompanyUserLink.company))
+    )
+    return (await db.exec(statement)).first()
+
 def get_company_by_name(db: Session, name: str) -> Company | None:
     """Récupère une entreprise par son nom."""
     statement = select(User).where(User.email == name)
@@ -18,9 +38,13 @@ def get_company_by_name(db: Session, name: str) -> Company | None:
 
 
 # MODIFICATION : La fonction de création est maintenant beaucoup plus simple
-def create_user(db: Session, user_in: UserRegister) -> User:
-    """Crée un nouvel utilisateur dans le système, sans l'associer à une entreprise."""
-    hashed_password = get_password_hash(user_in.password)
+def create_user(db: Session, user_in: UserRegister, hashed_password: Optional[str] = None) -> User:
+    """
+    Crée un nouvel utilisateur dans le système, sans l'associer à une entreprise.
+    `hashed_password` permet de fournir un hash déjà calculé (hors du pool de threads).
+    """
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_in.password)
     db_user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -31,6 +55,24 @@ def create_user(db: Session, user_in: UserRegister) -> User:
     db.refresh(db_user)
     return db_user
 
+async def create_user_async(db: AsyncSession, user_in: UserRegister, hashed_password: str) -> User:
+    """Version asynchrone de `create_user`, avec un hash déjà calculé."""
+    db_user = User(
+        email=user_in.email,
+        hashed_password=hashed_password,
+        is_active=True
+    )
+    db.add(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    return db_user
+
+async def update_password_hash_async(db: AsyncSession, user: User, hashed_password: str) -> None:
+    """Enregistre le hash recalculé d'un utilisateur (changement du coût bcrypt)."""
+    user.hashed_password = hashed_password
+    db.add(user)
+    await db.commit()
+
 # NOUVEAU : La fonction pour créer une entreprise par un utilisateur existant
 def create_company_for_user(db: Session, company_in: CompanyCreate, user: User) -> Company:
     """Crée une nouvelle entreprise et en fait de l'utilisateur courant son premier admin."""
@@ -45,17 +87,21 @@ def create_company_for_user(db: Session, company_in: CompanyCreate, user: User)
     db.add(link)
     db.commit()
     db.refresh(link)
+
+    # Les appartenances de l'utilisateur ont changé
+    auth_cache.invalidate(user.email)
     
     return db_company
 
-def create_first_admin_and_company(db: Session, user_in: UserRegister) -> User:
+def create_first_admin_and_company(db: Session, user_in: UserRegister, hashed_password: Optional[str] = None) -> User:
     """Crée une nouvelle entreprise et son premier utilisateur admin."""
     # Créer l'entreprise
     db_company = Company(name=user_in.company_name)
     db.add(db_company)
     
     # Créer l'utilisateur
-    hashed_password = get_password_hash(user_in.password)
+    if hashed_password is None:
+        hashed_password = get_password_hash(user_in.password)
     db_user = User(email=user_in.email, hashed_password=hashed_password)
     db.add(db_user)
 
@@ -96,6 +142,9 @@ def invite_user_to_company(db: Session, user_to_invite: UserInvite, company_id:
     )
     db.add(link)
     db.commit()
+
+    # Les appartenances de l'utilisateur invité ont changé
+    auth_cache.invalidate(db_user.email)
     return db_user
 
 def get_company_members(db: Session, company_id: int) -> List[User]:
@@ -106,4 +155,14 @@ def get_company_members(db: Session, company_id: int) -> List[User]:
         .where(CompanyUserLink.company_id == company_id)
         .options(selectinload(User.company_links).selectinload(CompanyUserLink.company))
     )
-    return db.exec(statement).unique().all()
\ No newline at end of file
+    return db.exec(statement).unique().all()
+
+async def get_company_members_async(db: AsyncSession, company_id: int) -> List[User]:
+    """Version asynchrone de `get_company_members`."""
+    statement = (
+        select(User)
+        .join(CompanyUserLink)
+        .where(CompanyUserLink.company_id == company_id)
+        .options(selectinload(User.company_links).selectinload(CompanyUserLink.company))
+    )
+    return (await db.exec(statement)).unique().all()
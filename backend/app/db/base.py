@@ -1,12 +1,44 @@
 # app/db/base.py
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker
-from .config import settings
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlmodel.ext.asyncio.session import AsyncSession
 
-engine = create_async_engine(settings.DATABASE_URL, echo=True)
-AsyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=AsyncSession)
+from app.core.config import settings
+from app.db.pool import InstrumentedAsyncAdaptedQueuePool, track_engine
 
-# Dépendance pour obtenir une session de BDD
-async def get_db():
+# Pilote asynchrone à utiliser pour chaque moteur de base de données
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(database_url: str) -> str:
+    """Convertit l'URL synchrone (DATABASE_URL) en URL du pilote asynchrone équivalent."""
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.get_backend_name(), url.drivername)).render_as_string(hide_password=False)
+
+
+# Moteur asynchrone utilisé par les endpoints de lecture ; Celery garde le moteur synchrone
+async_engine = create_async_engine(
+    to_async_url(settings.DATABASE_URL),
+    echo=settings.DB_ECHO,
+    poolclass=InstrumentedAsyncAdaptedQueuePool,
+    pool_size=settings.DB_ASYNC_POOL_SIZE,
+    max_overflow=settings.DB_ASYNC_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+track_engine("api_async", async_engine)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+
+async def get_async_session():
+    """
+    Dépendance FastAPI pour obtenir une session de base de données asynchrone.
+    """
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
@@ -1,18 +1,104 @@
-import os
+import threading
+from typing import Optional
+
+from sqlalchemy.engine import Engine, make_url
 from sqlmodel import create_engine, Session
 
-# Récupérer l'URL de la base de données depuis les variables d'environnement
-DATABASE_URL = os.getenv("DATABASE_URL")
+from app.core.config import settings
+from app.db.pool import InstrumentedQueuePool, track_engine
+
+# Rôles des processus : chaque rôle a son propre dimensionnement de pool
+ROLE_API = "api"
+ROLE_WORKER = "worker"
+
+
+def pool_settings(role: str) -> dict:
+    """Paramètres du pool de connexions pour un rôle de processus."""
+    if role == ROLE_WORKER:
+        # Un worker Celery n'exécute qu'une tâche à la fois par processus
+        pool_size, max_overflow = settings.DB_WORKER_POOL_SIZE, settings.DB_WORKER_MAX_OVERFLOW
+    else:
+        # Les endpoints synchrones tournent dans le pool de threads : une connexion par thread
+        pool_size, max_overflow = settings.API_THREADPOOL_SIZE, settings.DB_API_MAX_OVERFLOW
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+class EnginePoolManager:
+    """
+    Gère le moteur synchrone du processus courant.
+
+    Le moteur est créé à la demande avec les paramètres du rôle du processus. Après un
+    fork (processus enfant Celery), `configure(..., after_fork=True)` abandonne les
+    connexions héritées du parent sans les fermer (elles appartiennent toujours au parent)
+    et crée un nouveau pool propre à l'enfant.
+    """
+
+    def __init__(self, role: str = ROLE_API):
+        self.role = role
+        self._engine: Optional[Engine] = None
+        self._lock = threading.Lock()
+
+    def configure(self, role: str, after_fork: bool = False) -> Engine:
+        with self._lock:
+            if self._engine is not None:
+                self._engine.dispose(close=not after_fork)
+            self.role = role
+            self._engine = self._create_engine()
+            return self._engine
+
+    def get_engine(self) -> Engine:
+        engine = self._engine
+        if engine is None:
+            with self._lock:
+                if self._engine is None:
+                    self._engine = self._create_engine()
+                engine = self._engine
+        return engine
+
+    def _create_engine(self) -> Engine:
+        options = {}
+        # SQLite en mémoire n'a qu'une connexion : on garde son pool par défaut
+        if make_url(settings.DATABASE_URL).database not in (None, "", ":memory:"):
+            options = {"poolclass": InstrumentedQueuePool, **pool_settings(self.role)}
+        engine = create_engine(settings.DATABASE_URL, echo=settings.DB_ECHO, **options)
+        track_engine(self.role, engine)
+        return engine
+
+
+pool_manager = EnginePoolManager()
+
+
+def get_engine() -> Engine:
+    """
+    Moteur synchrone du processus courant. Toujours passer par cette fonction (et non
+    par une référence importée une fois pour toutes) : le moteur est recréé après un fork.
+    """
+    return pool_manager.get_engine()
+
+
+def configure_engine(role: str, after_fork: bool = False) -> Engine:
+    """(Re)crée le moteur du processus avec les paramètres de pool de `role`."""
+    return pool_manager.configure(role, after_fork=after_fork)
+
+
+def __getattr__(name: str):
+    # Compatibilité : `database.engine` désigne le moteur courant du processus
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Créer le moteur de base de données
-# connect_args est nécessaire pour SQLite, mais peut être utile pour d'autres configurations
-engine = create_engine(DATABASE_URL, echo=True) # echo=True pour voir les requêtes SQL en dev
 
 def get_session():
     """
     Dépendance FastAPI pour obtenir une session de base de données.
     """
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
         yield session
 
 def create_db_and_tables():
@@ -22,8 +108,13 @@ def create_db_and_tables():
     """
     from sqlmodel import SQLModel
     # Importer tous les modèles ici pour qu'ils soient enregistrés par SQLModel
-    from app.models.base import User, Company, Product, Sale, PredictionJob
-    
+    from app.models.base import User, Company, Product, Sale, DailySales, PredictionJob, ForecastRun, Forecast
+
     print("Creating database and tables...")
+    engine = get_engine()
     SQLModel.metadata.create_all(engine)
-    print("Database and tables created successfully.")
\ No newline at end of file
+    print("Database and tables created successfully.")
+
+    # Mettre à niveau les tables existantes (colonnes ajoutées depuis leur création)
+    from app.db.migrations import apply_migrations
+    apply_migrations(engine)
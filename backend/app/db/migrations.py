@@ -0,0 +1,313 @@
+# Fichier : app/db/migrations.py
+"""
+Migrations de schéma idempotentes pour les déploiements existants.
+
+`SQLModel.metadata.create_all` crée les tables manquantes mais ne modifie jamais une
+table existante. Chaque migration ci-dessous inspecte le schéma courant et n'applique
+que ce qui manque : elles peuvent donc être rejouées à chaque démarrage.
+
+Le partitionnement mensuel de `sale` (PostgreSQL) est optionnel et lancé à la main :
+    python -m app.db.migrations partition-sale --months-ahead 3
+"""
+
+import argparse
+import datetime
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.engine import Connection, Engine
+
+from app.core.config import settings
+
+
+def _column_names(connection: Connection, table: str) -> set:
+    return {column["name"] for column in inspect(connection).get_columns(table)}
+
+
+def _add_column_if_missing(connection: Connection, table: str, column: str, ddl: str) -> None:
+    if column not in _column_names(connection, table):
+        print(f"Migration: adding column {table}.{column}")
+        connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def add_prediction_job_rows_processed(connection: Connection) -> None:
+    """Progression des imports de ventes traités par morceaux."""
+    _add_column_if_missing(connection, "predictionjob", "rows_processed", "INTEGER NOT NULL DEFAULT 0")
+
+
+def add_prediction_job_forecast_run_id(connection: Connection) -> None:
+    """Référence du job vers la prévision qu'il a produite (table `forecast_run`)."""
+    _add_column_if_missing(connection, "predictionjob", "forecast_run_id", "INTEGER REFERENCES forecast_run (id)")
+
+
+def add_prediction_job_rows_total(connection: Connection) -> None:
+    """Nombre de lignes à traiter d'un import, pour le pourcentage d'avancement."""
+    _add_column_if_missing(connection, "predictionjob", "rows_total", "INTEGER")
+
+
+def add_prediction_job_dedup_columns(connection: Connection) -> None:
+    """Entreprise, clé de déduplication et clé d'idempotence des soumissions de prédiction."""
+    _add_column_if_missing(connection, "predictionjob", "company_id", "INTEGER REFERENCES company (id)")
+    _add_column_if_missing(connection, "predictionjob", "dedup_key", "VARCHAR")
+    _add_column_if_missing(connection, "predictionjob", "idempotency_key", "VARCHAR")
+
+
+def add_prediction_job_resumed_by(connection: Connection) -> None:
+    """Reprise d'un import échoué : job qui a importé les lignes restantes du fichier."""
+    _add_column_if_missing(connection, "predictionjob", "resumed_by_job_id", "INTEGER REFERENCES predictionjob (id)")
+
+
+def add_prediction_job_import_company(connection: Connection) -> None:
+    """Entreprise destinataire d'un import, vérifiée à sa reprise."""
+    _add_column_if_missing(connection, "predictionjob", "import_company_id", "INTEGER REFERENCES company (id)")
+
+
+def add_prediction_job_indexes(connection: Connection) -> None:
+    """Index de `predictionjob` déclarés sur le modèle (dont les index uniques de déduplication)."""
+    from app.models.base import PredictionJob
+    existing = {index["name"] for index in inspect(connection).get_indexes("predictionjob")}
+    for index in PredictionJob.__table__.indexes:
+        if index.name not in existing:
+            print(f"Migration: creating index {index.name}")
+            index.create(connection)
+
+
+def check_database_dialect(connection: Connection) -> None:
+    """Refuse de démarrer sur une base où les imports ne pourraient pas maintenir `daily_sales`."""
+    from app.core.sales_ingestion import check_daily_sales_dialect
+    check_daily_sales_dialect(connection.dialect.name)
+
+
+def backfill_daily_sales(connection: Connection) -> None:
+    """
+    Remplit l'agrégat journalier `daily_sales` (créé vide par create_all) à partir des
+    ventes existantes. Ne s'exécute que si l'agrégat est vide : ensuite, il est maintenu
+    à chaque import.
+    """
+    if connection.execute(text("SELECT 1 FROM daily_sales LIMIT 1")).first() is not None:
+        return
+    if connection.execute(text("SELECT 1 FROM sale LIMIT 1")).first() is None:
+        return
+    print("Migration: backfilling daily_sales from sale")
+    connection.execute(text(
+        "INSERT INTO daily_sales (product_id, day, quantity, revenue, transaction_count) "
+        "SELECT product_id, transaction_date, SUM(quantity_sold), SUM(quantity_sold * unit_price), COUNT(*) "
+        "FROM sale GROUP BY product_id, transaction_date"
+    ))
+
+
+def add_sale_indexes(connection: Connection) -> None:
+    """
+    Index composite (product_id, transaction_date) de `sale`, couvrant sur PostgreSQL.
+    Sur une grosse table en production, le créer au préalable hors transaction avec
+    `CREATE INDEX CONCURRENTLY` (même nom) pour ne pas bloquer les écritures.
+    """
+    from app.models.base import Sale
+    existing = {index["name"] for index in inspect(connection).get_indexes("sale")}
+    for index in Sale.__table__.indexes:
+        if index.name not in existing:
+            print(f"Migration: creating index {index.name}")
+            index.create(connection)
+
+
+def add_product_indexes(connection: Connection) -> None:
+    """
+    Index de `product` déclarés sur le modèle. L'index unique (company_id, sku) n'est
+    créé que si aucun SKU n'est en double dans une entreprise : les doublons existants
+    sont signalés, à fusionner à la main avant le prochain démarrage.
+    """
+    from app.models.base import Product
+    existing = {index["name"] for index in inspect(connection).get_indexes("product")}
+    for index in Product.__table__.indexes:
+        if index.name in existing:
+            continue
+        if index.unique:
+            duplicates = connection.execute(text(
+                "SELECT company_id, sku FROM product GROUP BY company_id, sku HAVING COUNT(*) > 1 LIMIT 5"
+            )).all()
+            if duplicates:
+                print(f"Migration: index {index.name} not created, duplicate SKUs: {[tuple(row) for row in duplicates]}")
+                continue
+        print(f"Migration: creating index {index.name}")
+        index.create(connection)
+
+
+def add_forecast_indexes(connection: Connection) -> None:
+    """Index de `forecast` déclarés sur le modèle (dont (product_id, run_id), dernière exécution)."""
+    from app.models.base import Forecast
+    existing = {index["name"] for index in inspect(connection).get_indexes("forecast")}
+    for index in Forecast.__table__.indexes:
+        if index.name not in existing:
+            print(f"Migration: creating index {index.name}")
+            index.create(connection)
+
+
+def add_product_search_indexes(connection: Connection) -> None:
+    """
+    Index trigrammes (extension pg_trgm) sur lower(sku) et lower(name) : recherche par
+    préfixe ou sous-chaîne insensible à la casse sans parcourir tout le catalogue.
+    PostgreSQL uniquement ; sans le droit de créer l'extension, la recherche fonctionne
+    sans ces index.
+    """
+    if connection.dialect.name != "postgresql":
+        return
+    try:
+        # Point de sauvegarde : un échec n'annule pas la transaction des migrations
+        with connection.begin_nested():
+            connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    except DBAPIError as e:
+        print(f"Migration: pg_trgm unavailable, product search indexes skipped ({e.orig})")
+        return
+    for column in ("sku", "name"):
+        connection.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_product_{column}_trgm ON product USING gin (lower({column}) gin_trgm_ops)"
+        ))
+
+
+# --- Partitionnement mensuel de `sale` (PostgreSQL, optionnel) ---
+
+def _is_sale_partitioned(connection: Connection) -> bool:
+    if connection.dialect.name != "postgresql":
+        return False
+    statement = text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('sale')")
+    return connection.execute(statement).first() is not None
+
+
+def _month_start(day: datetime.date) -> datetime.date:
+    return day.replace(day=1)
+
+
+def _next_month(day: datetime.date) -> datetime.date:
+    return (day.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+
+
+def create_sale_partitions(connection: Connection, start: datetime.date, end: datetime.date) -> None:
+    """
+    Crée les partitions mensuelles `sale_yYYYYmMM` couvrant [start, end]. Un mois dont des
+    lignes sont déjà dans la partition par défaut est ignoré (PostgreSQL refuserait la
+    partition) : ces lignes y restent et sont toujours lues correctement.
+    """
+    has_default = connection.execute(text("SELECT to_regclass('sale_default')")).scalar() is not None
+    month = _month_start(start)
+    while month <= end:
+        following = _next_month(month)
+        if has_default and connection.execute(
+            text("SELECT 1 FROM sale_default WHERE transaction_date >= :start AND transaction_date < :end LIMIT 1"),
+            {"start": month, "end": following},
+        ).first() is not None:
+            print(f"Skipping partition for {month:%Y-%m}: rows already in sale_default")
+            month = following
+            continue
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS sale_y{month.year}m{month.month:02d} PARTITION OF sale "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+        ))
+        month = following
+
+
+def ensure_sale_partitions(connection: Connection) -> None:
+    """Si `sale` est partitionnée, crée à l'avance les partitions des prochains mois."""
+    if not _is_sale_partitioned(connection):
+        return
+    today = datetime.date.today()
+    end = today
+    for _ in range(settings.SALE_PARTITION_MONTHS_AHEAD):
+        end = _next_month(end)
+    create_sale_partitions(connection, today, end)
+
+
+def partition_sale_table(connection: Connection, months_ahead: int) -> None:
+    """
+    Convertit `sale` en table partitionnée par mois sur `transaction_date` (PostgreSQL).
+
+    La table existante est renommée, une table partitionnée de même schéma la remplace
+    (clé primaire (id, transaction_date), exigée par le partitionnement), les partitions
+    couvrant l'historique et les `months_ahead` prochains mois sont créées, ainsi qu'une
+    partition par défaut, puis les lignes sont recopiées. La séquence des ids est conservée.
+    L'opération verrouille `sale` : la lancer pendant une fenêtre de maintenance.
+    """
+    if connection.dialect.name != "postgresql":
+        raise RuntimeError("Sale partitioning requires PostgreSQL.")
+    if _is_sale_partitioned(connection):
+        print("Table sale is already partitioned.")
+        return
+
+    print("Partitioning table sale by month...")
+    connection.execute(text("ALTER TABLE sale RENAME TO sale_unpartitioned"))
+    connection.execute(text("ALTER TABLE sale_unpartitioned RENAME CONSTRAINT sale_pkey TO sale_unpartitioned_pkey"))
+    connection.execute(text("ALTER TABLE sale_unpartitioned RENAME CONSTRAINT sale_product_id_fkey TO sale_unpartitioned_product_id_fkey"))
+    connection.execute(text("ALTER INDEX IF EXISTS ix_sale_product_id_transaction_date RENAME TO ix_sale_unpartitioned_product_id_transaction_date"))
+    # La séquence appartient à l'ancienne colonne id : la détacher pour qu'elle survive à la table
+    connection.execute(text("ALTER SEQUENCE sale_id_seq OWNED BY NONE"))
+
+    connection.execute(text(
+        "CREATE TABLE sale ("
+        " id INTEGER NOT NULL DEFAULT nextval('sale_id_seq'),"
+        " transaction_date DATE NOT NULL,"
+        " quantity_sold INTEGER NOT NULL,"
+        " unit_price DOUBLE PRECISION NOT NULL,"
+        " product_id INTEGER NOT NULL,"
+        " CONSTRAINT sale_pkey PRIMARY KEY (id, transaction_date),"
+        " CONSTRAINT sale_product_id_fkey FOREIGN KEY (product_id) REFERENCES product (id)"
+        ") PARTITION BY RANGE (transaction_date)"
+    ))
+    connection.execute(text("ALTER SEQUENCE sale_id_seq OWNED BY sale.id"))
+    # Index partitionné : créé automatiquement sur chaque partition, existante ou future
+    add_sale_indexes(connection)
+
+    first_day = connection.execute(text("SELECT MIN(transaction_date) FROM sale_unpartitioned")).scalar()
+    today = datetime.date.today()
+    end = today
+    for _ in range(months_ahead):
+        end = _next_month(end)
+    create_sale_partitions(connection, min(first_day or today, today), end)
+    # Dates hors des partitions mensuelles (très anciennes ou lointaines)
+    connection.execute(text("CREATE TABLE IF NOT EXISTS sale_default PARTITION OF sale DEFAULT"))
+
+    connection.execute(text(
+        "INSERT INTO sale (id, transaction_date, quantity_sold, unit_price, product_id) "
+        "SELECT id, transaction_date, quantity_sold, unit_price, product_id FROM sale_unpartitioned"
+    ))
+    connection.execute(text("DROP TABLE sale_unpartitioned"))
+    connection.execute(text("ANALYZE sale"))
+    print("Table sale partitioned successfully.")
+
+
+# Liste ordonnée des migrations à appliquer
+MIGRATIONS = [
+    check_database_dialect,
+    add_prediction_job_rows_processed,
+    add_prediction_job_forecast_run_id,
+    add_prediction_job_rows_total,
+    add_prediction_job_dedup_columns,
+    add_prediction_job_resumed_by,
+    add_prediction_job_import_company,
+    add_prediction_job_indexes,
+    backfill_daily_sales,
+    add_sale_indexes,
+    ensure_sale_partitions,
+    add_product_indexes,
+    add_product_search_indexes,
+    add_forecast_indexes,
+]
+
+
+def apply_migrations(engine: Engine) -> None:
+    """Applique toutes les migrations dans une seule transaction."""
+    with engine.begin() as connection:
+        for migration in MIGRATIONS:
+            migration(connection)
+
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Migrations manuelles de la base de données.")
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    partition = subcommands.add_parser("partition-sale", help="Partitionner la table sale par mois (PostgreSQL).")
+    partition.add_argument("--months-ahead", type=int, default=settings.SALE_PARTITION_MONTHS_AHEAD)
+    args = parser.parse_args()
+
+    from app.db.database import get_engine
+    with get_engine().begin() as connection:
+        if args.command == "partition-sale":
+            partition_sale_table(connection, args.months_ahead)
@@ -0,0 +1,110 @@
+# Fichier : app/db/pool.py
+"""
+Pools de connexions instrumentés.
+
+Les pools SQLAlchemy mesurent ici l'attente au checkout (création de connexion comprise),
+les connexions en cours d'utilisation (et leur pic), les connexions ouvertes au-delà de
+`pool_size` (overflow) et les checkouts expirés (pool épuisé pendant `pool_timeout`).
+Les métriques sont propres au processus ; l'API les expose via GET /api/v1/metrics.
+"""
+
+import threading
+import time
+from typing import Dict
+
+from sqlalchemy import exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.core.metrics import Histogram, register_metrics_source
+
+# Seaux de l'attente au checkout, en millisecondes
+CHECKOUT_WAIT_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1000, 5000)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkout_wait_ms = Histogram(CHECKOUT_WAIT_BUCKETS_MS)
+        self.overflow_events = 0
+        self.timeouts = 0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+    def record_checkout(self, wait_ms: float, checked_out: int, opened_overflow: bool) -> None:
+        self.checkout_wait_ms.observe(wait_ms)
+        with self._lock:
+            if opened_overflow:
+                self.overflow_events += 1
+            if checked_out > self.peak_checked_out:
+                self.peak_checked_out = checked_out
+
+    def record_timeout(self, wait_ms: float) -> None:
+        self.checkout_wait_ms.observe(wait_ms)
+        with self._lock:
+            self.timeouts += 1
+
+
+class InstrumentedPoolMixin:
+    """Mesure chaque checkout d'un QueuePool (ou de sa variante asynchrone)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        # `_overflow` vaut -pool_size au départ et augmente à chaque connexion créée :
+        # une valeur positive après le checkout signifie qu'une connexion d'overflow a été ouverte.
+        overflow_before = self._overflow
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            self.metrics.record_timeout((time.perf_counter() - start) * 1000)
+            raise
+        self.metrics.record_checkout(
+            (time.perf_counter() - start) * 1000,
+            checked_out=self.checkedout(),
+            opened_overflow=self._overflow > max(overflow_before, 0),
+        )
+        return connection
+
+    def stats(self) -> dict:
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "checked_in": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "peak_checked_out": self.metrics.peak_checked_out,
+            "overflow_events": self.metrics.overflow_events,
+            "timeouts": self.metrics.timeouts,
+            "checkout_wait_ms": self.metrics.checkout_wait_ms.snapshot(),
+        }
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Moteurs suivis, par nom ; le pool courant est relu à chaque collecte
+# (il est remplacé quand le moteur est recréé ou disposé)
+_engines: Dict[str, Engine] = {}
+
+
+def track_engine(name: str, engine: Engine) -> None:
+    _engines[name] = engine
+
+
+def collect_pool_stats() -> dict:
+    stats = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        stats[name] = pool.stats() if isinstance(pool, InstrumentedPoolMixin) else {"status": pool.status()}
+    return stats
+
+
+register_metrics_source("db_pools", collect_pool_stats)
@@ -3,6 +3,7 @@
 from fastapi import FastAPI
 from contextlib import asynccontextmanager
 from dotenv import load_dotenv
+import anyio.to_thread
 
 # NOUVEL IMPORT : Le middleware pour gérer CORS
 from fastapi.middleware.cors import CORSMiddleware
@@ -14,6 +15,10 @@ from app.api.v1.endpoints import auth, company, products
 from app.api.v1.endpoints import auth, company, products, sales # Ajouter sales
 from app.api.v1.endpoints import auth, company, products, sales, predictions # Ajouter predictions
 from app.api.v1.endpoints import auth, company, products, sales, predictions, dashboard # Ajouter dashboard
+from app.api.v1.endpoints import metrics
+from app.core.config import settings
+from app.core.password_hashing import password_hasher
+from app.core.job_events import job_events
 
 
 
@@ -28,9 +33,14 @@ async def lifespan(app: FastAPI):
     Gestionnaire du cycle de vie de l'application.
     """
     print("Application startup... Awaiting connections.")
+    # Le pool de connexions de l'API est dimensionné sur ce pool de threads
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADPOOL_SIZE
     create_db_and_tables()
+    password_hasher.start()
     yield
     print("Application shutdown... Cleaning up.")
+    password_hasher.shutdown()
+    await job_events.close()
 
 
 # Initialiser l'instance de l'application FastAPI
@@ -68,6 +78,7 @@ app.add_middleware(
     allow_credentials=True, # Autorise les cookies et les en-têtes d'authentification
     allow_methods=["*"],    # Autorise toutes les méthodes (GET, POST, PUT, DELETE, etc.)
     allow_headers=["*"],    # Autorise tous les en-têtes
+    expose_headers=["X-Next-Cursor"], # Curseur de pagination lisible par le navigateur
 )
 
 
@@ -112,6 +123,12 @@ app.include_router(
     tags=["Dashboard"]
 )
 
+app.include_router(
+    metrics.router,
+    prefix="/api/v1/metrics",
+    tags=["Monitoring"]
+)
+
 # ==============================================================================
 # ENDPOINT RACINE
 # ==============================================================================
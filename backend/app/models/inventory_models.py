@@ -1,9 +1,19 @@
 import datetime
 from typing import Optional, List
+from sqlalchemy import Index, text
 from sqlmodel import Field, Relationship, SQLModel
 from enum import Enum
 
 class Product(SQLModel, table=True):
+    # Un SKU est unique dans une entreprise (index qui sert aussi la lecture d'un SKU
+    # exact) ; (company_id, id) sert la pagination par clé du catalogue d'une entreprise.
+    # La recherche par sous-chaîne utilise en plus des index trigrammes (PostgreSQL,
+    # voir `add_product_search_indexes`).
+    __table_args__ = (
+        Index("ux_product_company_id_sku", "company_id", "sku", unique=True),
+        Index("ix_product_company_id_id", "company_id", "id"),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     sku: str = Field(index=True)  # Stock Keeping Unit
     name: str
@@ -20,6 +30,17 @@ class Product(SQLModel, table=True):
 
 
 class Sale(SQLModel, table=True):
+    # Les lectures filtrent par produit et parcourent une plage de dates : index composite.
+    # Sur PostgreSQL, les colonnes INCLUDE le rendent couvrant (parcours "Index Only Scan").
+    __table_args__ = (
+        Index(
+            "ix_sale_product_id_transaction_date",
+            "product_id",
+            "transaction_date",
+            postgresql_include=["quantity_sold", "unit_price"],
+        ),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     transaction_date: datetime.date
     quantity_sold: int
@@ -32,6 +53,20 @@ class Sale(SQLModel, table=True):
     product: Product = Relationship(back_populates="sales")
 
 
+class DailySales(SQLModel, table=True):
+    """
+    Agrégat journalier des ventes d'un produit, maintenu à chaque import.
+    Les lectures de prévision et de dashboard coûtent un accès par jour, et non par transaction.
+    """
+    __tablename__ = "daily_sales"
+
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    day: datetime.date = Field(primary_key=True)
+    quantity: int = Field(default=0) # Somme des quantités vendues
+    revenue: float = Field(default=0.0) # Somme de quantité * prix unitaire
+    transaction_count: int = Field(default=0) # Nombre de ventes agrégées
+
+
 class JobStatus(str, Enum):
     PENDING = "PENDING"
     RUNNING = "RUNNING"
@@ -40,15 +75,74 @@ class JobStatus(str, Enum):
 
 
 class PredictionJob(SQLModel, table=True):
+    # Une seule prédiction en attente ou en cours par clé de déduplication (soumissions concurrentes)
+    # et une clé d'idempotence unique par utilisateur (les NULL ne sont jamais en conflit)
+    __table_args__ = (
+        Index(
+            "ux_predictionjob_active_dedup_key", "dedup_key", unique=True,
+            postgresql_where=text("status IN ('PENDING', 'RUNNING')"),
+            sqlite_where=text("status IN ('PENDING', 'RUNNING')"),
+        ),
+        Index("ux_predictionjob_user_idempotency_key", "user_id", "idempotency_key", unique=True),
+    )
+
     id: Optional[int] = Field(default=None, primary_key=True)
     status: JobStatus = Field(default=JobStatus.PENDING)
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
     started_at: Optional[datetime.datetime] = None
     completed_at: Optional[datetime.datetime] = None
-    result_data: Optional[str] = None # Pourrait stocker un JSON de résultats ou un chemin de fichier
+    rows_processed: int = Field(default=0) # Progression des imports traités par morceaux
+    rows_total: Optional[int] = None # Lignes à traiter (imports), pour le pourcentage d'avancement
+    result_data: Optional[str] = None # Message, erreur ou résumé JSON compact des résultats
+    # Prévision produite par le job (lignes dans la table `forecast`)
+    forecast_run_id: Optional[int] = Field(default=None, foreign_key="forecast_run.id")
+    # Entreprise concernée (jobs de prédiction) : ses membres peuvent suivre le job
+    company_id: Optional[int] = Field(default=None, foreign_key="company.id", index=True)
+    # (produit, watermark des ventes, version du modèle) d'une prédiction, pour réutiliser un job équivalent
+    dedup_key: Optional[str] = Field(default=None, index=True)
+    # En-tête Idempotency-Key de la soumission, propre à l'utilisateur
+    idempotency_key: Optional[str] = None
+    # Import échoué : job qui l'a repris (une seule reprise, pour ne pas importer deux fois)
+    resumed_by_job_id: Optional[int] = Field(default=None, foreign_key="predictionjob.id")
+    # Entreprise destinataire d'un import (distincte de `company_id`, qui partage le job
+    # avec les membres) : une reprise doit viser la même entreprise
+    import_company_id: Optional[int] = Field(default=None, foreign_key="company.id")
     
     # Clé étrangère vers l'utilisateur qui a lancé la tâche
     user_id: int = Field(foreign_key="user.id")
     
     # Relation : Une tâche a été lancée par un utilisateur
-    user: "User" = Relationship(back_populates="prediction_jobs")
\ No newline at end of file
+    user: "User" = Relationship(back_populates="prediction_jobs")
+
+
+class ForecastRun(SQLModel, table=True):
+    """Une exécution de prévision (un job) : regroupe les lignes de `forecast` produites ensemble."""
+    __tablename__ = "forecast_run"
+
+    id: Optional[int] = Field(default=None, primary_key=True)
+    company_id: int = Field(foreign_key="company.id", index=True)
+    model_version: str
+    horizon_days: int
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow)
+
+
+class Forecast(SQLModel, table=True):
+    """
+    Prévision journalière d'un produit par une exécution, avec son intervalle de confiance.
+    La clé (run_id, product_id, date) sert la lecture d'une exécution ; l'index
+    (product_id, date) les requêtes sur les prévisions d'un produit, et (product_id,
+    run_id) la recherche de sa dernière exécution sans parcourir les précédentes.
+    """
+    __tablename__ = "forecast"
+    __table_args__ = (
+        Index("ix_forecast_product_id_date", "product_id", "date"),
+        Index("ix_forecast_product_id_run_id", "product_id", "run_id"),
+    )
+
+    run_id: int = Field(foreign_key="forecast_run.id", primary_key=True)
+    product_id: int = Field(foreign_key="product.id", primary_key=True)
+    date: datetime.date = Field(primary_key=True)
+    model_version: str
+    yhat: float
+    yhat_lower: float
+    yhat_upper: float
@@ -1,7 +1,7 @@
 # Fichier: app/schemas/dashboard_schemas.py
 
 from pydantic import BaseModel
-from typing import List, Optional, Dict
+from typing import List, Literal, Optional, Dict
 
 class ChartDataPoint(BaseModel):
     date: str
@@ -10,6 +10,15 @@ class ChartDataPoint(BaseModel):
     confidence_min: Optional[float] = None # Borne inférieure de l'intervalle de confiance
     confidence_max: Optional[float] = None # Borne supérieure
 
+class ChartDataColumns(BaseModel):
+    """Format colonnes du graphique : des listes parallèles, plus compactes qu'une liste de points."""
+    date: List[str]
+    actual_sales: List[Optional[float]]
+    prediction: List[Optional[float]]
+    confidence_min: List[Optional[float]]
+    confidence_max: List[Optional[float]]
+    n_history: int # Les n_history premiers points sont historiques, les suivants sont futurs
+
 class DashboardKPIs(BaseModel):
     model_accuracy_percent: float
     total_forecast_30d: int
@@ -25,5 +34,42 @@ class ProductDashboardData(BaseModel):
     product_sku: str
     product_name: str
     kpis: DashboardKPIs
-    chart_data: List[ChartDataPoint]
-    influencing_factors: Dict[str, str] # Pour une V1, on peut simuler ça
\ No newline at end of file
+    chart_data: Optional[List[ChartDataPoint]] = None # Format "points" (par défaut)
+    chart_columns: Optional[ChartDataColumns] = None # Format "columns"
+    influencing_factors: Dict[str, str] # Pour une V1, on peut simuler ça
+
+class StockGrid(BaseModel):
+    """Stock de sécurité et point de commande pour chaque (taux de service, délai) d'une grille."""
+    product_id: int
+    run_id: int # Prévision utilisée (la plus récente du produit)
+    model_version: str
+    avg_daily_demand_forecast: float
+    model_error_std_dev: float
+    lead_time_std_days: float
+    service_levels: List[float]
+    lead_time_days: List[int]
+    # Une ligne par taux de service, une colonne par délai
+    safety_stock: List[List[int]]
+    reorder_point: List[List[int]]
+
+class StockSimulation(BaseModel):
+    """Résultat de la simulation Monte-Carlo du stock d'un produit, comparé à l'approximation normale."""
+    product_id: int
+    run_id: int # Prévision utilisée (la plus récente du produit)
+    model_version: str
+    residuals: Literal["empirical", "gaussian"] # Résidus de l'historique, ou gaussiens faute d'historique
+    scenarios: int
+    service_level: float
+    lead_time_days: float
+    lead_time_std_days: float
+    avg_daily_demand_forecast: float
+    lead_time_demand_mean: float
+    lead_time_demand_std: float
+    # Point de commande requis pour le taux de service, et performance à ce point
+    reorder_point: int
+    stockout_probability: float
+    fill_rate: float
+    # Point de commande de l'approximation normale, et sa performance simulée
+    normal_reorder_point: int
+    normal_stockout_probability: float
+    normal_fill_rate: float
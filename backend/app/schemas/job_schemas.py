@@ -10,6 +10,8 @@ class JobSubmission(BaseModel):
     job_id: int
     status: JobStatus
     message: str
+    deduplicated: bool = False # Job existant retourné (soumission équivalente ou rejouée)
+    result: Optional[Any] = None # Résultat déjà disponible d'un job réutilisé et terminé
 
 # Schéma pour la réponse de statut d'un job
 class JobStatusResponse(BaseModel):
@@ -18,4 +20,8 @@ class JobStatusResponse(BaseModel):
     created_at: datetime.datetime
     started_at: Optional[datetime.datetime] = None
     completed_at: Optional[datetime.datetime] = None
+    rows_processed: Optional[int] = None # Nombre de lignes traitées (imports de ventes)
+    rows_total: Optional[int] = None # Nombre de lignes à traiter (estimation, imports de ventes)
+    progress: Optional[int] = None # Avancement en pourcentage (None si inconnu)
+    forecast_run_id: Optional[int] = None # Prévision produite (jobs de prédiction)
     result: Optional[Any] = None # Pourra contenir des erreurs ou des résultats
\ No newline at end of file
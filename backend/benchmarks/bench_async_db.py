@@ -0,0 +1,157 @@
+# Fichier : benchmarks/bench_async_db.py
+"""
+Benchmark de concurrence des lectures : session synchrone exécutée dans le pool
+de threads (chemin historique des endpoints `def`) contre AsyncSession
+(chemin des endpoints `async def`).
+
+Chaque requête simulée reproduit la liste des produits : chargement de
+l'utilisateur avec ses entreprises, puis d'une page de produits. Une latence
+serveur artificielle (--server-latency-ms, pg_sleep sur PostgreSQL) rend visible
+la saturation du pool de threads (40 jetons par défaut dans Starlette).
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_async_db --database-url postgresql://... --concurrency 10 100 500
+    python -m benchmarks.bench_async_db --database-url postgresql://... --server-latency-ms 20
+
+Les données (1 entreprise, 1 utilisateur, --products produits) sont créées puis
+supprimées dans la base indiquée.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.orm import selectinload
+from sqlmodel import SQLModel, Session, create_engine, select, delete
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.db.base import to_async_url
+from app.models.base import Company, CompanyUserLink, Product, User, UserRole
+
+EMAIL = "bench-async@example.com"
+
+
+def setup(engine, n_products: int) -> int:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        company = Company(name="bench-async-company")
+        user = User(email=EMAIL, hashed_password="x")
+        db.add_all([company, user])
+        db.commit()
+        db.add(CompanyUserLink(company_id=company.id, user_id=user.id, role=UserRole.ADMIN))
+        db.add_all([Product(sku=f"BENCH-{i:05d}", name=f"Bench {i}", company_id=company.id) for i in range(n_products)])
+        db.commit()
+        return company.id
+
+
+def teardown(engine, company_id: int) -> None:
+    with Session(engine) as db:
+        db.exec(delete(Product).where(Product.company_id == company_id))
+        db.exec(delete(CompanyUserLink).where(CompanyUserLink.company_id == company_id))
+        db.exec(delete(User).where(User.email == EMAIL))
+        db.exec(delete(Company).where(Company.id == company_id))
+        db.commit()
+
+
+def _statements(company_id: int, page_size: int):
+    user_statement = (
+        select(User)
+        .where(User.email == EMAIL)
+        .options(selectinload(User.company_links).selectinload(CompanyUserLink.company))
+    )
+    products_statement = select(Product).where(Product.company_id == company_id).limit(page_size)
+    return user_statement, products_statement
+
+
+def sync_request(engine, company_id: int, page_size: int, sleep_sql) -> None:
+    user_statement, products_statement = _statements(company_id, page_size)
+    with Session(engine) as db:
+        db.exec(user_statement).first()
+        if sleep_sql is not None:
+            db.exec(sleep_sql)
+        db.exec(products_statement).all()
+
+
+async def async_request(session_factory, company_id: int, page_size: int, sleep_sql) -> None:
+    user_statement, products_statement = _statements(company_id, page_size)
+    async with session_factory() as db:
+        (await db.exec(user_statement)).first()
+        if sleep_sql is not None:
+            await db.exec(sleep_sql)
+        (await db.exec(products_statement)).all()
+
+
+async def run_load(make_request, concurrency: int, total: int) -> dict:
+    """Lance `total` requêtes avec au plus `concurrency` en vol ; retourne débit et latences."""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one():
+        async with semaphore:
+            start = time.perf_counter()
+            await make_request()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(total)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    sync_engine = create_engine(args.database_url, pool_size=args.pool_size, max_overflow=0)
+    async_engine = create_async_engine(to_async_url(args.database_url), pool_size=args.pool_size, max_overflow=0)
+    session_factory = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+    sleep_sql = None
+    if args.server_latency_ms:
+        if not args.database_url.startswith("postgresql"):
+            raise SystemExit("--server-latency-ms requires PostgreSQL (pg_sleep).")
+        sleep_sql = text(f"SELECT pg_sleep({args.server_latency_ms / 1000})")
+
+    company_id = setup(sync_engine, args.products)
+    try:
+        print(f"pool_size={args.pool_size}, {args.requests} requêtes par mesure, latence serveur {args.server_latency_ms} ms")
+        print(f"{'concurrence':>11} {'chemin':<22} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for concurrency in args.concurrency:
+            paths = {
+                "sync + threadpool": lambda: run_in_threadpool(sync_request, sync_engine, company_id, args.page_size, sleep_sql),
+                "AsyncSession": lambda: async_request(session_factory, company_id, args.page_size, sleep_sql),
+            }
+            for name, make_request in paths.items():
+                await run_load(make_request, concurrency, min(args.requests, 50))  # échauffement
+                stats = await run_load(make_request, concurrency, args.requests)
+                print(f"{concurrency:>11} {name:<22} {stats['rps']:>9.0f} {stats['p50_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    finally:
+        teardown(sync_engine, company_id)
+        await async_engine.dispose()
+        sync_engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--products", type=int, default=500)
+    parser.add_argument("--page-size", type=int, default=100)
+    parser.add_argument("--pool-size", type=int, default=20, help="Connexions par moteur (identique pour les deux chemins).")
+    parser.add_argument("--server-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url (or DATABASE_URL) is required")
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+# Fichier : benchmarks/bench_compiled_model.py
+"""
+Benchmark du modèle compilé (app.core.tree_ensemble) contre LightGBM : temps de
+chargement (joblib + lightgbm + scikit-learn contre un .npz), temps de prédiction
+par taille de lot et écart maximal entre les deux.
+
+Le chargement est mesuré dans un processus neuf pour inclure l'import des modules.
+
+Usage (depuis le dossier backend, après `python -m app.core.tree_ensemble v1`) :
+    python -m benchmarks.bench_compiled_model --version v1 --rows 1 90 10000
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.tree_ensemble import CompiledTreeEnsemble, verification_matrix
+
+LOAD_SNIPPETS = {
+    "lightgbm (joblib)": "import joblib; joblib.load({path!r}).booster_",
+    "compilé (npz)": "from app.core.tree_ensemble import CompiledTreeEnsemble; CompiledTreeEnsemble.load({path!r})",
+}
+
+
+def load_time(snippet: str) -> float:
+    """Durée de chargement dans un processus neuf (imports compris), en secondes."""
+    code = f"import time; start = time.perf_counter(); {snippet}; print(time.perf_counter() - start)"
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def measure(fn, X: np.ndarray, repeat: int) -> float:
+    fn(X)  # échauffement
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(X)
+    return (time.perf_counter() - start) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--version", default=settings.MODEL_DEFAULT_VERSION)
+    parser.add_argument("--directory", default=settings.MODEL_REGISTRY_DIR)
+    parser.add_argument("--rows", type=int, nargs="+", default=[1, 90, 10_000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    paths = {
+        "lightgbm (joblib)": os.path.join(args.directory, f"lgbm_demand_model_{args.version}.joblib"),
+        "compilé (npz)": os.path.join(args.directory, f"model_{args.version}_compiled.npz"),
+    }
+    for name, snippet in LOAD_SNIPPETS.items():
+        print(f"Chargement {name:<18} : {load_time(snippet.format(path=paths[name])) * 1000:8.1f} ms")
+
+    import joblib
+    booster = joblib.load(paths["lightgbm (joblib)"]).booster_
+    ensemble = CompiledTreeEnsemble.load(paths["compilé (npz)"])
+
+    print(f"{'lignes':>8} {'lightgbm ms':>12} {'compilé ms':>11} {'écart max':>10}")
+    for rows in args.rows:
+        X = verification_matrix(ensemble, rows)
+        gap = np.abs(booster.predict(X) - ensemble.predict(X)).max()
+        repeat = max(1, args.repeat if rows <= 10_000 else args.repeat // 10)
+        lightgbm_time = measure(booster.predict, X, repeat)
+        compiled_time = measure(ensemble.predict, X, repeat)
+        print(f"{rows:>8} {lightgbm_time * 1000:>12.3f} {compiled_time * 1000:>11.3f} {gap:>10.2g}")
+
+
+if __name__ == "__main__":
+    main()
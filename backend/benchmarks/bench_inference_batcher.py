@@ -0,0 +1,90 @@
+# Fichier : benchmarks/bench_inference_batcher.py
+"""
+Benchmark du regroupement des prédictions (app.core.inference_batcher) : des
+threads concurrents (comme le pool de threads de FastAPI) calculent chacun les
+prédictions d'un tableau de bord (historique, puis prévision récursive à 90 jours),
+avec un appel au modèle par demande ou via le batcher.
+
+Usage (depuis le dossier backend, avec les artefacts du modèle disponibles) :
+    python -m benchmarks.bench_inference_batcher --concurrency 1 8 32 --requests 200
+    python -m benchmarks.bench_inference_batcher --max-wait-ms 2 --max-batch-rows 1024
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from app.core.inference_batcher import InferenceBatcher
+from app.core.model_registry import model_registry
+from app.core.prediction_logic import forecast_future
+from app.core.recursive_forecast import history_feature_matrix
+
+
+def dashboard_predictions(model_version, sales_df: pd.DataFrame, batcher) -> None:
+    X_history = history_feature_matrix(sales_df["ds"].to_numpy(), sales_df["y"].to_numpy(), model_version.features)
+    if batcher is None:
+        model_version.predict_raw(X_history)
+        forecast_future(sales_df, 90, model_version)
+        return
+    predict = batcher.predictor(model_version)
+    with batcher.session():
+        predict(X_history)
+        forecast_future(sales_df, 90, model_version, predict)
+
+
+def run_load(model_version, series: list, concurrency: int, batcher) -> dict:
+    latencies = []
+
+    def one(sales_df):
+        start = time.perf_counter()
+        dashboard_predictions(model_version, sales_df, batcher)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(one, series))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "rps": len(series) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p99_ms": latencies[max(int(len(latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--history", type=int, default=180)
+    parser.add_argument("--max-batch-rows", type=int, default=4096)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    args = parser.parse_args()
+
+    model_version = model_registry.active()
+    rng = np.random.default_rng(0)
+    series = [
+        pd.DataFrame({
+            "ds": pd.date_range("2023-01-01", periods=args.history),
+            "y": rng.poisson(20, args.history).astype(float),
+        })
+        for _ in range(args.requests)
+    ]
+
+    print(f"{args.requests} tableaux de bord par mesure, lots de {args.max_batch_rows} lignes max, attente max {args.max_wait_ms} ms")
+    print(f"{'concurrence':>11} {'chemin':<10} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'demandes/lot':>13}")
+    for concurrency in args.concurrency:
+        batcher = InferenceBatcher(args.max_batch_rows, args.max_wait_ms / 1000)
+        for name, selected in (("direct", None), ("batcher", batcher)):
+            run_load(model_version, series[:10], concurrency, selected)  # échauffement
+            stats = run_load(model_version, series, concurrency, selected)
+            per_batch = f"{selected.batch_requests.snapshot()['mean']:.1f}" if selected else "1.0"
+            print(f"{concurrency:>11} {name:<10} {stats['rps']:>8.1f} {stats['p50_ms']:>8.1f} {stats['p99_ms']:>8.1f} {per_batch:>13}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+# Fichier : benchmarks/bench_inference_fast_path.py
+"""
+Benchmark du chemin d'inférence : DataFrame pandas + wrapper scikit-learn
+(`model.predict(df[model_features])`) et post-traitement par compréhensions de
+listes, contre la matrice float32 contiguë passée au Booster
+(`ModelVersion.predict_raw`) et le post-traitement vectorisé.
+
+Deux étapes sont mesurées :
+- caractéristiques : `create_features_for_inference` contre `history_feature_matrix`
+  pour un historique de --history jours ;
+- prédiction + post-traitement : lots de --rows lignes (par défaut 90 et 1 000 000).
+
+Usage (depuis le dossier backend, avec les artefacts du modèle disponibles) :
+    python -m benchmarks.bench_inference_fast_path
+    python -m benchmarks.bench_inference_fast_path --rows 90 10000 1000000 --threads 1 4
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.model_registry import model_registry, set_predict_threads
+from app.core.prediction_logic import create_features_for_inference
+from app.core.recursive_forecast import history_feature_matrix
+
+
+def measure(fn, repeat: int) -> float:
+    fn()  # échauffement
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat
+
+
+def pandas_path(model_version, df: pd.DataFrame) -> list:
+    """Ancien chemin : sélection pandas, wrapper scikit-learn, boucles Python."""
+    predictions = model_version.model.predict(df[model_version.features])
+    predictions = [max(0, p) for p in predictions]
+    return [round(float(p), 2) for p in predictions]
+
+
+def native_path(model_version, X: np.ndarray) -> list:
+    """Nouveau chemin : matrice float32 contiguë, Booster, clip et arrondi vectorisés."""
+    predictions = np.maximum(model_version.predict_raw(X), 0)
+    return np.round(predictions, 2).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, nargs="+", default=[90, 1_000_000])
+    parser.add_argument("--history", type=int, default=180, help="Jours d'historique pour l'étape caractéristiques.")
+    parser.add_argument("--threads", type=int, nargs="+", default=[0], help="Threads LightGBM (0 = défaut).")
+    parser.add_argument("--repeat", type=int, default=20, help="Répétitions pour les lots de moins de 100 000 lignes.")
+    args = parser.parse_args()
+
+    model_version = model_registry.active()
+    rng = np.random.default_rng(0)
+
+    # Étape 1 : construction des caractéristiques d'un historique
+    history = pd.DataFrame({
+        "ds": pd.date_range("2023-01-01", periods=args.history),
+        "y": rng.poisson(20, args.history).astype(float),
+    })
+    old = measure(lambda: create_features_for_inference(history.copy(), 0)[model_version.features], args.repeat)
+    new = measure(lambda: history_feature_matrix(history["ds"].to_numpy(), history["y"].to_numpy(), model_version.features), args.repeat)
+    print(f"Caractéristiques ({args.history} jours) : pandas {old * 1000:.2f} ms, numpy {new * 1000:.2f} ms (x{old / new:.1f})")
+
+    # Étape 2 : prédiction + post-traitement sur des lots de lignes réalistes
+    base = history_feature_matrix(history["ds"].to_numpy(), history["y"].to_numpy(), model_version.features)
+    print(f"{'lignes':>10} {'threads':>7} {'pandas ms':>11} {'natif ms':>10} {'accél.':>7} {'écart max':>10}")
+    for rows in args.rows:
+        X = np.ascontiguousarray(np.resize(base, (rows, base.shape[1])), dtype=np.float32)
+        df = pd.DataFrame(X.astype(np.float64), columns=model_version.features)
+        repeat = args.repeat if rows < 100_000 else 1
+        for threads in args.threads:
+            set_predict_threads(threads)
+            model_version.model.set_params(n_jobs=threads if threads > 0 else None)
+            old = measure(lambda: pandas_path(model_version, df), repeat)
+            new = measure(lambda: native_path(model_version, X), repeat)
+            gap = np.abs(np.asarray(pandas_path(model_version, df)) - np.asarray(native_path(model_version, X))).max()
+            print(f"{rows:>10} {threads:>7} {old * 1000:>11.2f} {new * 1000:>10.2f} {old / new:>6.1f}x {gap:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
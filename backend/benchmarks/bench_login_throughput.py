@@ -0,0 +1,109 @@
+# Fichier : benchmarks/bench_login_throughput.py
+"""
+Benchmark d'un pic de connexions : vérification bcrypt dans le pool de threads
+partagé (ancien chemin, endpoint synchrone) contre le pool de processus borné
+de app.core.password_hashing.
+
+Pendant le pic, une sonde exécute en continu une tâche triviale dans le pool de
+threads (comme le ferait n'importe quel autre endpoint synchrone) : sa latence
+montre à quel point les hachages bloquent le reste de l'API.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_login_throughput --logins 200 --concurrency 100 --rounds 12
+    python -m benchmarks.bench_login_throughput --workers 4 --max-queue 16
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import time
+
+import anyio.to_thread
+from fastapi.concurrency import run_in_threadpool
+from passlib.context import CryptContext
+
+from app.core.password_hashing import PasswordHasherBusy, PasswordHasherPool
+from app.core.security import verify_password
+
+
+async def probe(stop: asyncio.Event, latencies: list) -> None:
+    """Mesure en boucle la latence d'un appel trivial dans le pool de threads."""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await run_in_threadpool(lambda: None)
+        latencies.append(time.perf_counter() - start)
+        await asyncio.sleep(0.005)
+
+
+async def run_spike(login, logins: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    outcomes = {"ok": 0, "rejected": 0}
+
+    async def one():
+        async with semaphore:
+            try:
+                await login()
+                outcomes["ok"] += 1
+            except PasswordHasherBusy:
+                outcomes["rejected"] += 1
+
+    stop, probe_latencies = asyncio.Event(), []
+    probe_task = asyncio.create_task(probe(stop, probe_latencies))
+    start = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await probe_task
+
+    probe_latencies.sort()
+    return {
+        **outcomes,
+        "logins_per_s": outcomes["ok"] / elapsed,
+        "probe_p50_ms": statistics.median(probe_latencies) * 1000,
+        "probe_p99_ms": probe_latencies[max(int(len(probe_latencies) * 0.99) - 1, 0)] * 1000,
+    }
+
+
+async def main_async(args) -> None:
+    anyio.to_thread.current_default_thread_limiter().total_tokens = args.threadpool
+    hashed = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds).hash("secret")
+
+    pool = PasswordHasherPool(workers=args.workers, max_queue=args.max_queue)
+    pool.start()
+    await pool.verify_and_update("secret", hashed)  # démarrage des processus
+
+    results = {
+        "pool de threads": await run_spike(
+            lambda: run_in_threadpool(verify_password, "secret", hashed), args.logins, args.concurrency
+        ),
+        "pool de processus": await run_spike(
+            lambda: pool.verify_and_update("secret", hashed), args.logins, args.concurrency
+        ),
+    }
+    pool.shutdown()
+
+    print(f"{args.logins} connexions, concurrence {args.concurrency}, bcrypt {args.rounds} rounds, "
+          f"{args.threadpool} threads, {args.workers} processus (file max {args.max_queue})")
+    print(f"{'chemin':<18} {'conn/s':>8} {'refusées':>9} {'sonde p50 ms':>13} {'sonde p99 ms':>13}")
+    for name, stats in results.items():
+        print(f"{name:<18} {stats['logins_per_s']:>8.1f} {stats['rejected']:>9} "
+              f"{stats['probe_p50_ms']:>13.2f} {stats['probe_p99_ms']:>13.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=12, help="Coût bcrypt des hashes vérifiés.")
+    parser.add_argument("--threadpool", type=int, default=40, help="Taille du pool de threads (Starlette : 40).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2)
+    parser.add_argument("--max-queue", type=int, default=1000, help="Demandes en attente au-delà des processus.")
+    args = parser.parse_args()
+    # Les processus de hachage lisent ce coût : pas de recalcul de hash pendant la mesure
+    os.environ["BCRYPT_ROUNDS"] = str(args.rounds)
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# Fichier : benchmarks/bench_recursive_forecast.py
+"""
+Benchmark d'une prévision à 90 jours : reconstruction pandas complète
+(create_features_for_inference + model.predict) contre la prévision récursive
+à tampon circulaire (forecast_future).
+
+Usage (depuis le dossier backend, avec les artefacts du modèle disponibles) :
+    python -m benchmarks.bench_recursive_forecast --history 365 --repeat 50
+    python -m benchmarks.bench_recursive_forecast --series 1000 --repeat 1
+
+Avec --series N, le chemin récursif avance les N séries ensemble (un appel au
+modèle par jour) alors que l'ancien chemin reconstruit un DataFrame par série.
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.core.model_registry import model_registry
+from app.core.prediction_logic import create_features_for_inference, forecast_future
+from app.core.recursive_forecast import recursive_forecast
+
+model_version = model_registry.active()
+
+
+def pandas_rebuild(sales_df: pd.DataFrame, horizon: int) -> np.ndarray:
+    """Ancien chemin : concaténation du futur et recalcul de toutes les caractéristiques."""
+    df_with_features = create_features_for_inference(sales_df, horizon)
+    return model_version.model.predict(df_with_features.iloc[-horizon:][model_version.features])
+
+
+def recursive(sales_df: pd.DataFrame, horizon: int) -> np.ndarray:
+    return forecast_future(sales_df, horizon, model_version)[1]
+
+
+def measure(fn, series: list, horizon: int, repeat: int) -> float:
+    fn(series, horizon)  # échauffement
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn(series, horizon)
+    return (time.perf_counter() - start) / repeat
+
+
+def pandas_rebuild_all(series: list, horizon: int) -> None:
+    for sales_df in series:
+        pandas_rebuild(sales_df, horizon)
+
+
+def recursive_all(series: list, horizon: int) -> None:
+    if len(series) == 1:
+        recursive(series[0], horizon)
+        return
+    recursive_forecast(
+        model_version.predict_raw,
+        model_version.features,
+        histories=[sales_df["y"].to_numpy() for sales_df in series],
+        last_dates=[sales_df["ds"].max() for sales_df in series],
+        horizon=horizon,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", type=int, default=365, help="Nombre de jours d'historique.")
+    parser.add_argument("--horizon", type=int, default=90)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--series", type=int, default=1, help="Nombre de séries (produits) à prévoir.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    series = [
+        pd.DataFrame({
+            "ds": pd.date_range("2023-01-01", periods=args.history),
+            "y": rng.poisson(20, args.history).astype(float),
+        })
+        for _ in range(args.series)
+    ]
+
+    old = measure(pandas_rebuild_all, series, args.horizon, args.repeat)
+    new = measure(recursive_all, series, args.horizon, args.repeat)
+
+    nan_lags = create_features_for_inference(series[0], args.horizon).iloc[-args.horizon:]["sales_lag_7"].isna().sum()
+    print(f"{args.series} série(s), historique {args.history} j, horizon {args.horizon} j, {args.repeat} répétitions")
+    print(f"reconstruction pandas : {old * 1000:10.2f} ms ({nan_lags} jours futurs sans sales_lag_7)")
+    print(f"récursif (tampon)     : {new * 1000:10.2f} ms (aucun lag manquant)")
+    print(f"Accélération : x{old / new:.1f}")
+
+
+if __name__ == "__main__":
+    main()
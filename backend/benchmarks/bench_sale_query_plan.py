@@ -0,0 +1,197 @@
+# Fichier : benchmarks/bench_sale_query_plan.py
+"""
+Plans d'exécution et temps des lectures par produit sur la table des ventes
+(PostgreSQL) selon sa disposition physique :
+
+    heap         table sans index secondaire
+    btree        index (product_id, transaction_date)
+    covering     index (product_id, transaction_date) INCLUDE (quantity_sold, unit_price)
+    partitioned  partitions mensuelles + index couvrant (voir app/db/migrations.py)
+
+Les données sont générées côté serveur avec generate_series, par lots, dans un
+schéma dédié (bench_sale_plan) : la base de l'application n'est pas modifiée.
+Les ventes sont insérées par ordre chronologique (comme des imports successifs),
+les produits sont donc dispersés dans le heap.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_sale_query_plan --database-url postgresql://... --rows 10000000
+    python -m benchmarks.bench_sale_query_plan --rows 100000000 --products 50000 --layouts covering partitioned
+
+Compter plusieurs dizaines de Go de disque et un long temps de génération pour 100M lignes.
+"""
+
+import argparse
+import datetime
+import os
+import statistics
+import time
+
+import numpy as np
+from sqlalchemy import create_engine, text
+
+SCHEMA = "bench_sale_plan"
+LAYOUTS = ["heap", "btree", "covering", "partitioned"]
+FIRST_DAY = datetime.date(2022, 1, 1)
+
+# Lectures par produit : plage de 180 jours (dashboard) et historique complet agrégé par jour
+QUERIES = {
+    "range_180d": (
+        "SELECT transaction_date, quantity_sold FROM {table} "
+        "WHERE product_id = :product_id AND transaction_date >= :since "
+        "ORDER BY transaction_date"
+    ),
+    "daily_history": (
+        "SELECT transaction_date, SUM(quantity_sold), SUM(quantity_sold * unit_price) FROM {table} "
+        "WHERE product_id = :product_id GROUP BY transaction_date ORDER BY transaction_date"
+    ),
+}
+
+
+def generate_sales(connection, rows: int, products: int, days: int, batch: int) -> None:
+    """Remplit la table `sale_flat` par lots de `batch` lignes."""
+    connection.execute(text(
+        "CREATE TABLE sale_flat ("
+        " id BIGINT NOT NULL, transaction_date DATE NOT NULL, quantity_sold INTEGER NOT NULL,"
+        " unit_price DOUBLE PRECISION NOT NULL, product_id INTEGER NOT NULL)"
+    ))
+    start = time.perf_counter()
+    for low in range(1, rows + 1, batch):
+        high = min(low + batch - 1, rows)
+        connection.execute(text(
+            "INSERT INTO sale_flat "
+            "SELECT g, CAST(:first_day AS date) + CAST(floor((g - 1) * CAST(:days AS float8) / :rows) AS integer),"
+            " 1 + floor(random() * 49)::int, round((1 + random() * 99)::numeric, 2), 1 + floor(random() * :products)::int "
+            "FROM generate_series(CAST(:low AS bigint), CAST(:high AS bigint)) AS g"
+        ), {"first_day": FIRST_DAY, "days": days, "rows": rows, "products": products, "low": low, "high": high})
+        connection.commit()
+        print(f"  {high:>12,} / {rows:,} lignes ({time.perf_counter() - start:.0f} s)")
+    connection.execute(text("ALTER TABLE sale_flat ADD PRIMARY KEY (id)"))
+    connection.commit()
+
+
+def build_layout(connection, layout: str, days: int) -> str:
+    """Prépare la disposition demandée et retourne le nom de la table à interroger."""
+    connection.execute(text("DROP INDEX IF EXISTS ix_flat_product_date"))
+    connection.execute(text("DROP TABLE IF EXISTS sale_partitioned"))
+    connection.commit()
+
+    table = "sale_flat"
+    if layout == "btree":
+        connection.execute(text("CREATE INDEX ix_flat_product_date ON sale_flat (product_id, transaction_date)"))
+    elif layout == "covering":
+        connection.execute(text(
+            "CREATE INDEX ix_flat_product_date ON sale_flat (product_id, transaction_date) "
+            "INCLUDE (quantity_sold, unit_price)"
+        ))
+    elif layout == "partitioned":
+        table = "sale_partitioned"
+        connection.execute(text(
+            "CREATE TABLE sale_partitioned (LIKE sale_flat INCLUDING DEFAULTS) PARTITION BY RANGE (transaction_date)"
+        ))
+        month = FIRST_DAY
+        last_day = FIRST_DAY + datetime.timedelta(days=days)
+        while month <= last_day:
+            following = (month.replace(day=28) + datetime.timedelta(days=4)).replace(day=1)
+            connection.execute(text(
+                f"CREATE TABLE sale_partitioned_y{month.year}m{month.month:02d} PARTITION OF sale_partitioned "
+                f"FOR VALUES FROM ('{month.isoformat()}') TO ('{following.isoformat()}')"
+            ))
+            month = following
+        connection.execute(text("INSERT INTO sale_partitioned SELECT * FROM sale_flat"))
+        connection.execute(text(
+            "CREATE INDEX ix_partitioned_product_date ON sale_partitioned (product_id, transaction_date) "
+            "INCLUDE (quantity_sold, unit_price)"
+        ))
+    connection.commit()
+
+    # VACUUM met à jour la visibility map, indispensable aux parcours "Index Only Scan"
+    raw = connection.connection.dbapi_connection
+    previous_autocommit = raw.autocommit
+    raw.autocommit = True
+    try:
+        with raw.cursor() as cursor:
+            cursor.execute(f"VACUUM (ANALYZE) {table}")
+    finally:
+        raw.autocommit = previous_autocommit
+    return table
+
+
+def _scan_nodes(plan: dict) -> set:
+    """Types des nœuds de parcours présents dans un plan JSON."""
+    nodes = set()
+    if "Scan" in plan["Node Type"]:
+        nodes.add(plan["Node Type"])
+    for child in plan.get("Plans", []):
+        nodes |= _scan_nodes(child)
+    return nodes
+
+
+def explain(connection, query: str, params: dict) -> dict:
+    result = connection.execute(text(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {query}"), params).scalar()
+    return result[0] if isinstance(result, list) else result
+
+
+def measure_layout(connection, table: str, product_ids: list, days: int) -> dict:
+    since = FIRST_DAY + datetime.timedelta(days=days - 180)
+    report = {}
+    for name, template in QUERIES.items():
+        query = template.format(table=table)
+        explain(connection, query, {"product_id": product_ids[0], "since": since})  # échauffement
+        timings, buffers, scans = [], [], set()
+        for product_id in product_ids:
+            plan = explain(connection, query, {"product_id": product_id, "since": since})
+            timings.append(plan["Execution Time"])
+            buffers.append(plan["Plan"].get("Shared Hit Blocks", 0) + plan["Plan"].get("Shared Read Blocks", 0))
+            scans |= _scan_nodes(plan["Plan"])
+        report[name] = {
+            "median_ms": statistics.median(timings),
+            "median_buffers": statistics.median(buffers),
+            "scans": ", ".join(sorted(scans)),
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="URL PostgreSQL.")
+    parser.add_argument("--rows", type=int, default=10_000_000)
+    parser.add_argument("--products", type=int, default=10_000)
+    parser.add_argument("--days", type=int, default=3 * 365)
+    parser.add_argument("--batch", type=int, default=5_000_000, help="Lignes générées par transaction.")
+    parser.add_argument("--samples", type=int, default=20, help="Produits interrogés par requête.")
+    parser.add_argument("--layouts", nargs="+", choices=LAYOUTS, default=LAYOUTS)
+    parser.add_argument("--keep", action="store_true", help="Conserver le schéma de benchmark à la fin.")
+    args = parser.parse_args()
+
+    if not args.database_url or not args.database_url.startswith("postgresql"):
+        parser.error("a PostgreSQL --database-url (or DATABASE_URL) is required")
+
+    engine = create_engine(args.database_url)
+    product_ids = np.random.default_rng(0).integers(1, args.products + 1, args.samples).tolist()
+
+    with engine.connect() as connection:
+        connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+        connection.execute(text(f"CREATE SCHEMA {SCHEMA}"))
+        connection.execute(text(f"SET search_path TO {SCHEMA}"))
+        connection.commit()
+        try:
+            print(f"Génération de {args.rows:,} ventes ({args.products:,} produits, {args.days} jours)...")
+            generate_sales(connection, args.rows, args.products, args.days, args.batch)
+
+            print(f"\n{'disposition':<12} {'requête':<14} {'médiane ms':>11} {'buffers':>9}  parcours")
+            for layout in args.layouts:
+                start = time.perf_counter()
+                table = build_layout(connection, layout, args.days)
+                build_seconds = time.perf_counter() - start
+                for name, stats in measure_layout(connection, table, product_ids, args.days).items():
+                    print(f"{layout:<12} {name:<14} {stats['median_ms']:>11.2f} {stats['median_buffers']:>9.0f}  {stats['scans']}")
+                print(f"{'':<12} (préparation : {build_seconds:.0f} s)")
+        finally:
+            connection.rollback()
+            if not args.keep:
+                connection.execute(text(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE"))
+                connection.commit()
+
+
+if __name__ == "__main__":
+    main()
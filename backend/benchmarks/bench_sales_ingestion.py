@@ -0,0 +1,112 @@
+# Fichier : benchmarks/bench_sales_ingestion.py
+"""
+Benchmark de l'ingestion des ventes : boucle iterrows() historique contre le
+chemin vectorisé de app.core.sales_ingestion.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_sales_ingestion --rows 200000
+    python -m benchmarks.bench_sales_ingestion --rows 2000000 --database-url postgresql://...
+
+Sans --database-url, une base SQLite en mémoire est utilisée (repli executemany).
+"""
+
+import argparse
+import io
+import time
+
+import numpy as np
+import pandas as pd
+from sqlmodel import SQLModel, Session, create_engine, delete
+
+from app.core.sales_ingestion import prepare_sales_frame, bulk_insert_sales
+from app.models.base import Company, Product, Sale
+
+
+def generate_csv(n_rows: int, n_skus: int, seed: int = 42) -> str:
+    """Génère un CSV de ventes synthétique au format attendu par l'upload."""
+    rng = np.random.default_rng(seed)
+    dates = pd.Timestamp("2023-01-01") + pd.to_timedelta(rng.integers(0, 730, n_rows), unit="D")
+    df = pd.DataFrame({
+        "transaction_date": dates.strftime("%Y-%m-%d"),
+        "sku": [f"SKU-{i:05d}" for i in rng.integers(0, n_skus, n_rows)],
+        "quantity_sold": rng.integers(1, 50, n_rows),
+        "unit_price": rng.uniform(1, 100, n_rows).round(2),
+    })
+    return df.to_csv(index=False)
+
+
+def legacy_ingest(db: Session, csv_content: str, sku_to_product_id: dict) -> int:
+    """Reproduction fidèle de l'ancienne boucle ligne par ligne de process_sales_csv."""
+    df = pd.read_csv(io.StringIO(csv_content))
+    sales_to_insert = []
+    for index, row in df.iterrows():
+        sku = row["sku"]
+        if sku not in sku_to_product_id:
+            continue
+        sales_to_insert.append(Sale(
+            product_id=sku_to_product_id[sku],
+            transaction_date=pd.to_datetime(row["transaction_date"]).date(),
+            quantity_sold=int(row["quantity_sold"]),
+            unit_price=float(row["unit_price"]),
+        ))
+    db.add_all(sales_to_insert)
+    db.commit()
+    return len(sales_to_insert)
+
+
+def vectorized_ingest(db: Session, csv_content: str, sku_to_product_id: dict) -> int:
+    df = pd.read_csv(io.StringIO(csv_content), dtype={"sku": str})
+    sales, errors = prepare_sales_frame(df, sku_to_product_id)
+    if errors:
+        raise ValueError(errors[:5])
+    count = bulk_insert_sales(db, sales)
+    db.commit()
+    return count
+
+
+def setup_products(engine, n_skus: int) -> dict:
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as db:
+        company = Company(name=f"bench-{time.time_ns()}")
+        db.add(company)
+        db.commit()
+        db.refresh(company)
+        products = [Product(sku=f"SKU-{i:05d}", name=f"Produit {i}", company_id=company.id) for i in range(n_skus)]
+        db.add_all(products)
+        db.commit()
+        return {p.sku: p.id for p in products}
+
+
+def run(label: str, fn, engine, csv_content: str, sku_map: dict, n_rows: int) -> float:
+    with Session(engine) as db:
+        start = time.perf_counter()
+        inserted = fn(db, csv_content, sku_map)
+        elapsed = time.perf_counter() - start
+        db.exec(delete(Sale).where(Sale.product_id.in_(list(sku_map.values()))))
+        db.commit()
+    rate = n_rows / elapsed
+    print(f"{label:<12} {inserted:>10} lignes en {elapsed:8.2f} s  -> {rate:12,.0f} lignes/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--skus", type=int, default=500)
+    parser.add_argument("--database-url", default="sqlite://")
+    parser.add_argument("--skip-legacy", action="store_true", help="Ne pas mesurer l'ancienne boucle (très lente sur de gros volumes).")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url)
+    sku_map = setup_products(engine, args.skus)
+    csv_content = generate_csv(args.rows, args.skus)
+    print(f"Base : {engine.dialect.name} | {args.rows:,} lignes | {args.skus} SKU")
+
+    vectorized_rate = run("vectorisé", vectorized_ingest, engine, csv_content, sku_map, args.rows)
+    if not args.skip_legacy:
+        legacy_rate = run("iterrows", legacy_ingest, engine, csv_content, sku_map, args.rows)
+        print(f"Accélération : x{vectorized_rate / legacy_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Fichier : benchmarks/bench_stock_optimization.py
+"""
+Benchmark de l'optimisation des stocks : boucle sur `calculate_optimal_stock_levels`
+(un appel à `norm.ppf` par produit) contre `calculate_stock_levels` vectorisé
+(z-scores en cache), pour un catalogue de --skus produits, puis une grille taux de
+service x délai par produit.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_stock_optimization --skus 1000 50000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from scipy.stats import norm
+
+from app.core.stock_optimization import calculate_stock_levels
+
+SERVICE_LEVELS = np.array([0.9, 0.95, 0.975, 0.99])
+LEAD_TIMES = np.array([7, 14, 30, 45, 60])
+
+
+def scalar_reference(demand: float, error_std: float, lead_time: int, lead_time_std: int, service_level: float) -> tuple:
+    """Ancien calcul : un `norm.ppf` et des opérations Python par produit."""
+    z_score = norm.ppf(service_level)
+    combined_std_dev = (lead_time * error_std ** 2 + demand ** 2 * lead_time_std ** 2) ** 0.5
+    safety_stock = z_score * combined_std_dev
+    return round(safety_stock), round(demand * lead_time + safety_stock)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--skus", type=int, nargs="+", default=[1000, 50_000])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'produits':>9} {'boucle ms':>10} {'vectorisé ms':>13} {'grille ms':>10} {'cellules':>10}")
+    for skus in args.skus:
+        demand = rng.gamma(2, 50, skus)
+        error_std = rng.gamma(2, 10, skus)
+
+        start = time.perf_counter()
+        expected = [scalar_reference(d, e, 30, 5, 0.95) for d, e in zip(demand.tolist(), error_std.tolist())]
+        loop_time = time.perf_counter() - start
+
+        start = time.perf_counter()
+        levels = calculate_stock_levels(demand, error_std, 30, 5, 0.95)
+        vector_time = time.perf_counter() - start
+        assert np.array_equal(np.round(levels["safety_stock"]), [safety for safety, _ in expected])
+
+        # Grille par produit : (produits, taux de service, délais) en un appel
+        start = time.perf_counter()
+        grid = calculate_stock_levels(
+            demand[:, None, None], error_std[:, None, None],
+            LEAD_TIMES[None, None, :], 5, SERVICE_LEVELS[None, :, None],
+        )
+        grid_time = time.perf_counter() - start
+        print(f"{skus:>9} {loop_time * 1000:>10.1f} {vector_time * 1000:>13.2f} {grid_time * 1000:>10.2f} {grid['safety_stock'].size:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+# Fichier : benchmarks/bench_worker_throughput.py
+"""
+Benchmark de débit du worker : N tâches `run_prediction_for_product` exécutées
+par un seul processus (équivalent du pool "solo") puis par des processus enfants
+forkés, comme le pool prefork de Celery.
+
+Le parent passe par les mêmes signaux que le worker (`configure_worker_engine`,
+`preload_models`) et chaque enfant par `reset_engine_after_fork` : le modèle est
+chargé une fois avant le fork et partagé en copie sur écriture. La mémoire
+partagée / privée des enfants (Linux, /proc/<pid>/smaps_rollup) est affichée.
+
+Usage (depuis le dossier backend) :
+    python -m benchmarks.bench_worker_throughput --tasks 32 --concurrency 1 2 4 8
+    python -m benchmarks.bench_worker_throughput --database-url postgresql://... --history 730
+
+Les données (1 entreprise, 1 utilisateur, --tasks produits et leur historique
+journalier) sont créées puis supprimées dans la base indiquée.
+"""
+
+import argparse
+import contextlib
+import datetime
+import io
+import multiprocessing
+import os
+import time
+
+import numpy as np
+
+BENCH_COMPANY = "bench-worker-company"
+BENCH_EMAIL = "bench-worker@example.com"
+
+
+def setup(n_products: int, history_days: int) -> tuple:
+    from sqlmodel import Session
+    from app.db.database import create_db_and_tables, get_engine
+    from app.models.base import Company, DailySales, Product, User
+
+    create_db_and_tables()
+    rng = np.random.default_rng(0)
+    first_day = datetime.date.today() - datetime.timedelta(days=history_days)
+    with Session(get_engine()) as db:
+        company, user = Company(name=BENCH_COMPANY), User(email=BENCH_EMAIL, hashed_password="x")
+        db.add_all([company, user])
+        db.commit()
+        products = [Product(sku=f"BENCH-W-{i:05d}", name=f"Bench {i}", company_id=company.id) for i in range(n_products)]
+        db.add_all(products)
+        db.commit()
+        for product in products:
+            quantities = rng.poisson(20, history_days)
+            db.add_all([
+                DailySales(
+                    product_id=product.id,
+                    day=first_day + datetime.timedelta(days=offset),
+                    quantity=int(quantity),
+                    revenue=float(quantity) * 9.5,
+                    transaction_count=1,
+                )
+                for offset, quantity in enumerate(quantities)
+            ])
+        db.commit()
+        return company.id, user.id, [product.id for product in products]
+
+
+def teardown(company_id: int, user_id: int, product_ids: list) -> None:
+    from sqlmodel import Session, delete
+    from app.db.database import get_engine
+    from app.models.base import Company, DailySales, PredictionJob, Product, User
+
+    with Session(get_engine()) as db:
+        db.exec(delete(PredictionJob).where(PredictionJob.user_id == user_id))
+        db.exec(delete(DailySales).where(DailySales.product_id.in_(product_ids)))
+        db.exec(delete(Product).where(Product.company_id == company_id))
+        db.exec(delete(User).where(User.id == user_id))
+        db.exec(delete(Company).where(Company.id == company_id))
+        db.commit()
+
+
+def create_jobs(user_id: int, count: int) -> list:
+    from sqlmodel import Session
+    from app.db.database import get_engine
+    from app.models.base import PredictionJob
+
+    with Session(get_engine()) as db:
+        jobs = [PredictionJob(user_id=user_id) for _ in range(count)]
+        db.add_all(jobs)
+        db.commit()
+        return [job.id for job in jobs]
+
+
+def memory_kb() -> dict:
+    """Mémoire du processus courant (Linux) : partagée avec d'autres processus et privée."""
+    try:
+        with open(f"/proc/{os.getpid()}/smaps_rollup") as f:
+            # La première ligne décrit la plage d'adresses, les suivantes sont "Champ: N kB"
+            fields = dict(line.split(":", 1) for line in f.read().splitlines()[1:])
+    except OSError:
+        return {}
+    kb = {name: int(value.split()[0]) for name, value in fields.items()}
+    return {
+        "shared": kb.get("Shared_Clean", 0) + kb.get("Shared_Dirty", 0),
+        "private": kb.get("Private_Clean", 0) + kb.get("Private_Dirty", 0),
+    }
+
+
+def run_task(arguments: tuple) -> tuple:
+    from tasks.model_inference import run_prediction_for_product
+
+    job_id, product_id, company_id = arguments
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        run_prediction_for_product(job_id, product_id, company_id)
+    return time.perf_counter() - start, os.getpid(), memory_kb()
+
+
+def init_child() -> None:
+    from tasks.celery_app import reset_engine_after_fork
+    reset_engine_after_fork()
+
+
+def run_batch(work: list, concurrency: int) -> tuple:
+    start = time.perf_counter()
+    if concurrency == 1:
+        results = [run_task(arguments) for arguments in work]
+    else:
+        with multiprocessing.get_context("fork").Pool(concurrency, initializer=init_child) as pool:
+            results = pool.map(run_task, work, chunksize=1)
+    return time.perf_counter() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"))
+    parser.add_argument("--tasks", type=int, default=32)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--history", type=int, default=365, help="Jours d'historique par produit.")
+    args = parser.parse_args()
+    if not args.database_url:
+        parser.error("--database-url (or DATABASE_URL) is required")
+    os.environ["DATABASE_URL"] = args.database_url
+
+    from tasks.celery_app import configure_worker_engine, preload_models
+
+    configure_worker_engine()
+    with contextlib.redirect_stdout(io.StringIO()):
+        preload_models()
+
+    company_id, user_id, product_ids = setup(args.tasks, args.history)
+    try:
+        print(f"{args.tasks} tâches, historique {args.history} j, {os.cpu_count()} cœurs")
+        print(f"{'processus':>9} {'tâches/s':>9} {'accél.':>7} {'tâche ms':>9} {'partagée Mo':>12} {'privée Mo':>10}")
+        baseline = None
+        for concurrency in args.concurrency:
+            work = [
+                (job_id, product_id, company_id)
+                for job_id, product_id in zip(create_jobs(user_id, args.tasks), product_ids)
+            ]
+            elapsed, results = run_batch(work, concurrency)
+            throughput = len(work) / elapsed
+            baseline = baseline or throughput
+            # Dernière mesure mémoire de chaque processus
+            memory = {pid: mem for _, pid, mem in results}
+            shared = np.mean([mem.get("shared", 0) for mem in memory.values()]) / 1024
+            private = np.mean([mem.get("private", 0) for mem in memory.values()]) / 1024
+            task_ms = np.mean([duration for duration, _, _ in results]) * 1000
+            print(f"{concurrency:>9} {throughput:>9.1f} {throughput / baseline:>6.1f}x {task_ms:>9.1f} {shared:>12.1f} {private:>10.1f}")
+    finally:
+        teardown(company_id, user_id, product_ids)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,15 @@
 # Fichier : tasks/celery_app.py
 
+import functools
+import gc
+import inspect
 import os
+import random
+import uuid
 from celery import Celery
+from celery.signals import worker_init, worker_process_init
 from dotenv import load_dotenv
+from kombu import Queue
 
 # Charger les variables d'environnement pour que Celery connaisse son broker
 load_dotenv(".env")
@@ -18,7 +25,96 @@ celery = Celery(
     include=["tasks.data_processing", "tasks.model_inference"]
 )
 
+# Files dédiées, chacune consommée par son propre worker (voir docker-compose.yml) :
+# un gros import ne passe jamais devant une prédiction interactive
+QUEUE_INGESTION = "ingestion"   # imports de ventes
+QUEUE_INFERENCE = "inference"   # prédictions d'un produit, demandées depuis l'interface
+QUEUE_REFRESH = "refresh"       # prédictions groupées et traitements de fond
+
+# Priorités (broker Redis : 0 = la plus haute), départagent les tâches d'une même file
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 3
+PRIORITY_LOW = 9
+
 # Configuration optionnelle pour une meilleure gestion
 celery.conf.update(
     task_track_started=True,
-)
\ No newline at end of file
+    # Tâches longues (prévisions) : un enfant ne réserve pas de tâche qu'un autre, libre, pourrait prendre
+    worker_prefetch_multiplier=1,
+    task_queues=[Queue(QUEUE_INGESTION), Queue(QUEUE_INFERENCE), Queue(QUEUE_REFRESH)],
+    task_default_queue=QUEUE_REFRESH,
+    task_routes={
+        "tasks.data_processing.*": {"queue": QUEUE_INGESTION},
+        "tasks.model_inference.run_prediction_for_product": {"queue": QUEUE_INFERENCE, "priority": PRIORITY_HIGH},
+        "tasks.model_inference.run_prediction_for_company": {"queue": QUEUE_REFRESH, "priority": PRIORITY_NORMAL},
+    },
+    task_default_priority=PRIORITY_NORMAL,
+    # Le transport Redis ne gère les priorités qu'avec des sous-files par niveau
+    broker_transport_options={"queue_order_strategy": "priority", "priority_steps": list(range(10))},
+)
+
+
+def tenant_limited(queue: str):
+    """
+    Décorateur de tâche (sous `@celery.task(bind=True)`) : limite le nombre de tâches
+    simultanées de la file par entreprise (argument `company_id`, voir
+    app/core/tenant_limits.py). Une tâche dont l'entreprise est à sa limite est
+    replanifiée (retry) au lieu d'attendre et d'occuper un processus du worker.
+    """
+    def decorate(run):
+        signature = inspect.signature(run)
+
+        @functools.wraps(run)
+        def wrapper(self, *args, **kwargs):
+            from app.core.config import settings
+            from app.core.tenant_limits import tenant_limiter
+
+            company_id = signature.bind(self, *args, **kwargs).arguments["company_id"]
+            token = self.request.id or f"local-{uuid.uuid4()}"
+            if not tenant_limiter.try_acquire(queue, company_id, token):
+                # Délai aléatoire : les tâches en attente d'une entreprise ne reviennent pas ensemble
+                countdown = settings.TENANT_LIMIT_RETRY_SECONDS * (1 + random.random())
+                raise self.retry(countdown=countdown, max_retries=None)
+            try:
+                return run(self, *args, **kwargs)
+            finally:
+                tenant_limiter.release(queue, company_id, token)
+        return wrapper
+    return decorate
+
+
+@worker_init.connect
+def configure_worker_engine(**kwargs):
+    """Processus principal du worker : pool dimensionné pour le rôle worker."""
+    from app.db.database import configure_engine, ROLE_WORKER
+    configure_engine(ROLE_WORKER)
+
+
+@worker_init.connect
+def preload_models(**kwargs):
+    """
+    Processus principal du worker : charge les modèles actifs avant le fork des enfants
+    (pool prefork). Les enfants partagent alors les modèles en copie sur écriture au lieu
+    de les charger chacun ; avec le pool "threads", les threads partagent le même registre.
+    """
+    from app.core.config import settings
+    if not settings.WORKER_PRELOAD_MODELS:
+        return
+    from app.core.model_registry import model_registry, set_predict_threads
+    set_predict_threads(settings.WORKER_MODEL_THREADS)
+    versions = model_registry.preload()
+    print(f"Modèles préchargés pour les processus du worker : {', '.join(versions)}")
+    # Geler les objets existants : le ramasse-miettes des enfants ne les parcourt plus,
+    # et n'écrit donc plus dans les pages mémoire partagées avec le parent
+    gc.collect()
+    gc.freeze()
+
+
+@worker_process_init.connect
+def reset_engine_after_fork(**kwargs):
+    """
+    Processus enfant (pool prefork) : les connexions héritées du parent ne doivent pas
+    être partagées. Le pool hérité est abandonné et un nouveau pool est créé.
+    """
+    from app.db.database import configure_engine, ROLE_WORKER
+    configure_engine(ROLE_WORKER, after_fork=True)
@@ -1,22 +1,46 @@
 # Fichier : tasks/data_processing.py
 
 import pandas as pd
-import io
-import datetime
 from sqlmodel import Session
-from sqlalchemy.exc import IntegrityError
 
-from tasks.celery_app import celery
-from app.db.database import engine # Importer le moteur, pas la session
-from app.models.base import PredictionJob, JobStatus, Sale, Product
+from tasks.celery_app import celery, tenant_limited, QUEUE_INGESTION
+from app.db.database import get_engine # Le moteur est recréé dans chaque processus worker
+from app.models.base import PredictionJob, JobStatus, Product
+from app.core.config import settings
+from app.core.sales_ingestion import prepare_sales_frame, bulk_insert_sales, upsert_daily_sales, summarize_errors
+from app.core.upload_spool import resolve_spooled_file, discard_spooled_file, count_spooled_rows
+from app.crud.job_crud import update_job_state
+
+def partial_import_message(error: Exception, job_id: int, rows_processed: int) -> str:
+    """
+    Message d'échec d'un import : les morceaux déjà commités restent en base, le message
+    dit lesquels et comment reprendre sans les importer deux fois.
+    """
+    if not rows_processed:
+        return str(error)
+    return (
+        f"{error} Rows 2 to {rows_processed + 1} of the file ({rows_processed} records) were imported "
+        f"before the error and are kept. Fix the file without adding or removing rows before line "
+        f"{rows_processed + 2}, then upload it again with resume_job_id={job_id} to import only the "
+        f"remaining rows. Uploading it again without resume_job_id would import these rows twice."
+    )
+
 
 @celery.task(bind=True)
-def process_sales_csv(self, job_id: int, file_content_str: str, company_id: int):
+@tenant_limited(QUEUE_INGESTION)
+def process_sales_csv(self, job_id: int, file_handle: str, company_id: int, skip_rows: int = 0):
     """
     Tâche Celery pour traiter un fichier CSV de ventes et l'insérer en base de données.
+    Le fichier est lu depuis la zone de spool par morceaux de taille bornée ;
+    chaque morceau est validé, inséré et commité avant de passer au suivant.
+
+    `skip_rows` (reprise d'un import échoué) saute les premières lignes de données, déjà
+    importées ; `rows_processed` compte alors les lignes du fichier importées depuis le
+    début, pour qu'un nouvel échec puisse être repris à son tour.
     """
+    rows_processed = skip_rows
     # Utiliser une session de base de données propre à la tâche
-    with Session(engine) as db:
+    with Session(get_engine()) as db:
         try:
             # Récupérer l'objet Job depuis la BDD
             job = db.get(PredictionJob, job_id)
@@ -24,69 +48,60 @@ def process_sales_csv(self, job_id: int, file_content_str: str, company_id: int)
                 # Ne devrait jamais arriver, mais c'est une sécurité
                 raise ValueError("Job not found")
 
-            # Mettre à jour le statut du job à RUNNING
-            job.status = JobStatus.RUNNING
-            job.started_at = datetime.datetime.utcnow()
-            db.add(job)
-            db.commit()
-            
-            # Lire le contenu du fichier CSV en mémoire avec Pandas
-            csv_file = io.StringIO(file_content_str)
-            df = pd.read_csv(csv_file)
-
-            # --- Validation du CSV ---
-            required_columns = {"transaction_date", "sku", "quantity_sold", "unit_price"}
-            if not required_columns.issubset(df.columns):
-                raise ValueError(f"CSV file must contain the following columns: {required_columns}")
+            # Mettre à jour le statut du job à RUNNING (le total estimé sert à l'avancement)
+            update_job_state(
+                db, job, JobStatus.RUNNING, rows_processed=skip_rows, rows_total=count_spooled_rows(file_handle)
+            )
 
             # Récupérer tous les produits de l'entreprise en une seule fois pour optimiser
             products_in_company = db.query(Product).filter(Product.company_id == company_id).all()
             sku_to_product_id = {p.sku: p.id for p in products_in_company}
 
-            sales_to_insert = []
-            errors = []
-            for index, row in df.iterrows():
-                sku = row["sku"]
-                if sku not in sku_to_product_id:
-                    errors.append(f"Row {index+2}: SKU '{sku}' not found in your products.")
-                    continue
+            # Lire le fichier CSV par morceaux : la mémoire reste bornée quelle que soit sa taille.
+            # L'index des morceaux est continu (décalé des lignes sautées) : les numéros de
+            # ligne des erreurs restent ceux du fichier.
+            reader = pd.read_csv(
+                resolve_spooled_file(file_handle),
+                dtype={"sku": str},
+                encoding="utf-8",
+                chunksize=settings.SALES_CSV_CHUNK_ROWS,
+                skiprows=range(1, skip_rows + 1) if skip_rows else None,
+            )
+            with reader:
+                for chunk in reader:
+                    chunk.index += skip_rows
+                    # --- Validation et conversion vectorisées du morceau ---
+                    sales_to_insert, errors = prepare_sales_frame(chunk, sku_to_product_id)
 
-                try:
-                    sale = Sale(
-                        product_id=sku_to_product_id[sku],
-                        transaction_date=pd.to_datetime(row["transaction_date"]).date(),
-                        quantity_sold=int(row["quantity_sold"]),
-                        unit_price=float(row["unit_price"]),
-                    )
-                    sales_to_insert.append(sale)
-                except Exception as e:
-                    errors.append(f"Row {index+2}: Invalid data format - {e}")
+                    if errors:
+                        raise ValueError(summarize_errors(errors))
 
-            if errors:
-                raise ValueError("Validation failed. Errors: " + "; ".join(errors))
+                    # Insertion en masse du morceau (COPY sur PostgreSQL), mise à jour de
+                    # l'agrégat journalier et progression du job, dans la même transaction
+                    rows_processed += bulk_insert_sales(db, sales_to_insert)
+                    upsert_daily_sales(db, sales_to_insert)
+                    update_job_state(db, job, rows_processed=rows_processed)
 
-            # Insertion en masse des données de vente
-            db.add_all(sales_to_insert)
-            db.commit()
-            
             # Mettre à jour le job à SUCCESS
-            job.status = JobStatus.SUCCESS
-            job.completed_at = datetime.datetime.utcnow()
-            job.result_data = f"{len(sales_to_insert)} sales records successfully imported."
-            db.add(job)
-            db.commit()
+            imported = rows_processed - skip_rows
+            message = f"{imported} sales records successfully imported."
+            if skip_rows:
+                message += f" The first {skip_rows} records of the file were skipped (already imported)."
+            update_job_state(db, job, JobStatus.SUCCESS, result_data=message)
 
-            return {"status": "SUCCESS", "records_imported": len(sales_to_insert)}
+            return {"status": "SUCCESS", "records_imported": imported}
 
         except Exception as e:
             # Gérer les erreurs et mettre à jour le job à FAILED
-            db.rollback() # Annuler les changements en cas d'erreur
+            db.rollback() # Annuler les changements du morceau en cours
             job = db.get(PredictionJob, job_id) # Récupérer à nouveau le job
             if job:
-                job.status = JobStatus.FAILED
-                job.completed_at = datetime.datetime.utcnow()
-                job.result_data = str(e)
-                db.add(job)
-                db.commit()
+                update_job_state(
+                    db, job, JobStatus.FAILED,
+                    rows_processed=rows_processed,
+                    result_data=partial_import_message(e, job_id, rows_processed),
+                )
             # Relancer l'exception pour que Celery la marque comme échouée
-            raise e
\ No newline at end of file
+            raise e
+        finally:
+            discard_spooled_file(file_handle)
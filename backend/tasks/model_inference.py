@@ -1,16 +1,22 @@
 # Fichier : tasks/model_inference.py
 
-import datetime
 import json
-import pandas as pd
-from sqlmodel import Session, select
+from sqlmodel import Session
 
-from tasks.celery_app import celery
-from app.db.database import engine
-from app.models.base import PredictionJob, JobStatus, Sale, Product
-from app.core.prediction_logic import run_prediction_pipeline
+from tasks.celery_app import celery, tenant_limited, QUEUE_INFERENCE, QUEUE_REFRESH
+from app.db.database import get_engine
+from app.models.base import PredictionJob, JobStatus, Product
+from app.core.prediction_logic import run_prediction_pipeline, run_batch_prediction_pipeline
+from app.core.model_registry import model_registry
+from app.crud.sales_crud import get_daily_sales_df, count_sales_days, fill_missing_days, get_company_daily_sales
+from app.crud.forecast_crud import create_forecast_run
+from app.crud.job_crud import update_job_state
+
+# Nombre minimal de jours avec ventes pour lancer une prédiction
+MIN_SALES_POINTS = 30
 
 @celery.task(bind=True)
+@tenant_limited(QUEUE_INFERENCE)
 def run_prediction_for_product(self, job_id: int, product_id: int, company_id: int):
     """
     Tâche Celery pour lancer une prédiction de demande pour un produit spécifique.
@@ -22,53 +28,64 @@ def run_prediction_for_product(self, job_id: int, product_id: int, company_id: i
     sales_df = None
     product_sku = "unknown"
     
-    with Session(engine) as db:
+    with Session(get_engine()) as db:
         job = db.get(PredictionJob, job_id)
         if not job:
             print(f"Job {job_id}: ERREUR - Job non trouvé.")
             # La tâche échouera mais il n'y a pas d'objet job à mettre à jour.
             raise ValueError("Job not found")
+        if job.status == JobStatus.FAILED:
+            # Job abandonné (PREDICTION_JOB_STALE_SECONDS) et déjà remplacé par une nouvelle soumission
+            print(f"Job {job_id}: abandonné et remplacé, tâche ignorée.")
+            return
 
-        job.status = JobStatus.RUNNING
-        job.started_at = datetime.datetime.utcnow()
-        db.add(job)
-        db.commit()
+        update_job_state(db, job, JobStatus.RUNNING)
 
-        product = db.get(Product, product_id)
-        if not product or product.company_id != company_id:
-            raise ValueError("Product not found or access denied.")
-        product_sku = product.sku # Sauvegarder pour les logs
+    # Toute erreur après le passage à RUNNING (données invalides comprises) termine le job
+    # en FAILED : resté RUNNING, il serait réutilisé par les soumissions de même clé
+    prediction_results = None
+    try:
+        with Session(get_engine()) as db:
+            product = db.get(Product, product_id)
+            if not product or product.company_id != company_id:
+                raise ValueError("Product not found or access denied.")
+            product_sku = product.sku # Sauvegarder pour les logs
 
-        sales_records = db.exec(select(Sale).where(Sale.product_id == product_id).order_by(Sale.transaction_date)).all()
+            if count_sales_days(db, product_id) < MIN_SALES_POINTS:
+                raise ValueError(f"Not enough sales data for product {product.sku}. At least {MIN_SALES_POINTS} data points are required.")
 
-        if len(sales_records) < 30:
-            raise ValueError(f"Not enough sales data for product {product.sku}. At least 30 data points are required.")
+            # Une ligne par jour (agrégat journalier), jours sans vente complétés à 0
+            sales_df = get_daily_sales_df(db, product_id)
 
-        sales_df = pd.DataFrame(
-            [{"ds": s.transaction_date, "y": s.quantity_sold} for s in sales_records]
-        )
-        sales_df['ds'] = pd.to_datetime(sales_df['ds'])
-    
-    # À ce stade, la transaction 1 est terminée et la session est fermée.
-    # La ligne du job n'est plus verrouillée.
-    
-    # --- Partie Calcul (Hors transaction) ---
-    prediction_results = None
-    try:
-        print(f"Job {job_id}: Démarrage du pipeline de prédiction pour le produit {product_sku}.")
-        prediction_results = run_prediction_pipeline(sales_df)
+        # À ce stade, la session de lecture est fermée.
+        # La ligne du job n'est plus verrouillée.
+
+        # --- Partie Calcul (Hors transaction) ---
+        model_version = model_registry.active(company_id)
+        print(f"Job {job_id}: Démarrage du pipeline de prédiction pour le produit {product_sku} (modèle {model_version.version}).")
+        prediction_results = run_prediction_pipeline(sales_df, model_version)
         print(f"Job {job_id}: Pipeline de prédiction terminé.")
         
         # --- Transaction 2 : Sauvegarder les résultats ---
         print(f"Job {job_id}: Sauvegarde des résultats...")
-        with Session(engine) as db:
+        with Session(get_engine()) as db:
             job = db.get(PredictionJob, job_id) # Récupérer à nouveau l'objet job
             if job:
-                job.status = JobStatus.SUCCESS
-                job.completed_at = datetime.datetime.utcnow()
-                job.result_data = json.dumps(prediction_results, indent=4)
-                db.add(job)
-                db.commit()
+                # Les lignes de prévision vont dans `forecast` ; le job garde un résumé compact
+                run = create_forecast_run(
+                    db, company_id, model_version.version, model_version.error_std,
+                    {product_id: prediction_results["forecast_90_days"]},
+                )
+                update_job_state(
+                    db, job, JobStatus.SUCCESS,
+                    forecast_run_id=run.id,
+                    result_data=json.dumps({
+                        "run_id": run.id,
+                        "model_version": model_version.version,
+                        "product_id": product_id,
+                        "stock_optimization": prediction_results["stock_optimization"],
+                    }, separators=(",", ":")),
+                )
                 print(f"Job {job_id}: Résultats sauvegardés avec succès.")
         
         return {"status": "SUCCESS", "product_sku": product_sku, "results_preview": list(prediction_results.keys())}
@@ -76,15 +93,93 @@ def run_prediction_for_product(self, job_id: int, product_id: int, company_id: i
     except Exception as e:
         # --- Transaction d'Erreur : Sauvegarder l'échec ---
         print(f"Job {job_id}: ERREUR pendant le pipeline - {e}")
-        with Session(engine) as db:
+        with Session(get_engine()) as db:
             job = db.get(PredictionJob, job_id)
             if job:
-                job.status = JobStatus.FAILED
-                job.completed_at = datetime.datetime.utcnow()
-                job.result_data = str(e)
-                db.add(job)
-                db.commit()
+                update_job_state(db, job, JobStatus.FAILED, result_data=str(e))
                 print(f"Job {job_id}: Statut d'erreur sauvegardé.")
         
         # Relancer l'exception pour que Celery marque la tâche comme FAILED
-        raise e
\ No newline at end of file
+        raise e
+
+
+@celery.task(bind=True)
+@tenant_limited(QUEUE_REFRESH)
+def run_prediction_for_company(self, job_id: int, company_id: int):
+    """
+    Tâche Celery pour prédire la demande de tous les produits d'une entreprise en un seul passage.
+    L'historique de tout le catalogue est chargé en une requête, puis toutes les séries
+    sont prédites ensemble (un appel au modèle par jour d'horizon pour tout le catalogue).
+    """
+
+    # --- Transaction 1 : Démarrer le job et récupérer les données ---
+    print(f"Job {job_id}: Démarrage de la prédiction groupée pour l'entreprise {company_id}.")
+    with Session(get_engine()) as db:
+        job = db.get(PredictionJob, job_id)
+        if not job:
+            print(f"Job {job_id}: ERREUR - Job non trouvé.")
+            raise ValueError("Job not found")
+
+        update_job_state(db, job, JobStatus.RUNNING)
+
+    try:
+        # Une seule requête pour l'historique journalier de tous les produits de l'entreprise
+        with Session(get_engine()) as db:
+            all_sales = get_company_daily_sales(db, company_id)
+
+        # --- Partie Calcul (Hors transaction) ---
+        sku_by_product = dict(zip(all_sales['product_id'], all_sales['sku']))
+
+        sales_by_product = {}
+        skipped_skus = []
+        for product_id, product_sales in all_sales.groupby('product_id', sort=False):
+            if len(product_sales) < MIN_SALES_POINTS:
+                skipped_skus.append(sku_by_product[product_id])
+                continue
+            sales_by_product[product_id] = fill_missing_days(product_sales[['ds', 'y']])
+
+        if not sales_by_product:
+            raise ValueError(f"No product has enough sales data. At least {MIN_SALES_POINTS} data points are required.")
+
+        model_version = model_registry.active(company_id)
+        batch_results = run_batch_prediction_pipeline(sales_by_product, model_version)
+
+        # --- Transaction 2 : Sauvegarder les résultats ---
+        with Session(get_engine()) as db:
+            job = db.get(PredictionJob, job_id)
+            if job:
+                # Les lignes de prévision vont dans `forecast` ; le job garde un résumé compact
+                run = create_forecast_run(
+                    db, company_id, model_version.version, model_version.error_std,
+                    {product_id: results["forecast_90_days"] for product_id, results in batch_results.items()},
+                )
+                summary = {
+                    "run_id": run.id,
+                    "model_version": model_version.version,
+                    "products": {
+                        sku_by_product[product_id]: {
+                            "product_id": int(product_id),
+                            "stock_optimization": results["stock_optimization"],
+                        }
+                        for product_id, results in batch_results.items()
+                    },
+                    "skipped_products": skipped_skus,
+                }
+                update_job_state(
+                    db, job, JobStatus.SUCCESS,
+                    forecast_run_id=run.id,
+                    result_data=json.dumps(summary, separators=(",", ":")),
+                )
+                print(f"Job {job_id}: {len(batch_results)} prévisions sauvegardées.")
+
+        return {"status": "SUCCESS", "products_forecasted": len(batch_results), "products_skipped": len(skipped_skus)}
+
+    except Exception as e:
+        # --- Transaction d'Erreur : Sauvegarder l'échec ---
+        print(f"Job {job_id}: ERREUR pendant le pipeline groupé - {e}")
+        with Session(get_engine()) as db:
+            job = db.get(PredictionJob, job_id)
+            if job:
+                update_job_state(db, job, JobStatus.FAILED, result_data=str(e))
+
+        raise e
@@ -8,6 +8,7 @@ import { ResponsiveContainer, AreaChart, Area, XAxis, YAxis, CartesianGrid, Tool
 
 import { fetchProducts, triggerPrediction, fetchJobStatus, type Product } from '../../services/apiService';
 import { useAuthStore } from '../../stores/authStore';
+import { useJobEvents } from '../../hooks/useJobEvents';
 import { type PredictionResult } from '../../types';
 
 // ==============================================================================
@@ -18,14 +19,16 @@ interface PredictionResultDisplayProps {
 }
 
 const PredictionResultDisplay: React.FC<PredictionResultDisplayProps> = ({ jobId }) => {
+  const streaming = useJobEvents(jobId, ['predictionJobStatus', jobId]);
   // Utilise useQuery pour suivre le statut du job
   const { data: job, isLoading, isError } = useQuery({
     queryKey: ['predictionJobStatus', jobId],
-    queryFn: () => fetchJobStatus(jobId),
-    // Le polling s'arrête automatiquement quand le job est terminé
+    queryFn: () => fetchJobStatus(jobId, true),
+    // Les états arrivent par le flux SSE ; polling seulement si le flux est indisponible,
+    // arrêté automatiquement quand le job est terminé
     refetchInterval: (query) => {
       const status = query.state.data?.status;
-      return (status === 'SUCCESS' || status === 'FAILED') ? false : 3000; // Poll every 3 seconds
+      return (streaming || status === 'SUCCESS' || status === 'FAILED') ? false : 3000; // Poll every 3 seconds
     },
   });
 
@@ -7,6 +7,7 @@ import { Upload, FileText, CheckCircle, XCircle, Clock, Loader2, Eye, Database,
 
 import { uploadSalesFile, fetchJobStatus } from '../../services/apiService';
 import { useAuthStore } from '../../stores/authStore';
+import { useJobEvents } from '../../hooks/useJobEvents';
 import { type JobStatusResponse } from '../../types';
 
 // ==============================================================================
@@ -18,13 +19,15 @@ interface JobStatusRowProps {
 }
 
 const JobStatusRow: React.FC<JobStatusRowProps> = ({ jobId, initialStatus }) => {
+  const streaming = useJobEvents(jobId, ['jobStatus', jobId]);
   const { data: job, isError } = useQuery({
     queryKey: ['jobStatus', jobId],
     queryFn: () => fetchJobStatus(jobId),
-    // Le polling s'arrête automatiquement quand le job est terminé
+    // Les états arrivent par le flux SSE ; polling seulement si le flux est indisponible,
+    // arrêté automatiquement quand le job est terminé
     refetchInterval: (query) => {
       const status = query.state.data?.status;
-      return (status === 'SUCCESS' || status === 'FAILED') ? false : 3000; // Poll every 3 seconds
+      return (streaming || status === 'SUCCESS' || status === 'FAILED') ? false : 3000; // Poll every 3 seconds
     },
     initialData: { // Fournit des données initiales pour éviter un flash de chargement
       job_id: jobId,
@@ -59,7 +62,7 @@ const JobStatusRow: React.FC<JobStatusRowProps> = ({ jobId, initialStatus }) =>
       <td className="px-6 py-4 font-medium text-gray-900">Job #{job.job_id}</td>
       <td className="px-6 py-4">
         <span className={`inline-flex items-center gap-2 px-2 py-1 text-xs font-medium rounded-full ${color}`}>
-          {icon} {text}
+          {icon} {text}{job.status === 'RUNNING' && job.progress != null ? ` · ${job.progress} %` : ''}
         </span>
       </td>
       <td className="px-6 py-4 text-sm text-gray-500">{new Date(job.created_at).toLocaleString('fr-FR')}</td>
@@ -0,0 +1,40 @@
+// Fichier: src/hooks/useJobEvents.ts
+import { useEffect, useState } from 'react';
+import { useQueryClient, type QueryKey } from '@tanstack/react-query';
+
+import { streamJobEvents } from '../services/apiService';
+import type { JobStatusResponse } from '../types';
+
+// Suit un job par son flux SSE et pousse chaque état dans la requête `queryKey`.
+// Le résultat d'un événement (forme compacte) n'est jamais fusionné : à la fin du job,
+// seul l'avancement est mis à jour et la requête est relancée une fois pour obtenir la
+// réponse complète (statut et résultat ensemble, par ex. avec include_forecast).
+// Retourne false si le flux n'a pas pu être ouvert ou s'est fermé avant la fin du job
+// (redémarrage de l'API, proxy) : l'appelant revient alors au polling.
+export const useJobEvents = (jobId: number, queryKey: QueryKey): boolean => {
+  const queryClient = useQueryClient();
+  const [streaming, setStreaming] = useState(true);
+
+  useEffect(() => {
+    const controller = new AbortController();
+    let finished = false;
+    streamJobEvents(jobId, (event) => {
+      const { status, rows_processed, rows_total, progress } = event;
+      if (status === 'SUCCESS' || status === 'FAILED') {
+        finished = true;
+        queryClient.setQueryData<JobStatusResponse>(queryKey, (old) => (old ? { ...old, rows_processed, rows_total, progress } : old));
+        queryClient.invalidateQueries({ queryKey });
+      } else {
+        queryClient.setQueryData<JobStatusResponse>(queryKey, (old) => (old ? { ...old, status, rows_processed, rows_total, progress } : old));
+      }
+    }, controller.signal).then(() => {
+      if (!finished && !controller.signal.aborted) setStreaming(false);
+    }, () => {
+      if (!controller.signal.aborted) setStreaming(false);
+    });
+    return () => controller.abort();
+    // eslint-disable-next-line react-hooks/exhaustive-deps
+  }, [jobId]);
+
+  return streaming;
+};
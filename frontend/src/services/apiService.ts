@@ -1,6 +1,7 @@
 // Fichier: src/services/apiService.ts
 import api from '../api';
-import type { CompanyDetails, ProductDashboardData, JobStatusResponse, JobSubmission, LoginResponse, UserProfile } from '../types';
+import { useAuthStore } from '../stores/authStore';
+import type { CompanyDetails, ProductDashboardData, StockGrid, StockSimulation, JobEvent, JobStatusResponse, JobSubmission, LoginResponse, UserProfile } from '../types';
 
 // Types pour les payloads (ce que l'API attend)
 interface CompanyCreatePayload {
@@ -66,6 +67,30 @@ export const fetchProductDashboardData = async (productId: number): Promise<Prod
     return data;
 };
 
+// Grille taux de service x délai (stock de sécurité, point de commande) à partir de la dernière prévision
+export const fetchStockGrid = async (productId: number, serviceLevels?: number[], leadTimeDays?: number[]): Promise<StockGrid> => {
+    const params = new URLSearchParams();
+    serviceLevels?.forEach((level) => params.append('service_levels', String(level)));
+    leadTimeDays?.forEach((days) => params.append('lead_time_days', String(days)));
+    const { data } = await api.get(`/api/v1/dashboard/product/${productId}/stock-grid`, { params });
+    return data;
+};
+
+// Point de commande par simulation Monte-Carlo (taux de rupture, fill rate) à partir de la dernière prévision
+export const fetchStockSimulation = async (
+    productId: number,
+    params?: { service_level?: number; lead_time_days?: number; lead_time_std_days?: number; scenarios?: number },
+): Promise<StockSimulation> => {
+    const { data } = await api.get(`/api/v1/dashboard/product/${productId}/stock-simulation`, { params });
+    return data;
+};
+
+// Rapport de réapprovisionnement de l'entreprise active (une ligne par produit), au format CSV
+export const downloadReplenishmentReport = async (): Promise<Blob> => {
+    const { data } = await api.get('/api/v1/predictions/replenishment', { params: { format: 'csv' }, responseType: 'blob' });
+    return data;
+};
+
 // Fonction pour créer une nouvelle entreprise
 export const createCompany = async (payload: CompanyCreatePayload): Promise<CompanyDetails> => {
     const { data } = await api.post('/api/v1/company/', payload);
@@ -86,9 +111,27 @@ export const inviteUser = async (payload: UserInvitePayload): Promise<UserProfil
     return data;
 }
 
-export const fetchProducts = async (): Promise<any[]> => {
-    const { data } = await api.get('/api/v1/products/');
-    return data;
+// Page du catalogue (pagination par curseur) avec recherche optionnelle sur le SKU ou le nom
+export const fetchProductsPage = async (params?: {
+    cursor?: string;
+    limit?: number;
+    search?: string;
+    search_mode?: 'prefix' | 'substring';
+}): Promise<{ items: Product[]; nextCursor: string | null }> => {
+    const response = await api.get('/api/v1/products/', { params });
+    return { items: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+};
+
+// Catalogue complet (liste et sélecteurs de produits) : pages suivies jusqu'au dernier curseur
+export const fetchProducts = async (): Promise<Product[]> => {
+    const products: Product[] = [];
+    let cursor: string | undefined;
+    do {
+        const page = await fetchProductsPage({ cursor, limit: 1000 });
+        products.push(...page.items);
+        cursor = page.nextCursor ?? undefined;
+    } while (cursor);
+    return products;
 };
 
 export const createProduct = async (payload: ProductCreatePayload): Promise<Product> => {
@@ -107,21 +150,54 @@ export const deleteProduct = async (id: number): Promise<void> => {
 
 // --- FONCTIONS POUR VENTES & JOBS ---
 
-export const uploadSalesFile = async (file: File): Promise<JobSubmission> => {
+// `resumeJobId` : import échoué à reprendre (ses lignes déjà importées sont sautées)
+export const uploadSalesFile = async (file: File, resumeJobId?: number): Promise<JobSubmission> => {
     const formData = new FormData();
     formData.append('file', file);
     
     const { data } = await api.post('/api/v1/sales/upload', formData, {
         headers: { 'Content-Type': 'multipart/form-data' },
+        params: resumeJobId !== undefined ? { resume_job_id: resumeJobId } : undefined,
     });
     return data;
 };
 
-export const fetchJobStatus = async (jobId: number): Promise<JobStatusResponse> => {
-    const { data } = await api.get(`/api/v1/sales/jobs/${jobId}`);
+// `includeForecast` : ajoute les lignes de prévision au résumé d'un job de prédiction
+export const fetchJobStatus = async (jobId: number, includeForecast = false): Promise<JobStatusResponse> => {
+    const { data } = await api.get(`/api/v1/sales/jobs/${jobId}`, {
+        params: includeForecast ? { include_forecast: true } : undefined,
+    });
     return data;
 };
 
+// Flux SSE des états d'un job, lu avec fetch (EventSource ne permet pas d'envoyer l'en-tête
+// Authorization). Se termine quand le serveur ferme le flux (job terminé) ou sur `signal`.
+export const streamJobEvents = async (jobId: number, onEvent: (event: JobEvent) => void, signal?: AbortSignal): Promise<void> => {
+    const { token } = useAuthStore.getState();
+    const response = await fetch(`${api.defaults.baseURL}/api/v1/sales/jobs/${jobId}/events`, {
+        headers: token ? { Authorization: `Bearer ${token}` } : {},
+        signal,
+    });
+    if (!response.ok || !response.body) {
+        throw new Error(`Job event stream failed (${response.status})`);
+    }
+    const reader = response.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = '';
+    for (;;) {
+        const { value, done } = await reader.read();
+        if (done) return;
+        buffer += value;
+        let end;
+        while ((end = buffer.indexOf('\n\n')) >= 0) {
+            const block = buffer.slice(0, end);
+            buffer = buffer.slice(end + 2);
+            // Les lignes commençant par ':' (maintien de connexion) sont ignorées
+            const data = block.split('\n').filter((line) => line.startsWith('data:')).map((line) => line.slice(5)).join('\n');
+            if (data) onEvent(JSON.parse(data));
+        }
+    }
+};
+
 // --- FONCTIONS POUR PRÉDICTIONS ---
 
 export const triggerPrediction = async (productId: number): Promise<JobSubmission> => {
@@ -36,6 +36,8 @@ export interface JobSubmission {
     job_id: number;
     status: string;
     message: string;
+    deduplicated?: boolean; // Job existant retourné (prédiction identique déjà soumise)
+    result?: string | null;
 }
 
 export interface JobStatusResponse {
@@ -44,13 +46,29 @@ export interface JobStatusResponse {
     created_at: string;
     started_at?: string;
     completed_at?: string;
+    rows_processed?: number;
+    rows_total?: number | null;
+    progress?: number | null; // Avancement en pourcentage (null si inconnu)
+    forecast_run_id?: number;
     result: any; // Peut être une string (message) ou un objet (résultats de prédiction)
 }
 
+// État d'un job poussé par le flux SSE /api/v1/sales/jobs/{id}/events
+export interface JobEvent {
+    job_id: number;
+    status: JobStatusResponse['status'];
+    rows_processed: number;
+    rows_total: number | null;
+    progress: number | null;
+    result: string | null; // Renseigné une fois le job terminé
+}
+
 export interface PredictionResult {
     forecast_90_days: {
         dates: string[];
         predicted_demand: number[];
+        lower_bound?: number[];
+        upper_bound?: number[];
     };
     stock_optimization: {
         service_level_percent: number;
@@ -64,6 +82,41 @@ export interface PredictionResult {
     };
 }
 
+// Grille what-if : une ligne par taux de service, une colonne par délai
+export interface StockGrid {
+    product_id: number;
+    run_id: number;
+    model_version: string;
+    avg_daily_demand_forecast: number;
+    model_error_std_dev: number;
+    lead_time_std_days: number;
+    service_levels: number[];
+    lead_time_days: number[];
+    safety_stock: number[][];
+    reorder_point: number[][];
+}
+
+// Simulation Monte-Carlo du stock, comparée à l'approximation normale
+export interface StockSimulation {
+    product_id: number;
+    run_id: number;
+    model_version: string;
+    residuals: 'empirical' | 'gaussian';
+    scenarios: number;
+    service_level: number;
+    lead_time_days: number;
+    lead_time_std_days: number;
+    avg_daily_demand_forecast: number;
+    lead_time_demand_mean: number;
+    lead_time_demand_std: number;
+    reorder_point: number;
+    stockout_probability: number;
+    fill_rate: number;
+    normal_reorder_point: number;
+    normal_stockout_probability: number;
+    normal_fill_rate: number;
+}
+
 export interface ChartDataPoint {
     date: string;
     actual_sales?: number | null;